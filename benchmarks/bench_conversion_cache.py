@@ -0,0 +1,82 @@
+import io
+import os
+import sys
+import time
+import shlex
+import random
+import argparse
+import tempfile
+import subprocess
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libgenbot.pdf_converter import convert_to_pdf, converter_command
+from libgenbot.conversion_cache import ConversionCache
+
+STUB_CONVERTER = f"{sys.executable} {os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stub_ebook_convert.py')}"
+
+# The old convert_to_pdf: a shell per call and no cache
+def convert_with_shell(input_file, output_pdf):
+    command = f"{STUB_CONVERTER} {shlex.quote(input_file)} {shlex.quote(output_pdf)}"
+    subprocess.run(command, shell=True, capture_output=True, text=True)
+
+def timed(function):
+    start_time = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        function()
+    return time.perf_counter() - start_time
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversion with and without the content-hash conversion cache.")
+    parser.add_argument("--books", type=int, default=24, help="Source files to convert")
+    parser.add_argument("--unique", type=int, default=8, help="Distinct contents among them (same book, other titles)")
+    parser.add_argument("--size-kb", type=int, default=2048)
+    parser.add_argument("--convert-seconds", type=float, default=0.5, help="CPU seconds per stub conversion")
+    parser.add_argument("--spawns", type=int, default=30, help="Zero-cost conversions for the shell vs argv timing")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    contents = [rng.randbytes(args.size_kb * 1024) for _ in range(args.unique)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        sources = []
+        for number in range(args.books):
+            path = os.path.join(directory, f"book-{number}.epub")
+            with open(path, 'wb') as f:
+                f.write(contents[number % args.unique])
+            sources.append(path)
+
+        def outputs(name):
+            os.makedirs(os.path.join(directory, name))
+            return [os.path.join(directory, name, os.path.basename(source)[:-len("epub")] + "pdf") for source in sources]
+
+        os.environ["STUB_CONVERT_SECONDS"] = str(args.convert_seconds)
+        old = timed(lambda: [convert_with_shell(source, output) for source, output in zip(sources, outputs("old"))])
+        print(f"shell, no cache:        {old:6.2f}s")
+
+        cache = ConversionCache(os.path.join(directory, "cache"))
+        cold = timed(lambda: [convert_to_pdf(source, output, STUB_CONVERTER, cache) for source, output in zip(sources, outputs("cold"))])
+        stats = cache.stats()
+        print(f"cache, first run:       {cold:6.2f}s  {stats['hits']} hits / {stats['misses']} misses, "
+              f"{stats['seconds_saved']:.1f}s saved")
+
+        warm = timed(lambda: [convert_to_pdf(source, output, STUB_CONVERTER, cache) for source, output in zip(sources, outputs("warm"))])
+        stats = cache.stats()
+        print(f"cache, new output dir:  {warm:6.2f}s  hit rate {stats['hit_rate']:.0%} overall, "
+              f"{stats['seconds_saved']:.1f}s saved, served by {stats['served_by']}")
+
+        again = timed(lambda: [convert_to_pdf(source, output, STUB_CONVERTER, cache) for source, output in
+                               zip(sources, [os.path.join(directory, "warm", os.path.basename(source)[:-len("epub")] + "pdf")
+                                             for source in sources])])
+        print(f"PDFs already there:     {again:6.2f}s")
+
+        os.environ["STUB_CONVERT_SECONDS"] = "0"
+        source, output = sources[0], os.path.join(directory, "spawn.pdf")
+        shell = timed(lambda: [convert_with_shell(source, output) for _ in range(args.spawns)])
+        argv = timed(lambda: [subprocess.run(converter_command(STUB_CONVERTER) + [source, output], capture_output=True)
+                              for _ in range(args.spawns)])
+        print(f"process start, shell=True {shell / args.spawns * 1000:6.1f} ms, argv {argv / args.spawns * 1000:6.1f} ms")
+
+if __name__ == "__main__":
+    main()
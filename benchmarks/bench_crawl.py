@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libgenbot.book_collection import get_books, get_books_async
+from libgenbot.http_session import pool_stats
+from libgen_stub import start_stub_server, search_url
+
+# Function to time one crawl and report the rows it returned
+def timed(label, crawl):
+    start_time = time.time()
+    books = crawl()
+    elapsed_time = time.time() - start_time
+    print(f"{label}: {len(books)} books in {elapsed_time:.2f} seconds")
+    return elapsed_time
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sequential and asyncio page crawls against a local stub server.")
+    parser.add_argument("--max-books", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds the stub server waits per request")
+    parser.add_argument("--concurrency", type=int, default=5)
+    args = parser.parse_args()
+
+    server = start_stub_server(total_results=args.max_books, latency=args.latency)
+    url = search_url(server)
+
+    sequential = timed("sequential", lambda: get_books("benchmark", args.max_books, base_url=url))
+    stats = pool_stats()
+    print(f"  {stats['connections']} connections for {stats['requests']} requests ({stats['reuse_rate']:.0%} reused)")
+    concurrent = timed(f"asyncio x{args.concurrency}",
+                       lambda: asyncio.run(get_books_async("benchmark", args.max_books, args.concurrency, base_url=url)))
+    print(f"Speedup: {sequential / concurrent:.1f}x")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import os
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libgenbot.book_dedup import group_editions, pick_editions
+
+WORDS = ("machine learning deep neural networks python data science statistics algorithms tensorflow "
+         "pytorch vision language models probability optimization systems design patterns cloud").split()
+SUBTITLES = ["A Practical Guide", "Concepts, Tools, and Techniques", "From Zero to Hero", "Build Intelligent Systems"]
+FORMATS = ['pdf', 'epub', 'djvu', 'mobi']
+# Titles that differ only in symbols the canonical form must keep; each must stay its own book
+DISTINCT_TITLES = ["Algorithms in C", "Algorithms in C++", "Algorithms in C#",
+                   "The C Programming Language", "The C++ Programming Language", "The C# Programming Language",
+                   "Learning F", "Learning F#"]
+
+# Function to fake a crawled metadata CSV: `titles` distinct books, each listed as several editions
+# with ISBN suffixes, subtitles, edition markers, case changes and the odd typo
+def synthetic_books(titles, editions=4, seed=1):
+    rng = random.Random(seed)
+    books = []
+    for title_id in range(titles):
+        title = f"Hands-On {' '.join(rng.sample(WORDS, 4)).title()} {title_id}"
+        for _ in range(rng.randint(1, editions)):
+            name = title
+            roll = rng.random()
+            if roll < 0.3:
+                name += f" 978{rng.randint(10**9, 10**10 - 1)}"
+            elif roll < 0.5:
+                name += f": {rng.choice(SUBTITLES)}"
+            elif roll < 0.6:
+                name += " (2nd Edition)"
+            elif roll < 0.7:
+                position = rng.randrange(9, len(name) - 8)
+                name = name[:position] + name[position + 1:]  # Dropped letter
+            books.append({"name": name.upper() if rng.random() < 0.1 else name,
+                          "format": rng.choice(FORMATS), "year": str(rng.randint(1995, 2024)),
+                          "true_title": title_id})
+    rng.shuffle(books)
+    return books
+
+# Function to load a CSV written by book_collection.save_books_to_csv
+def load_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+# Function to keep one book per exact name, the way filter_books used to
+def exact_name_groups(books):
+    return len({book['name'] for book in books})
+
+# Function to check that pick_editions keeps every DISTINCT_TITLES book, each with its own editions
+def distinct_titles_kept():
+    books = [{"name": name, "format": book_format, "year": "2020"}
+             for name in DISTINCT_TITLES for book_format in ("pdf", "epub")]
+    books.append({"name": "Algorithms in C++ (3rd Edition)", "format": "djvu", "year": "2001"})
+    return sorted(book['name'] for book in pick_editions(books)) == sorted(DISTINCT_TITLES)
+
+# Function to group the same synthetic rows in interpreters with different str hash seeds;
+# the groups must not change, or the numbered listing would change between runs
+def stable_across_hash_seeds(titles, seeds=("1", "2")):
+    outputs = []
+    for seed in seeds:
+        environment = dict(os.environ, PYTHONHASHSEED=seed)
+        outputs.append(subprocess.run([sys.executable, os.path.abspath(__file__), "--groups-json", str(titles)],
+                                      env=environment, check=True, capture_output=True, text=True).stdout)
+    return all(output == outputs[0] for output in outputs)
+
+def main():
+    parser = argparse.ArgumentParser(description="Time near-duplicate edition grouping on large metadata sets.")
+    parser.add_argument("--csv", help="Crawled metadata CSV to group instead of synthetic rows")
+    parser.add_argument("--sizes", default="10000,50000,100000,200000",
+                        help="Distinct synthetic titles per run (each has 1-4 editions)")
+    parser.add_argument("--seed-check-titles", type=int, default=5000,
+                        help="Synthetic titles grouped under two PYTHONHASHSEED values, which must agree")
+    parser.add_argument("--groups-json", type=int, help=argparse.SUPPRESS)  # Used by the hash seed check
+    args = parser.parse_args()
+
+    if args.groups_json:
+        print(json.dumps(group_editions(synthetic_books(args.groups_json))))
+        return
+
+    if args.csv:
+        runs = [(os.path.basename(args.csv), load_csv(args.csv))]
+    else:
+        runs = [(f"{int(size)} titles", synthetic_books(int(size))) for size in args.sizes.split(",")]
+
+    for label, books in runs:
+        start_time = time.perf_counter()
+        groups = group_editions(books)
+        elapsed = time.perf_counter() - start_time
+        line = (f"{label:>14s}: {len(books):7d} rows -> {len(groups):7d} groups "
+                f"(exact names: {exact_name_groups(books):7d})  {elapsed:6.2f}s  "
+                f"{elapsed / len(books) * 1e6:5.1f}us/row")
+        if 'true_title' in books[0]:
+            # Groups holding more than one real title would hide a book from the download list
+            merged = sum(len({books[index]['true_title'] for index in group}) > 1 for group in groups)
+            line += f"  true titles: {len({book['true_title'] for book in books})}, over-merged groups: {merged}"
+        print(line)
+
+    start_time = time.perf_counter()
+    picked = pick_editions(runs[-1][1])
+    print(f"pick_editions on the last set: {len(picked)} books in {time.perf_counter() - start_time:.2f}s")
+
+    kept = distinct_titles_kept()
+    print(f"C, C++ and C# titles kept apart: {'yes' if kept else 'NO'}")
+    stable = stable_across_hash_seeds(args.seed_check_titles)
+    print(f"Same groups under PYTHONHASHSEED=1 and 2 ({args.seed_check_titles} titles): {'yes' if stable else 'NO'}")
+    if not (kept and stable):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
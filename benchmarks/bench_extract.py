@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libgenbot.text_extraction import TextExtractor, TextCache, iter_documents, extract_pdf_pages
+from libgenbot.resumable_download import hash_existing
+
+# Function to write a PDF with one text page per entry of `pages`, lines of Helvetica;
+# small enough to need no PDF library
+def write_pdf(path, pages, words_per_line=12):
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        words = text.split()
+        lines = [" ".join(words[i:i + words_per_line]) for i in range(0, len(words), words_per_line)]
+        stream = ("BT /F1 9 Tf 11 TL 40 760 Td " + " ".join(f"({line}) Tj T*" for line in lines) + " ET").encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >>"
+                       b" /Contents %d 0 R >>" % (len(objects)))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids), len(kids))
+
+    data, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+# Function to write a library of books with random words; returns {path: pages}
+def synthetic_library(directory, books, pages_per_book, words_per_page, seed=1):
+    rng = random.Random(seed)
+    vocabulary = ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(3, 9))) for _ in range(5000)]
+    library = {}
+    for number in range(books):
+        path = os.path.join(directory, f"book-{number:03d}.pdf")
+        library[path] = [" ".join(rng.choices(vocabulary, k=words_per_page)) for _ in range(pages_per_book)]
+        write_pdf(path, library[path])
+    return library
+
+# Stands in for a page range PyPDF2 cannot parse
+def failing_chunk(path, start, stop):
+    raise ValueError(f"damaged page stream in pages {start}-{stop}")
+
+# Extractor whose second task of one book fails, after its first task's pages came back
+class FailingChunkExtractor(TextExtractor):
+    def __init__(self, broken_path, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.broken_path = broken_path
+
+    def tasks(self, path):
+        tasks = super().tasks(path)
+        if path == self.broken_path:
+            tasks[1] = (failing_chunk, tasks[1][1])
+        return tasks
+
+def timed_extract(extractor, paths):
+    start_time = time.perf_counter()
+    documents = dict(extractor.extract_documents(paths))
+    return documents, time.perf_counter() - start_time
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel PDF text extraction, cold and from the text cache, "
+                                                 "and a book whose second page chunk fails; exits 1 if a "
+                                                 "partly extracted book comes out as a complete one.")
+    parser.add_argument("--books", type=int, default=12)
+    parser.add_argument("--pages", type=int, default=48, help="Pages per book")
+    parser.add_argument("--words", type=int, default=250, help="Words per page")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        library_dir = os.path.join(directory, "library")
+        os.makedirs(library_dir)
+        library = synthetic_library(library_dir, args.books, max(args.pages, 17), args.words)
+        paths = list(iter_documents(library_dir))
+        pages = sum(len(book) for book in library.values())
+        print(f"{len(paths)} books, {pages} pages, {args.processes} processes")
+
+        start_time = time.perf_counter()
+        for path in paths:
+            extract_pdf_pages(path, 0, len(library[path]))
+        sequential = time.perf_counter() - start_time
+        print(f"  one process, no cache    {sequential:6.2f}s  {pages / sequential:8.0f} pages/sec")
+
+        cache = TextCache(os.path.join(directory, "text_cache.sqlite3"))
+        documents, cold = timed_extract(TextExtractor(args.processes, cache), paths)
+        complete = all(len(documents.get(path, [])) == len(library[path]) for path in paths)
+        print(f"  TextExtractor, cold      {cold:6.2f}s  {pages / cold:8.0f} pages/sec, all pages: {complete}")
+        documents, warm = timed_extract(TextExtractor(args.processes, cache), paths)
+        print(f"  TextExtractor, cached    {warm:6.2f}s  {pages / warm:8.0f} pages/sec")
+
+        # A damaged chunk in the middle of a book: the book must not come out truncated or be cached
+        broken = paths[len(paths) // 2]
+        fresh_cache = TextCache(os.path.join(directory, "fresh_cache.sqlite3"))
+        extractor = FailingChunkExtractor(broken, args.processes, fresh_cache)
+        documents, _ = timed_extract(extractor, paths)
+        others_complete = all(len(documents.get(path, [])) == len(library[path]) for path in paths if path != broken)
+        left_out = broken not in documents and fresh_cache.get(hash_existing(broken).hexdigest()) is None
+        ok = left_out and others_complete and extractor.report()['failed_files'] == 1
+        print(f"Book with a failing second chunk left out and uncached, others complete: {'yes' if ok else 'NO'}")
+        sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from libgenbot.fulltext_index import FullTextIndex, parse_query
+
+# Function to fake a library: books of pages whose word frequencies follow Zipf's law
+def zipfian_library(books, pages_per_book, words_per_page, vocabulary_size=50000, seed=1):
+    rng = random.Random(seed)
+    vocabulary = [f"word{index}" for index in range(vocabulary_size)]
+    cumulative = list(np.cumsum([1 / rank for rank in range(1, vocabulary_size + 1)]))
+    return {f"/library/book{book}.pdf": [" ".join(rng.choices(vocabulary, cum_weights=cumulative, k=words_per_page))
+                                         for _ in range(pages_per_book)]
+            for book in range(books)}
+
+# Function to pick queries from the corpus itself: loose word pairs and three-word phrases
+def sample_queries(library, count, seed=2):
+    rng = random.Random(seed)
+    pages = [page.split() for book in library.values() for page in book]
+    queries = []
+    for number in range(count):
+        words = rng.choice(pages)
+        start = rng.randrange(len(words) - 3)
+        queries.append(" ".join(words[start:start + 2]) if number % 2 else '"' + " ".join(words[start:start + 3]) + '"')
+    return queries
+
+# The notebook has no index: finding a phrase means scanning the text of every page
+def linear_scan(library, query):
+    phrases, terms = parse_query(query)
+    patterns = [re.compile(r'\b' + r'\s+'.join(words) + r'\b') for words in phrases] + \
+               [re.compile(r'\b' + term + r'\b') for term in terms]
+    matches = []
+    for path, pages in library.items():
+        for number, text in enumerate(pages, start=1):
+            counts = [len(pattern.findall(text)) for pattern in patterns]
+            if all(counts[:len(phrases)]) and any(counts):
+                matches.append((path, number))
+    return matches
+
+def percentile(values, fraction):
+    return sorted(values)[min(int(len(values) * fraction), len(values) - 1)] * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the BM25 full-text index against a linear scan.")
+    parser.add_argument("--books", type=int, default=400)
+    parser.add_argument("--pages", type=int, default=100, help="Pages per book")
+    parser.add_argument("--words", type=int, default=300, help="Words per page")
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    library = zipfian_library(args.books, args.pages, args.words)
+    text_bytes = sum(len(page) for pages in library.values() for page in pages)
+    print(f"{args.books} books, {args.books * args.pages} pages, {text_bytes / 1024 / 1024:.1f} MB of text")
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = FullTextIndex(directory)
+        entries = [(path, path, 0, 0, pages) for path, pages in library.items()]
+        start_time = time.perf_counter()
+        index.index_books(entries[:-10])
+        build_seconds = time.perf_counter() - start_time
+        stats = index.stats()
+        print(f"build: {build_seconds:.1f}s ({args.words * stats['pages'] / build_seconds:,.0f} tokens/sec), "
+              f"{stats['bytes'] / 1024 / 1024:.1f} MB on disk ({stats['bytes'] / text_bytes:.0%} of the text), "
+              f"{stats['terms']} terms")
+
+        start_time = time.perf_counter()
+        for entry in entries[-10:]:
+            index.index_books([entry])
+        print(f"incremental: 10 books one at a time in {time.perf_counter() - start_time:.2f}s, "
+              f"{index.stats()['segments']} segments after merging")
+        start_time = time.perf_counter()
+        index.remove_books([path for path, *_ in entries[:5]])
+        index.index_books(entries[:5])
+        print(f"replace 5 books: {time.perf_counter() - start_time:.2f}s; optimize: ", end="")
+        start_time = time.perf_counter()
+        index.optimize()
+        print(f"{time.perf_counter() - start_time:.1f}s")
+
+        start_time = time.perf_counter()
+        index = FullTextIndex(directory)
+        print(f"open (memory-mapped): {(time.perf_counter() - start_time) * 1000:.1f} ms")
+
+        queries = sample_queries(library, args.queries)
+        index_times, scan_times, mismatches = [], [], 0
+        for query in queries:
+            start_time = time.perf_counter()
+            index.search(query, k=10)
+            index_times.append(time.perf_counter() - start_time)
+            results = index.search(query, k=10 ** 9)
+            start_time = time.perf_counter()
+            expected = linear_scan(library, query)
+            scan_times.append(time.perf_counter() - start_time)
+            mismatches += {(result['path'], result['page']) for result in results} != set(expected)
+        for label, times in (("index top-10", index_times), ("linear scan", scan_times)):
+            print(f"{label:14s} mean {sum(times) / len(times) * 1000:8.2f} ms  p95 {percentile(times, 0.95):8.2f} ms")
+        print(f"queries whose matching pages differ from the scan: {mismatches} of {len(queries)}")
+
+if __name__ == "__main__":
+    main()
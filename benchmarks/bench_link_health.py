@@ -0,0 +1,72 @@
+import io
+import os
+import sys
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libgenbot.core import download_books_concurrently
+from libgenbot.library_manifest import LibraryManifest
+from libgenbot.mirror_scheduler import MirrorScheduler
+from libgenbot.link_health import LinkHealth
+from libgen_stub import start_stub_server, mirror_link
+
+# Function to run one bulk download into a fresh directory; returns seconds, books on disk and the scheduler
+def run(books, directory, workers, health, backoff_base):
+    output_dir = os.path.join(directory, "downloads")
+    manifest = LibraryManifest(os.path.join(directory, "manifest.sqlite3"))
+    scheduler = MirrorScheduler(rate=100, burst=workers, max_concurrency=workers, backoff_base=backoff_base,
+                                mirrors=[], health=health)
+    start_time = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        download_books_concurrently(books, output_dir, manifest, scheduler, download_workers=workers)
+    seconds = time.perf_counter() - start_time
+    downloaded = len(os.listdir(output_dir)) if os.path.exists(output_dir) else 0
+    return seconds, downloaded, scheduler
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk runs with dead mirror links, without and with the link health store.")
+    parser.add_argument("--books", type=int, default=20, help="Books whose mirror still has the file")
+    parser.add_argument("--dead", type=int, default=6, help="Books whose file is gone from the mirror")
+    parser.add_argument("--file-kb", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--backoff-base", type=float, default=1.0, help="MirrorScheduler backoff base (its default is 1s)")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    files = {}
+    for _ in range(args.books):
+        data = rng.randbytes(args.file_kb * 1024)
+        files[hashlib.md5(data).hexdigest().upper()] = data
+    dead = [hashlib.md5(rng.randbytes(16)).hexdigest().upper() for _ in range(args.dead)]
+
+    for gone_pages, label in ((False, "mirror page up, file 404"), (True, "mirror page 404")):
+        server = start_stub_server(latency=0.02, files=files, gone_pages=gone_pages)
+        books = [{"id": str(number), "name": f"book-{number}", "format": "pdf", "size": f"{args.file_kb} Kb",
+                  "link": mirror_link(server, md5)} for number, md5 in enumerate(list(files) + dead)]
+        rng.shuffle(books)
+        print(f"{label}: {args.books} live + {args.dead} dead links, {args.workers} workers")
+
+        with tempfile.TemporaryDirectory() as directory:
+            seconds, downloaded, _ = run(books, os.path.join(directory, "plain"), args.workers, None, args.backoff_base)
+            requests_made = server.request_count
+            print(f"  no link health            {seconds:6.2f}s  {downloaded}/{len(books)} books, {requests_made} requests")
+
+            health = LinkHealth(os.path.join(directory, "link_health.sqlite3"))
+            for number in (1, 2):
+                before = server.request_count
+                seconds, downloaded, scheduler = run(books, os.path.join(directory, f"run-{number}"), args.workers,
+                                                     health, args.backoff_base)
+                metrics = scheduler.metrics()
+                print(f"  link health, run {number}        {seconds:6.2f}s  {downloaded}/{len(books)} books, "
+                      f"{server.request_count - before} requests ({metrics['probes']} HEAD probes, "
+                      f"{metrics['retries']} retries), {health.stats()['dead']} links known dead")
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
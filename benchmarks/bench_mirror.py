@@ -0,0 +1,71 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libgenbot.resumable_download import fetch_book
+from libgenbot.mirror_scheduler import MirrorScheduler
+from libgen_stub import start_stub_server, mirror_link
+
+# Function reproducing the old retry loop: same link every time, fixed 2 second sleep
+def fixed_retry(link, output_file, retries=3):
+    for attempt in range(retries):
+        try:
+            return fetch_book(link, output_file)
+        except Exception:
+            if attempt + 1 < retries:
+                time.sleep(2)
+    return False
+
+def main():
+    parser = argparse.ArgumentParser(description="Fixed retries vs adaptive per-host scheduling against failing stub mirrors.")
+    parser.add_argument("--books", type=int, default=40)
+    parser.add_argument("--capacity", type=int, default=3, help="Concurrent requests the primary mirror accepts")
+    parser.add_argument("--fail-rate", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+
+    files = {}
+    for _ in range(args.books):
+        data = os.urandom(64 * 1024)
+        files[hashlib.md5(data).hexdigest().upper()] = data
+
+    primary = start_stub_server(latency=args.latency, files=files, fail_rate=args.fail_rate, capacity=args.capacity)
+    secondary = start_stub_server(latency=args.latency * 2, files=files)
+    links = [mirror_link(primary, md5) for md5 in files]
+    alternate = mirror_link(secondary, "{md5}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            fixed_results = list(executor.map(
+                lambda link: fixed_retry(link, os.path.join(directory, "fixed-" + link[-32:])), links))
+        fixed_seconds = time.perf_counter() - start_time
+
+        scheduler = MirrorScheduler(rate=50, burst=10, max_concurrency=16, backoff_base=0.2, mirrors=[alternate])
+
+        def adaptive(link):
+            try:
+                return scheduler.fetch(link, lambda url: fetch_book(url, os.path.join(directory, "adaptive-" + link[-32:])))
+            except Exception:
+                return False
+
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            adaptive_results = list(executor.map(adaptive, links))
+        adaptive_seconds = time.perf_counter() - start_time
+
+    print(f"Fixed (4 workers, sleep 2s):  {sum(map(bool, fixed_results))}/{args.books} in {fixed_seconds:.2f}s")
+    print(f"Adaptive (AIMD + failover):   {sum(map(bool, adaptive_results))}/{args.books} in {adaptive_seconds:.2f}s")
+    print(json.dumps(scheduler.metrics(), indent=2))
+    primary.shutdown()
+    secondary.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import random
+import argparse
+import itertools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nltk
+from nltk.corpus import stopwords, wordnet
+from nltk.stem import WordNetLemmatizer
+from libgenbot.text_normalizer import TextNormalizer, normalize_texts, download_resources
+from libgenbot.text_extraction import iter_document_texts
+
+# The notebook's preprocess_text, unchanged, as the baseline
+def preprocess_text(text):
+    text = text.lower()  # Convert text to lowercase
+    tokens = nltk.word_tokenize(text)
+    stop_words = set(stopwords.words('english'))
+    tokens = [word for word in tokens if word.isalnum() and word not in stop_words]
+
+    lemmatizer = WordNetLemmatizer()
+    tokens = [lemmatizer.lemmatize(token) for token in tokens]
+
+    return tokens
+
+# Function to fake book-sized texts whose word frequencies follow Zipf's law, drawn from
+# WordNet's vocabulary plus plurals and stop words so lemmatization has work to do
+def zipfian_texts(documents, words_per_document, vocabulary_size=30000, seed=1):
+    rng = random.Random(seed)
+    lemmas = sorted(name for name in itertools.islice(wordnet.all_lemma_names(), vocabulary_size * 2)
+                    if name.isalpha())
+    vocabulary = stopwords.words('english') + rng.sample(lemmas, min(vocabulary_size, len(lemmas)))
+    vocabulary += [word + "s" for word in vocabulary[:vocabulary_size // 4]]
+    rng.shuffle(vocabulary)
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    texts = []
+    for _ in range(documents):
+        words = rng.choices(vocabulary, weights, k=words_per_document)
+        # Sentences of 15 words, like running text
+        texts.append(" ".join(" ".join(words[i:i + 15]).capitalize() + "." for i in range(0, len(words), 15)))
+    return texts
+
+def timed_run(label, function, texts, words):
+    start_time = time.perf_counter()
+    results = function(texts)
+    elapsed = time.perf_counter() - start_time
+    print(f"{label:28s} {elapsed:7.2f}s  {words / elapsed:10.0f} words/sec")
+    return results, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the notebook's preprocess_text with TextNormalizer.")
+    parser.add_argument("--corpus", help="Directory of PDF/DOCX books to use instead of synthetic text")
+    parser.add_argument("--documents", type=int, default=40)
+    parser.add_argument("--words", type=int, default=20000, help="Words per synthetic document")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    download_resources()
+    if args.corpus:
+        texts = [text for path, text in iter_document_texts(args.corpus)]
+    else:
+        texts = zipfian_texts(args.documents, args.words)
+    words = sum(len(text.split()) for text in texts)
+    print(f"{len(texts)} documents, {words} words")
+
+    baseline, baseline_seconds = timed_run("preprocess_text (notebook)", lambda texts: [preprocess_text(text) for text in texts],
+                                           texts, words)
+
+    normalizer = TextNormalizer()
+    results, seconds = timed_run("TextNormalizer", lambda texts: [normalizer.tokens(text) for text in texts], texts, words)
+    stats = normalizer.stats()
+    print(f"{'':28s} identical output: {results == baseline}, lemma cache {stats['cached_tokens']} tokens, "
+          f"{stats['hit_rate']:.1%} hits, {baseline_seconds / seconds:.1f}x")
+
+    results, seconds = timed_run(f"normalize_texts ({args.processes} procs)",
+                                 lambda texts: list(normalize_texts(texts, args.processes, batch_size=2)), texts, words)
+    print(f"{'':28s} identical output: {results == baseline}, {baseline_seconds / seconds:.1f}x")
+
+    simple = TextNormalizer(tokenizer="simple")
+    results, seconds = timed_run("TextNormalizer simple tokens", lambda texts: [simple.tokens(text) for text in texts],
+                                 texts, words)
+    print(f"{'':28s} {baseline_seconds / seconds:.1f}x (splits contractions differently)")
+
+if __name__ == "__main__":
+    main()
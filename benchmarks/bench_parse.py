@@ -0,0 +1,65 @@
+import os
+import sys
+import glob
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libgenbot.page_parser import PARSERS, parse_books_page, parse_pages
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Function to load the saved search pages
+def load_fixtures():
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "search_page_*.html"))):
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+    return pages
+
+# Function to time repeated parses of the fixture pages and return rows/sec
+def rows_per_second(parse, pages, repeat):
+    start_time = time.perf_counter()
+    rows = 0
+    for _ in range(repeat):
+        for content in pages:
+            rows += len(parse(content))
+    return rows / (time.perf_counter() - start_time)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare rows/sec of the search page parser backends.")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    pages = load_fixtures()
+    expected = [parse_books_page(content, "html.parser") for content in pages]
+
+    baseline = None
+    for backend, parse in PARSERS.items():
+        try:
+            if [parse(content) for content in pages] != expected:
+                print(f"{backend}: output differs from html.parser, skipping")
+                continue
+            rate = rows_per_second(parse, pages, args.repeat)
+        except ImportError as e:
+            print(f"{backend}: {e}")
+            continue
+        baseline = baseline or rate
+        print(f"{backend:12s} {rate:10.0f} rows/sec  ({rate / baseline:.1f}x)")
+
+    # Process pool over many copies of the fixtures
+    workload = pages * args.repeat
+    rows = sum(len(books) for books in expected) * args.repeat
+    for backend in PARSERS:
+        try:
+            start_time = time.perf_counter()
+            parse_pages(workload, backend, processes=args.processes)
+            rate = rows / (time.perf_counter() - start_time)
+        except ImportError:
+            continue
+        print(f"{backend + ' pool':12s} {rate:10.0f} rows/sec  ({rate / baseline:.1f}x, {args.processes} processes)")
+
+if __name__ == "__main__":
+    main()
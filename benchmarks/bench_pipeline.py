@@ -0,0 +1,60 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libgenbot.resumable_download import fetch_book
+from libgenbot.pdf_converter import convert_to_pdf
+from libgenbot.download_pipeline import DownloadPipeline
+from libgen_stub import start_stub_server, mirror_link
+
+STUB_CONVERTER = f"{sys.executable} {os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stub_ebook_convert.py')}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare convert-in-download-thread with the two-stage pipeline.")
+    parser.add_argument("--books", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds of server latency per request")
+    parser.add_argument("--convert-seconds", type=float, default=0.5, help="CPU seconds per stub conversion")
+    args = parser.parse_args()
+
+    files = {}
+    for index in range(args.books):
+        data = os.urandom(256 * 1024)
+        files[hashlib.md5(data).hexdigest().upper()] = data
+    server = start_stub_server(latency=args.latency, files=files)
+    books = [{"name": f"book-{index}", "format": "epub", "link": mirror_link(server, md5)}
+             for index, md5 in enumerate(files)]
+    os.environ["STUB_CONVERT_SECONDS"] = str(args.convert_seconds)
+
+    with tempfile.TemporaryDirectory() as directory:
+        def download(book, subdir):
+            path = os.path.join(directory, subdir, f"{book['name']}.epub")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fetch_book(book['link'], path)
+            return path
+
+        def convert(book, path):
+            convert_to_pdf(path, path[:-len("epub")] + "pdf", converter=STUB_CONVERTER)
+
+        # Old behaviour: each of the 4 download threads also runs the conversion
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda book: convert(book, download(book, "inline")), books))
+        inline_seconds = time.perf_counter() - start_time
+
+        pipeline = DownloadPipeline(lambda book: download(book, "pipeline"), convert, download_workers=4)
+        pipeline.run(books)
+
+    print(f"Convert inside download threads: {inline_seconds:.2f}s")
+    print(f"Two-stage pipeline:              {pipeline.elapsed_seconds:.2f}s")
+    print(json.dumps(pipeline.report(), indent=2))
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
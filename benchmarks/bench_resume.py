@@ -0,0 +1,43 @@
+import os
+import sys
+import hashlib
+import argparse
+import tempfile
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libgenbot.resumable_download import fetch_book
+from libgen_stub import start_stub_server, mirror_link
+
+def main():
+    parser = argparse.ArgumentParser(description="Show that resumed downloads only transfer the missing bytes.")
+    parser.add_argument("--size-mb", type=int, default=8)
+    parser.add_argument("--drops", type=int, default=3, help="How many responses the server cuts short")
+    args = parser.parse_args()
+
+    data = os.urandom(args.size_mb * 1024 * 1024)
+    md5 = hashlib.md5(data).hexdigest().upper()
+    drop_after = len(data) // (args.drops + 1)
+    server = start_stub_server(latency=0, files={md5: data}, drop_after=drop_after, drops=args.drops)
+
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, "book.pdf")
+        attempts = 0
+        while not os.path.exists(output_file):
+            attempts += 1
+            try:
+                fetch_book(mirror_link(server, md5), output_file)
+            except requests.exceptions.RequestException as e:
+                print(f"Attempt {attempts} dropped: {type(e).__name__}")
+
+        with open(output_file, 'rb') as f:
+            assert f.read() == data
+
+    print(f"File size:       {len(data)} bytes")
+    print(f"Bytes sent:      {server.bytes_sent} bytes over {attempts} attempts")
+    print(f"Without resume:  {drop_after * args.drops + len(data)} bytes")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
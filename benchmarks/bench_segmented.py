@@ -0,0 +1,80 @@
+import io
+import os
+import sys
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libgenbot.core import download_book, download_books_concurrently
+from libgenbot.download_pipeline import DownloadPipeline
+from libgenbot.library_manifest import LibraryManifest
+from libgenbot.mirror_scheduler import MirrorScheduler
+from libgenbot.segmented_download import order_by_size
+from libgenbot import http_session
+from libgen_stub import start_stub_server, mirror_link
+
+# Function to download the books in the given order, one connection per book (the old behaviour)
+def one_connection_each(books, directory, workers):
+    manifest = LibraryManifest(os.path.join(directory, "manifest.sqlite3"))
+    scheduler = MirrorScheduler(rate=100, burst=workers, max_concurrency=workers, mirrors=[])
+    http_session.configure(pool_size=workers)
+    pipeline = DownloadPipeline(lambda book: download_book(book, directory, manifest, scheduler),
+                                lambda book, path: None, download_workers=workers)
+    pipeline.run(books)
+    return pipeline.report()
+
+# Function to download through download_books_concurrently: largest first, large books in segments
+def segmented(books, directory, workers):
+    manifest = LibraryManifest(os.path.join(directory, "manifest.sqlite3"))
+    scheduler = MirrorScheduler(rate=100, burst=workers, max_concurrency=workers, mirrors=[])
+    return download_books_concurrently(books, directory, manifest, scheduler, download_workers=workers)
+
+def main():
+    parser = argparse.ArgumentParser(description="Selection order vs largest-first vs segmented downloads on a bandwidth-capped stub.")
+    parser.add_argument("--large", type=int, default=1, help="Number of large books")
+    parser.add_argument("--large-mb", type=int, default=64)
+    parser.add_argument("--small", type=int, default=24, help="Number of small books (1-4 MB)")
+    parser.add_argument("--bandwidth", type=float, default=4, help="MB/sec per connection")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sizes = [args.large_mb] * args.large + [rng.randint(1, 4) for _ in range(args.small)]
+    files, books = {}, []
+    for number, megabytes in enumerate(sizes):
+        data = rng.randbytes(megabytes * 1024 * 1024)
+        md5 = hashlib.md5(data).hexdigest().upper()
+        files[md5] = data
+        books.append({"id": str(number), "name": f"book-{number}", "format": "pdf", "size": f"{megabytes} Mb", "md5": md5})
+    rng.shuffle(books)  # The order a user happened to select them in
+
+    server = start_stub_server(latency=0.02, files=files, bandwidth=args.bandwidth * 1024 * 1024)
+    for book in books:
+        book["link"] = mirror_link(server, book.pop("md5"))
+    total_mb = sum(sizes)
+    print(f"{len(books)} books, {total_mb} MB, {args.workers} workers at {args.bandwidth} MB/s each "
+          f"(lower bound {total_mb / args.bandwidth / args.workers:.1f}s)")
+
+    runs = [("selection order, 1 connection each", lambda directory: one_connection_each(books, directory, args.workers)),
+            ("largest first, 1 connection each", lambda directory: one_connection_each(order_by_size(books), directory, args.workers)),
+            ("largest first + Range segments", lambda directory: segmented(books, directory, args.workers))]
+    for label, run in runs:
+        with tempfile.TemporaryDirectory() as directory:
+            start_time = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                report = run(directory)
+            seconds = time.perf_counter() - start_time
+            complete = sum(os.path.getsize(os.path.join(directory, f"{book['name']}.pdf")) == int(book['size'].split()[0]) * 1024 * 1024
+                           for book in books if os.path.exists(os.path.join(directory, f"{book['name']}.pdf")))
+        print(f"{label:36s} {seconds:6.1f}s  {total_mb / seconds:5.1f} MB/s  {complete}/{len(books)} books, "
+              f"download p95 {report['download']['p95_seconds']:.1f}s")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
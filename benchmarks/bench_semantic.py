@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from libgenbot.semantic_index import VectorIndex, normalize
+
+# Function to fake chunk embeddings: points scattered around topic centres, like chunks of books
+# on a limited set of subjects, plus queries drawn the same way
+def synthetic_corpus(rows, dimension, topics=2000, noise=0.8, queries=200, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = normalize(rng.standard_normal((topics, dimension)))
+
+    def sample(count):
+        # Noise vectors of length about `noise`, so neighbouring topics overlap
+        points = centres[rng.integers(0, topics, count)] + noise * rng.standard_normal((count, dimension)) / np.sqrt(dimension)
+        return normalize(points).astype(np.float32)
+
+    return sample(rows), sample(queries)
+
+def measure(search, queries, k):
+    latencies = []
+    ids = []
+    for query in queries:
+        start_time = time.perf_counter()
+        ids.append(search(query[None, :], k)[1][0])
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return np.array(ids), np.array(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall versus latency of the exact and IVF semantic index modes.")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.8, help="Spread of chunks around their topic; higher is harder")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--nprobe", default="1,2,4,8,16,32")
+    args = parser.parse_args()
+
+    vectors, queries = synthetic_corpus(args.rows, args.dimension, noise=args.noise, queries=args.queries)
+    with tempfile.TemporaryDirectory() as directory:
+        index = VectorIndex(directory, args.dimension)
+        start_time = time.perf_counter()
+        for start in range(0, len(vectors), 50000):  # Books land a batch at a time
+            index.add(vectors[start:start + 50000])
+        print(f"{args.rows} x {args.dimension} vectors, {os.path.getsize(index.vectors_path) / 2 ** 20:.1f} MB as float16 "
+              f"(float32 would be {vectors.nbytes / 2 ** 20:.1f} MB), added in {time.perf_counter() - start_time:.2f}s")
+
+        # Ground truth from float32 brute force
+        truth = np.argsort(-(queries @ vectors.T), axis=1)[:, :args.k]
+
+        exact_ids, latencies = measure(index.search_exact, queries, args.k)
+        recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(exact_ids, truth)])
+        print(f"{'exact (float16)':18s} recall@{args.k} {recall:.3f}  mean {latencies.mean():7.2f} ms  p95 {np.percentile(latencies, 95):7.2f} ms")
+
+        start_time = time.perf_counter()
+        index.train()
+        index.build_lists()
+        print(f"IVF: {len(index.centroids)} clusters trained and listed in {time.perf_counter() - start_time:.2f}s")
+        for nprobe in (int(value) for value in args.nprobe.split(",")):
+            ids, latencies = measure(lambda query, k: index.search_ivf(query, k, nprobe), queries, args.k)
+            recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(ids, truth)])
+            print(f"{f'ivf nprobe={nprobe}':18s} recall@{args.k} {recall:.3f}  mean {latencies.mean():7.2f} ms  "
+                  f"p95 {np.percentile(latencies, 95):7.2f} ms")
+        del index
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Start-up cost over a bare interpreter, in ms, that each entry point may not exceed
+BUDGETS_MS = {
+    "libgenbot --help": 40,
+    "import libgenbot.core": 200,
+    "import libgenbot.batch_runner": 220,
+    "import libgenbot.job_executor": 200,
+    "import libgenbot.book_collection": 300,
+}
+# Modules that must only load when a command actually needs them
+LAZY_MODULES = ["streamlit", "gradio", "libgen", "bs4", "pyarrow", "numpy", "aiohttp"]
+# Lazy modules an entry point may load at start because its job needs them (the crawler parses pages)
+LOADED_AT_START = {"import libgenbot.book_collection": ["bs4"]}
+
+CODE = {
+    "python": "pass",
+    "libgenbot --help": "import sys, contextlib, io; sys.argv = ['libgenbot', '--help']\n"
+                        "import libgenbot.cli\n"
+                        "with contextlib.redirect_stdout(io.StringIO()):\n"
+                        "    try: libgenbot.cli.main()\n"
+                        "    except SystemExit: pass",
+    "import libgenbot.core": "import libgenbot.core",
+    "import libgenbot.batch_runner": "import libgenbot.batch_runner",
+    "import libgenbot.job_executor": "import libgenbot.job_executor",
+    "import libgenbot.book_collection": "import libgenbot.book_collection",
+    # What the front ends imported at start before the lazy imports (without streamlit, gradio
+    # and libgen, which are not needed to measure the engine)
+    "eager imports (before)": "import bs4, numpy, pyarrow.parquet, requests, libgenbot.core",
+}
+
+# Function to time a snippet in fresh interpreters; returns the median wall time in ms
+def measure(code, repeat):
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True)
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(timings)
+
+# Function to list the lazy modules a snippet leaves imported
+def loaded_modules(code):
+    probe = f"{code}\nimport sys, json\nprint(json.dumps([name for name in {LAZY_MODULES!r} if name in sys.modules]))"
+    output = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Start-up time of the CLI and engine against a budget; exits 1 when over.")
+    parser.add_argument("--repeat", type=int, default=9, help="Fresh interpreters per entry point (the median counts)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply the budgets, e.g. 2 on a slow machine")
+    args = parser.parse_args()
+
+    baseline = measure(CODE["python"], args.repeat)
+    print(f"bare interpreter: {baseline:.0f} ms; times below are on top of it")
+    failures = []
+    for name, code in CODE.items():
+        if name == "python":
+            continue
+        overhead = measure(code, args.repeat) - baseline
+        budget = BUDGETS_MS.get(name)
+        line = f"  {name:34s} {overhead:6.0f} ms"
+        if budget is not None:
+            budget *= args.scale
+            line += f"  (budget {budget:.0f} ms)"
+            if overhead > budget:
+                failures.append(f"{name} took {overhead:.0f} ms, budget {budget:.0f} ms")
+            loaded = [module for module in loaded_modules(code) if module not in LOADED_AT_START.get(name, [])]
+            if loaded:
+                failures.append(f"{name} imported {', '.join(loaded)} at start")
+        print(line)
+
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
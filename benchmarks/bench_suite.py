@@ -0,0 +1,216 @@
+import io
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import platform
+import tempfile
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from libgenbot.book_collection import iter_book_pages
+from libgenbot.page_parser import parse_books_page, DEFAULT_BACKEND
+from libgenbot.core import filter_books, download_books_concurrently
+from libgenbot.pdf_converter import convert_to_pdf
+from libgenbot.library_manifest import LibraryManifest
+from libgenbot.mirror_scheduler import MirrorScheduler
+from libgen_stub import start_stub_server, search_url, mirror_link, render_search_page
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARKS, "baselines", "suite.json")
+STUB_CONVERTER = f"{sys.executable} {os.path.join(BENCHMARKS, 'stub_ebook_convert.py')}"
+SUITE_VERSION = 1
+
+# Function to summarize one scenario: throughput in `unit`, latency percentiles of single operations
+def result(unit, amount, seconds, latencies, errors=0, requests=None):
+    latencies = sorted(latencies)
+    pick = lambda fraction: round(latencies[min(int(len(latencies) * fraction), len(latencies) - 1)] * 1000, 2) if latencies else 0.0
+    return {
+        "unit": unit,
+        "throughput": round(amount / seconds, 2) if seconds else 0.0,
+        "seconds": round(seconds, 3),
+        "operations": len(latencies),
+        "p50_ms": pick(0.5),
+        "p95_ms": pick(0.95),
+        "errors": errors,
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+    }
+
+# get_books: walk the stub's search pages; one operation is one page fetched and parsed
+def bench_crawl(args):
+    server = start_stub_server(total_results=args.crawl_books, latency=args.latency, jitter=args.jitter,
+                               bandwidth=args.bandwidth, fail_rate=args.error_rate, seed=args.seed)
+    latencies, rows = [], 0
+    start_time = time.perf_counter()
+    page_start = start_time
+    for books in iter_book_pages("benchmark", args.crawl_books, base_url=search_url(server)):
+        now = time.perf_counter()
+        latencies.append(now - page_start)
+        page_start = now
+        rows += len(books)
+    seconds = time.perf_counter() - start_time
+    server.shutdown()
+    return result("books/s", rows, seconds, latencies, server.rejected, server.request_count)
+
+# The HTML parse on its own, over rendered search pages; one operation is one page
+def bench_parse(args):
+    pages = [render_search_page(page, args.parse_pages * 100) for page in range(1, args.parse_pages + 1)]
+    latencies, rows = [], 0
+    for content in pages:
+        start_time = time.perf_counter()
+        rows += len(parse_books_page(content, DEFAULT_BACKEND))
+        latencies.append(time.perf_counter() - start_time)
+    return result("rows/s", rows, sum(latencies), latencies)
+
+# filter_books over a large result set; one operation is one call
+def bench_filter(args):
+    rng = random.Random(args.seed)
+    books = [book for page in range(1, args.filter_rows // 100 + 1)
+             for book in parse_books_page(render_search_page(page, args.filter_rows), DEFAULT_BACKEND)]
+    rng.shuffle(books)
+    latencies = []
+    for _ in range(args.repeat):
+        start_time = time.perf_counter()
+        filter_books(books)
+        latencies.append(time.perf_counter() - start_time)
+    return result("rows/s", len(books) * args.repeat, sum(latencies), latencies)
+
+# download_books_concurrently against a throttled, flaky stub mirror, conversions through the stub
+# converter; one operation is one book downloaded (retries included)
+def bench_download(args, directory):
+    files = {}
+    rng = random.Random(args.seed)
+    for _ in range(args.download_books):
+        data = rng.randbytes(args.file_kb * 1024)
+        files[hashlib.md5(data).hexdigest().upper()] = data
+    server = start_stub_server(latency=args.latency, jitter=args.jitter, bandwidth=args.bandwidth, files=files,
+                               fail_rate=args.error_rate, seed=args.seed)
+    books = [{"id": str(number), "name": f"book-{number}", "format": ("pdf", "epub")[number % 2],
+              "link": mirror_link(server, md5)} for number, md5 in enumerate(files)]
+
+    manifest = LibraryManifest(os.path.join(directory, "manifest.sqlite3"))
+    scheduler = MirrorScheduler(rate=100, burst=args.workers, max_concurrency=args.workers, backoff_base=0.05, mirrors=[])
+    start_time = time.perf_counter()
+    report = download_books_concurrently(books, os.path.join(directory, "downloads"), manifest, scheduler,
+                                         download_workers=args.workers)
+    seconds = time.perf_counter() - start_time
+    server.shutdown()
+
+    stage = report["download"]
+    downloaded = stage["items"] - stage["failed"] - stage["skipped"]
+    summary = result("books/s", downloaded, seconds, [], server.rejected, server.request_count)
+    summary.update(operations=stage["items"], p50_ms=stage["p50_seconds"] * 1000, p95_ms=stage["p95_seconds"] * 1000,
+                   megabytes_per_second=round(server.bytes_sent / seconds / 1024 / 1024, 2),
+                   failed_books=stage["failed"])
+    return summary
+
+# convert_to_pdf with the stub converter: the process start and copy, without Calibre's own cost
+def bench_convert(args, directory):
+    source = os.path.join(directory, "book.epub")
+    with open(source, 'wb') as f:
+        f.write(os.urandom(args.file_kb * 1024))
+    latencies = []
+    for number in range(args.conversions):
+        start_time = time.perf_counter()
+        convert_to_pdf(source, os.path.join(directory, f"book-{number}.pdf"), converter=STUB_CONVERTER)
+        latencies.append(time.perf_counter() - start_time)
+    return result("conversions/s", len(latencies), sum(latencies), latencies)
+
+# Function to compare results with a baseline: throughput may drop and p95 may rise by `tolerance`
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, current in results.items():
+        previous = baseline["results"].get(name)
+        if not previous:
+            continue
+        checks = [("throughput", previous["throughput"] * (1 - tolerance), current["throughput"] < previous["throughput"] * (1 - tolerance)),
+                  ("p95_ms", previous["p95_ms"] * (1 + tolerance), current["p95_ms"] > previous["p95_ms"] * (1 + tolerance))]
+        for metric, limit, failed in checks:
+            change = current[metric] / previous[metric] - 1 if previous[metric] else 0.0
+            print(f"  {name:9s} {metric:10s} {previous[metric]:10.2f} -> {current[metric]:10.2f} ({change:+.0%})"
+                  f"{'  REGRESSION' if failed else ''}")
+            if failed:
+                regressions.append(f"{name} {metric}")
+    return regressions
+
+SCENARIOS = ["crawl", "parse", "filter", "download", "convert"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark suite against the local libgen stand-in.")
+    parser.add_argument("--only", nargs="+", choices=SCENARIOS, help="Run only these scenarios")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds the stub waits before every response")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Mean of the stub's random extra delay")
+    parser.add_argument("--bandwidth", type=float, default=4 * 1024 * 1024, help="Bytes/sec per stub response")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Share of stub requests answered with 500")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--crawl-books", type=int, default=3000)
+    parser.add_argument("--parse-pages", type=int, default=30)
+    parser.add_argument("--filter-rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--download-books", type=int, default=24)
+    parser.add_argument("--file-kb", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--conversions", type=int, default=10)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative change before a regression")
+    args = parser.parse_args()
+
+    os.environ["EBOOK_CONVERT"] = STUB_CONVERTER  # The download scenario converts through core.convert_book
+    os.environ.setdefault("STUB_CONVERT_SECONDS", "0.05")
+    config = {name: value for name, value in vars(args).items()
+              if name not in ("only", "output", "baseline", "save_baseline", "tolerance")}
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.only or SCENARIOS:
+            # The code under test prints progress for every page and book
+            with redirect_stdout(io.StringIO()):
+                if name in ("download", "convert"):
+                    scenario_directory = os.path.join(directory, name)
+                    os.makedirs(scenario_directory)
+                    results[name] = globals()[f"bench_{name}"](args, scenario_directory)
+                else:
+                    results[name] = globals()[f"bench_{name}"](args)
+            stats = results[name]
+            print(f"{name:9s} {stats['throughput']:10.2f} {stats['unit']:14s} p50 {stats['p50_ms']:8.2f} ms  "
+                  f"p95 {stats['p95_ms']:8.2f} ms  errors {stats['errors']} ({stats['error_rate']:.1%})")
+
+    report = {
+        "suite_version": SUITE_VERSION,
+        "time": round(time.time(), 3),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": config,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    regressions = []
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("suite_version") != SUITE_VERSION or baseline.get("config") != config:
+            print(f"Baseline {args.baseline} was recorded with different settings; not comparing")
+        else:
+            print(f"Compared with {args.baseline} ({baseline['platform']}, {baseline['cpus']} CPUs):")
+            regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from libgenbot.token_matrix import save_token_matrix, load_token_matrix, decode, calculate_storage
+
+# The notebook's functions, unchanged, as the baseline
+def map_words_to_numbers(tokens):
+    word_to_number = {word: idx for idx, word in enumerate(set(tokens), start=1)}
+    numbers = [word_to_number[word] for word in tokens]
+    return numbers, word_to_number
+
+def store_in_dynamic_matrix(numbers):
+    num_elements = len(numbers)
+    matrix_size = (num_elements // 512 + 1, 512) if num_elements > 512 else (1, num_elements)
+    matrix = np.zeros(matrix_size, dtype=np.uint32)
+
+    idx = 0
+    for number in numbers:
+        row = idx // matrix_size[1]
+        col = idx % matrix_size[1]
+
+        if row < matrix_size[0]:
+            matrix[row, col] = number
+        idx += 1
+
+    return matrix
+
+def retrieve_text_from_matrix(matrix, word_to_number):
+    number_to_word = {value: key for key, value in word_to_number.items()}
+
+    retrieved_tokens = []
+
+    for row in matrix:
+        for number in row:
+            if number in number_to_word:
+                retrieved_tokens.append(number_to_word[number])
+
+    return ' '.join(retrieved_tokens)
+
+# Function to fake a normalized token stream with Zipfian word frequencies
+def zipfian_tokens(count, vocabulary_size, seed=1):
+    rng = random.Random(seed)
+    vocabulary = [f"word{index}" for index in range(vocabulary_size)]
+    weights = [1 / rank for rank in range(1, vocabulary_size + 1)]
+    return rng.choices(vocabulary, weights, k=count)
+
+def timed(function):
+    start_time = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start_time
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the notebook's token matrix with token_matrix.py.")
+    parser.add_argument("--tokens", type=int, default=2000000)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    args = parser.parse_args()
+
+    tokens = zipfian_tokens(args.tokens, args.vocabulary)
+    text = ' '.join(tokens)
+    print(f"{len(tokens)} tokens, {len(set(tokens))} distinct")
+
+    (numbers, word_to_number), map_seconds = timed(lambda: map_words_to_numbers(tokens))
+    baseline, store_seconds = timed(lambda: store_in_dynamic_matrix(numbers))
+    retrieved, decode_seconds = timed(lambda: retrieve_text_from_matrix(baseline, word_to_number))
+    print(f"notebook:     encode {map_seconds + store_seconds:7.3f}s  decode {decode_seconds:7.3f}s  "
+          f"{calculate_storage(baseline)[2]:7.2f} MB ({baseline.dtype})  round trip ok: {retrieved == text}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tokens.npy")
+        (matrix, vocabulary), encode_seconds = timed(lambda: save_token_matrix(tokens, path))
+        del matrix
+        (matrix, vocabulary), load_seconds = timed(lambda: load_token_matrix(path))
+        retrieved, decode_seconds = timed(lambda: decode(matrix, vocabulary))
+        print(f"token_matrix: encode {encode_seconds:7.3f}s  decode {decode_seconds:7.3f}s  "
+              f"{calculate_storage(matrix)[2]:7.2f} MB ({matrix.dtype})  round trip ok: {retrieved == text}  "
+              f"(includes writing .npy; memmap open {load_seconds * 1000:.1f}ms)")
+        del matrix
+
+if __name__ == "__main__":
+    main()
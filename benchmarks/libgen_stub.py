@@ -0,0 +1,222 @@
+import random
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+FORMATS = ['pdf', 'epub', 'djvu', 'mobi']
+LANGUAGES = ['English', 'English', 'English', 'German', 'Russian']
+
+# Function to build the md5 used for a fake book id
+def fake_md5(book_id):
+    return hashlib.md5(f"book-{book_id}".encode()).hexdigest().upper()
+
+# Function to render one result row the way libgen's simple view does
+def render_row(book_id):
+    md5 = fake_md5(book_id)
+    book_format = FORMATS[book_id % len(FORMATS)]
+    return (
+        "<tr valign=top bgcolor=''>"
+        f"<td>{book_id}</td>"
+        f"<td><a href='search.php?req=Author+{book_id % 97}&column=author'>Author {book_id % 97}</a></td>"
+        f"<td width=500><a href='book/index.php?md5={md5}' title='' id={book_id}>"
+        f"Hands-On Machine Learning Volume {book_id % 50}"
+        f" <font face=Times color=green><i>978{book_id:010d}</i></font></a></td>"
+        f"<td>Publisher {book_id % 13}</td>"
+        f"<td nowrap>{1995 + book_id % 30}</td>"
+        f"<td>{100 + book_id % 700}</td>"
+        f"<td>{LANGUAGES[book_id % len(LANGUAGES)]}</td>"
+        f"<td nowrap>{1 + book_id % 40} Mb</td>"
+        f"<td nowrap>{book_format}</td>"
+        f"<td><a href='http://library.lol/main/{md5}' title='this mirror'>[1]</a></td>"
+        f"<td><a href='http://libgen.li/ads.php?md5={md5}' title='Libgen.li'>[2]</a></td>"
+        f"<td><a href='https://library.bz/main/edit/{md5}' title='Libgen Librarian'>[edit]</a></td>"
+        "</tr>"
+    )
+
+# Function to render a full search page with the results in the third table
+def render_search_page(page, total_results, per_page=100, newest_first=False):
+    first = (page - 1) * per_page
+    ids = range(first + 1, min(first + per_page, total_results) + 1)
+    if newest_first:
+        ids = [total_results + 1 - book_id for book_id in ids]  # sort=id&sortmode=DESC
+    rows = "".join(render_row(book_id) for book_id in ids)
+    return (
+        "<html><head><title>Library Genesis</title></head><body>"
+        "<table width=100%><tr><td><a href='/'>Library Genesis</a></td>"
+        "<td><form name='libgen' action='search.php'><input name='req'></form></td></tr></table>"
+        f"<table width=100%><tr><td><font color=grey size=1>{total_results} files found</font></td></tr></table>"
+        "<table width=100% cellspacing=1 cellpadding=1 rules=rows class=c align=center>"
+        "<tr valign=top bgcolor=#C0C0C0><td><b>ID</b></td><td><b>Author(s)</b></td><td><b>Title</b></td>"
+        "<td><b>Publisher</b></td><td><b>Year</b></td><td><b>Pages</b></td><td><b>Language</b></td>"
+        "<td><b>Size</b></td><td><b>Extension</b></td><td colspan=3><b>Mirrors</b></td></tr>"
+        f"{rows}</table>"
+        "<table width=100%><tr><td>&nbsp;</td></tr></table>"
+        "</body></html>"
+    ).encode('utf-8')
+
+# Function to render the library.lol style mirror page with its GET link
+def render_mirror_page(md5):
+    return (
+        "<html><body><table><tr><td>"
+        f"<div id='download'><h2><a href='/get/{md5}'>GET</a></h2></div>"
+        "</td></tr></table></body></html>"
+    ).encode('utf-8')
+
+# Request handler for search.php pages, mirror pages and Range-capable file bodies
+class LibgenStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        with server.lock:
+            server.request_count += 1
+            server.in_flight += 1
+            overloaded = server.capacity is not None and server.in_flight > server.capacity
+        try:
+            # A fixed delay plus an exponential tail, like a real mirror's response times
+            time.sleep(server.latency + (server.rng.expovariate(1 / server.jitter) if server.jitter else 0))
+            if overloaded or server.rng.random() < server.fail_rate:
+                with server.lock:
+                    server.rejected += 1
+                # Over capacity looks like a throttling mirror, random failures like a flaky one
+                self.send_response(503 if overloaded else 500)
+                if overloaded:
+                    self.send_header("Retry-After", "1")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.route(url)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    # HEAD answers like GET without the body, so preflight probes see the same statuses
+    def do_HEAD(self):
+        self.do_GET()
+
+    def route(self, url):
+        server = self.server
+        if url.path.endswith('search.php'):
+            params = parse_qs(url.query)
+            page = int(params.get('page', ['1'])[0])
+            per_page = int(params.get('res', ['100'])[0])
+            newest_first = params.get('sortmode', [''])[0].upper() == 'DESC'
+            self.send_body(render_search_page(page, server.total_results, per_page, newest_first),
+                           "text/html; charset=utf-8")
+        elif url.path.startswith('/main/') and server.gone_pages and url.path.rsplit('/', 1)[-1] not in server.files:
+            self.send_error(404)
+        elif url.path.startswith('/main/'):
+            self.send_body(render_mirror_page(url.path.rsplit('/', 1)[-1]), "text/html; charset=utf-8")
+        elif url.path.startswith('/get/') and url.path.rsplit('/', 1)[-1] in server.files:
+            self.send_file(server.files[url.path.rsplit('/', 1)[-1]])
+        else:
+            self.send_error(404)
+
+    def send_body(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.write_body(body)
+
+    # Write a body no faster than the server's bandwidth cap (bytes/sec per response)
+    def write_body(self, body):
+        if self.command == "HEAD":
+            return
+        bandwidth = self.server.bandwidth
+        if not bandwidth:
+            self.wfile.write(body)
+            return
+        chunk_size = max(1024, int(bandwidth / 20))  # About 50ms worth of data per write
+        start_time = time.monotonic()
+        for offset in range(0, len(body), chunk_size):
+            self.wfile.write(body[offset:offset + chunk_size])
+            delay = start_time + (offset + chunk_size) / bandwidth - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+    # Serve a file honouring "Range: bytes=N-" and "bytes=N-M", optionally dropping the connection part way through
+    def send_file(self, data):
+        server = self.server
+        start, end = 0, len(data) - 1
+        range_header = self.headers.get("Range")
+        if range_header and range_header.startswith("bytes="):
+            first, last = range_header[len("bytes="):].split("-")[:2]
+            start = int(first or 0)
+            end = min(int(last), end) if last else end
+
+        if start >= len(data):
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{len(data)}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if range_header:
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end + 1 - start))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        if self.command == "HEAD":
+            return
+
+        body = data[start:end + 1]
+        with server.lock:
+            drop = server.drops_remaining > 0
+            if drop:
+                server.drops_remaining -= 1
+        if drop:
+            body = body[:server.drop_after]  # Send part of the body, then hang up
+
+        self.write_body(body)
+        with server.lock:
+            server.bytes_sent += len(body)
+        if drop:
+            self.close_connection = True
+            self.connection.shutdown(2)
+
+    def log_message(self, format, *args):
+        pass
+
+# Function to start a stub server on a background thread
+def start_stub_server(total_results=2000, latency=0.2, host="127.0.0.1", port=0,
+                      files=None, drop_after=0, drops=0, fail_rate=0.0, capacity=None, jitter=0.0,
+                      bandwidth=None, seed=None, gone_pages=False):
+    server = ThreadingHTTPServer((host, port), LibgenStubHandler)
+    server.daemon_threads = True
+    server.total_results = total_results
+    server.latency = latency
+    server.jitter = jitter            # Mean of the random extra delay added to the latency
+    server.bandwidth = bandwidth      # Bytes/sec cap per response, None for unthrottled
+    server.rng = random.Random(seed)  # Seeded, so a benchmark sees the same failures every run
+    server.files = files or {}        # md5 -> file body served under /get/<md5>
+    server.drop_after = drop_after    # Bytes sent before a dropped connection
+    server.drops_remaining = drops    # How many file responses get cut short
+    server.fail_rate = fail_rate      # Share of requests answered with 500
+    server.capacity = capacity        # Concurrent requests served before answering 503 + Retry-After
+    server.gone_pages = gone_pages    # Answer 404 for mirror pages of files not in `files`, not only for the file
+    server.request_count = 0
+    server.in_flight = 0
+    server.rejected = 0
+    server.bytes_sent = 0
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+# Function to get the search URL of a running stub server
+def search_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/search.php"
+
+# Function to get the library.lol style mirror link of a file served by the stub
+def mirror_link(server, md5):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/main/{md5}"
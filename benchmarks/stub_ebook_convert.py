@@ -0,0 +1,18 @@
+import os
+import sys
+import time
+import shutil
+
+# Stand-in for Calibre's ebook-convert: burns CPU for a while, then copies input to output.
+# Use with EBOOK_CONVERT="python3 benchmarks/stub_ebook_convert.py"; STUB_CONVERT_SECONDS sets the cost.
+def main():
+    input_file, output_pdf = sys.argv[1], sys.argv[2]
+    seconds = float(os.environ.get("STUB_CONVERT_SECONDS", "0.5"))
+
+    deadline = time.process_time() + seconds
+    while time.process_time() < deadline:
+        pass
+    shutil.copyfile(input_file, output_pdf)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# Search Library Genesis, download books concurrently and convert them to PDF. The package
+# imports nothing itself; the command line (libgenbot.cli) loads each module when a command needs it.
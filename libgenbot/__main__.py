@@ -0,0 +1,5 @@
+import sys
+from libgenbot.cli import main
+
+# "python -m libgenbot", the same as the libgenbot command
+sys.exit(main())
@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from libgenbot.search_cache import get_scraper
+from libgenbot.library_manifest import LibraryManifest, book_key
+from libgenbot.mirror_scheduler import MirrorScheduler
+from libgenbot.link_health import get_link_health
+from libgenbot.download_pipeline import DownloadPipeline, SKIPPED
+from libgenbot.core import filter_books, download_book, convert_book, print_report
+from libgenbot.segmented_download import SegmentPool, order_by_size
+from libgenbot import http_session
+from libgenbot import metrics
+
+# Statuses that mean a book needs no more work when a killed run is resumed; "failed",
+# "convert_failed", "dead_link" and "in_progress_elsewhere" (another worker held the book, and
+# may yet fail it) are retried
+FINISHED_STATUSES = ("downloaded", "converted", "skipped")
+
+# Function to read jobs from a JSONL file. One job per line, for example:
+#   {"query": "Hands-On ML", "formats": ["pdf", "epub"], "max_results": 5}
+#   {"id": "tfjs", "query": "TensorFlow.js", "select": [1, 3], "language": "English", "output_dir": "downloads/js"}
+# "select" is "all" (the default) or 1-based positions in the filtered list.
+def read_jobs(path):
+    jobs = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            job = json.loads(line)
+            # Jobs without an explicit id are identified by their content so resumes still match
+            job.setdefault('id', hashlib.sha1(json.dumps(job, sort_keys=True).encode()).hexdigest()[:12])
+            jobs.append(job)
+    return jobs
+
+# Function to apply a job's selection rules to its filtered search results
+def select_books(books, job):
+    if job.get('language'):
+        books = [book for book in books if book.get('language', '').lower() == job['language'].lower()]
+
+    formats = [book_format.lower() for book_format in job.get('formats', [])]
+    if formats:
+        books = [book for book in books if book['format'].lower() in formats]
+        books.sort(key=lambda book: formats.index(book['format'].lower()))  # Preferred formats first
+
+    select = job.get('select', 'all')
+    if select != 'all':
+        books = [books[index - 1] for index in select if 1 <= index <= len(books)]
+
+    if job.get('max_results'):
+        books = books[:job['max_results']]
+    return books
+
+# Function to load the (job, book) pairs an earlier run already finished from its results file
+def load_checkpoint(path):
+    finished = set()
+    if not os.path.exists(path):
+        return finished
+
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Half-written last line of a killed run
+            if result.get('status') in FINISHED_STATUSES:
+                finished.add((result['job'], result['key']))
+    return finished
+
+# Appends one JSON line per result; the results file doubles as the resume checkpoint
+class ResultWriter:
+    def __init__(self, path):
+        self.file = open(path, 'a', encoding='utf-8')
+        self.lock = threading.Lock()
+
+    def write(self, result):
+        result['time'] = round(time.time(), 3)
+        line = json.dumps(result, ensure_ascii=False)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+# Headless search -> filter_books -> download -> convert runner for many queries at once
+class BatchRunner:
+    def __init__(self, results_path, output_dir="downloads", download_workers=8, convert_workers=None,
+                 search_workers=4):
+        self.results_path = results_path
+        self.output_dir = output_dir
+        self.download_workers = download_workers
+        self.convert_workers = convert_workers
+        self.search_workers = search_workers
+        self.scraper = get_scraper()
+        self.manifest = LibraryManifest()
+        self.mirror_scheduler = MirrorScheduler(health=get_link_health())
+        self.segment_pool = SegmentPool()
+        self.results = None
+
+    def result(self, item, status, **fields):
+        book = item['book']
+        self.results.write({
+            "job": item['job']['id'],
+            "query": item['job']['query'],
+            "key": book_key(book),
+            "id": book.get('id'),
+            "name": book['name'],
+            "format": book['format'],
+            "status": status,
+            **fields
+        })
+
+    def search(self, job):
+        try:
+            return self.scraper.get_data(job['query'])
+        except Exception as e:
+            print(f"Search failed for {job['query']}: {e}")
+            self.results.write({"job": job['id'], "query": job['query'], "status": "search_failed", "error": str(e)})
+            return None
+
+    def download(self, item):
+        book = item['book']
+        record = self.manifest.find(book)
+        if record is not None:
+            # Downloaded by a run that was killed before the conversion: convert it now
+            converted = record['converted_path'] and os.path.exists(record['converted_path'])
+            if book['format'].lower() != "pdf" and not converted:
+                return record['path']
+            self.skipped(item, record)
+            return SKIPPED
+
+        output_file = download_book(book, item['output_dir'], self.manifest, self.mirror_scheduler,
+                                    segment_pool=self.segment_pool)
+        if output_file is SKIPPED:
+            # It landed on disk since the check above, or another live worker is still downloading it
+            record = self.manifest.find(book)
+            if record is not None:
+                self.skipped(item, record)
+            else:
+                self.result(item, "in_progress_elsewhere")
+        elif output_file is None:
+            self.result(item, "failed")
+        return output_file
+
+    # Function to record a book the manifest already has, with where it is stored (possibly in
+    # another job's output_dir)
+    def skipped(self, item, record):
+        fields = {"path": record['path']}
+        if record['converted_path'] and os.path.exists(record['converted_path']):
+            fields['pdf'] = record['converted_path']
+        self.result(item, "skipped", **fields)
+
+    def convert(self, item, output_file):
+        if item['book']['format'].lower() == "pdf":
+            self.result(item, "downloaded", path=output_file)
+            return
+        try:
+            convert_book(item['book'], output_file, item['output_dir'], self.manifest)
+        except Exception as e:
+            self.result(item, "convert_failed", path=output_file, error=str(e))
+            return
+        output_pdf = os.path.join(item['output_dir'], f"{item['book']['name']}.pdf")
+        self.result(item, "converted", path=output_file, pdf=output_pdf)
+
+    # Function to run every job, skipping books that an earlier run of the same results file finished
+    def run(self, jobs):
+        finished = load_checkpoint(self.results_path)
+        self.results = ResultWriter(self.results_path)
+        http_session.configure(pool_size=self.download_workers)
+
+        try:
+            # Search all queries concurrently (repeat queries come from the search cache)
+            with ThreadPoolExecutor(max_workers=self.search_workers) as executor:
+                searches = list(executor.map(self.search, jobs))
+
+            items = []
+            for job, books in zip(jobs, searches):
+                if books is None:
+                    continue
+                for book in select_books(filter_books(books), job):
+                    if (job['id'], book_key(book)) in finished:
+                        continue
+                    # "name" is read by the pipeline's error messages, "size" by the largest-first ordering
+                    items.append({"name": book['name'], "size": book.get('size'), "job": job, "book": book,
+                                  "output_dir": job.get('output_dir', self.output_dir)})
+
+            # Books whose mirrors all failed recently are reported instead of queued; they are not
+            # finished, so a later resume tries them again once their re-probe time has come
+            missing = [item for item in items if not self.manifest.has(item['book'])]
+            alive = set(self.mirror_scheduler.preflight([item['book']['link'] for item in missing],
+                                                        workers=self.download_workers))
+            dead = {id(item) for item in missing if item['book']['link'] not in alive}
+            for item in items:
+                if id(item) in dead:
+                    self.result(item, "dead_link")
+            items = [item for item in items if id(item) not in dead]
+
+            print(f"{len(items)} books to process from {len(jobs)} jobs ({len(finished)} already done, "
+                  f"{len(dead)} with only dead mirrors).")
+            pipeline = DownloadPipeline(self.download, self.convert, self.download_workers, self.convert_workers,
+                                        idle=self.segment_pool.help)
+            pipeline.run(order_by_size(items))
+            print_report(pipeline.report(), self.mirror_scheduler)
+            return pipeline.report()
+        finally:
+            self.results.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run search/download/convert jobs from a JSONL file without prompts.")
+    parser.add_argument("jobs", help="JSONL file with one job per line")
+    parser.add_argument("--results", help="JSONL file for per-book results; also the resume checkpoint "
+                                          "(default: <jobs>.results.jsonl)")
+    parser.add_argument("--output-dir", default="downloads")
+    parser.add_argument("--download-workers", type=int, default=8)
+    parser.add_argument("--convert-workers", type=int, default=None)
+    parser.add_argument("--search-workers", type=int, default=4)
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this port while running")
+    parser.add_argument("--metrics-snapshot", help="Write a JSON metrics snapshot to this file periodically and at exit")
+    args = parser.parse_args(argv)
+
+    if args.metrics_port:
+        metrics.start_metrics_server(args.metrics_port)
+    if args.metrics_snapshot:
+        metrics.start_snapshot_writer(args.metrics_snapshot)
+
+    results_path = args.results or os.path.splitext(args.jobs)[0] + ".results.jsonl"
+    runner = BatchRunner(results_path, args.output_dir, args.download_workers, args.convert_workers,
+                         args.search_workers)
+    try:
+        runner.run(read_jobs(args.jobs))
+    finally:
+        if args.metrics_snapshot:
+            metrics.write_snapshot(args.metrics_snapshot)
+        metrics.flush_logs()
+    print(f"Results written to {results_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+import requests
+import time
+import asyncio
+import itertools
+from libgenbot.page_parser import parse_books_page, DEFAULT_BACKEND
+from libgenbot.search_cache import SearchCache
+from libgenbot.book_export import CsvSink, open_sink
+from libgenbot.crawl_state import CrawlState
+from libgenbot.http_session import get_session, async_session, pool_stats
+from libgenbot.metrics import timed
+
+BASE_URL = "http://libgen.is/search.php"
+RESULTS_PER_PAGE = 100
+
+# Function to build the query parameters for one search page
+def build_params(query, page, newest_first=False):
+    params = {
+        "req": query,                   # The search query
+        "res": str(RESULTS_PER_PAGE),   # Limit to 100 results per page
+        "view": "simple",               # View in simple format (optional)
+        "page": page                    # Specify the page number
+    }
+    if newest_first:
+        # Newest uploads on the first pages, so new rows never push unseen ones past a checkpoint
+        params.update(sort="id", sortmode="DESC")
+    return params
+
+# Function to fetch and parse one search page
+def fetch_page(query, page, base_url=BASE_URL, parser=DEFAULT_BACKEND, newest_first=False):
+    print(f"Fetching page {page}...")
+    with timed("search"):
+        response = get_session().get(base_url, params=build_params(query, page, newest_first), timeout=10)  # Adding timeout for safety
+        response.raise_for_status()  # Check if the request was successful
+    return parse_books_page(response.content, parser)
+
+# Generator that handles pagination and yields each page's book metadata as soon as it is parsed
+def iter_book_pages(query, max_books=100, base_url=BASE_URL, parser=DEFAULT_BACKEND, cache=None):
+    collected = 0
+    page = 1
+
+    while collected < max_books:
+        try:
+            books = cache.get(query, page, RESULTS_PER_PAGE) if cache else None
+
+            if books is None:
+                books = fetch_page(query, page, base_url, parser)
+                if cache:
+                    cache.put(query, books, page, RESULTS_PER_PAGE)
+
+            if not books:
+                print(f"No more results on page {page}.")
+                break  # Stop if no more results are found
+
+            books = books[:max_books - collected]  # Stop once we have enough books
+            collected += len(books)
+            yield books
+            page += 1  # Move to the next page for the next batch of results
+        
+        except requests.exceptions.RequestException as e:
+            print(f"Request failed on page {page}: {e}. Skipping this page...")
+            page += 1  # Skip this page and continue to the next
+        
+        except IndexError:
+            print(f"Unexpected page structure encountered on page {page}. Skipping...")
+            page += 1  # Skip this page and continue to the next
+
+# Generator for checkpointed crawls that yields only rows the crawl state has not seen before.
+# Pages are requested newest first and every page, failure and row id is recorded in `state`:
+#   "resume" retries failed pages, then continues after the last page reached, up to max_books rows in total
+#   "retry"  fetches only the pages that failed before
+#   "delta"  starts from page 1 and stops at the first page holding rows an earlier crawl already has
+def crawl_book_pages(query, state, max_books=100, mode="resume", base_url=BASE_URL, parser=DEFAULT_BACKEND):
+    if mode == "delta":
+        pages = itertools.count(1)
+    else:
+        pages = state.failed_pages(query)
+        if mode == "resume" and not state.complete(query):
+            last_page = -(-max_books // RESULTS_PER_PAGE)  # Pages needed to reach max_books
+            pages += range(state.last_page(query) + 1, last_page + 1)
+
+    collected = 0
+    for page in pages:
+        if mode == "delta" and collected >= max_books:
+            break
+        try:
+            books = fetch_page(query, page, base_url, parser, newest_first=True)
+        except (requests.exceptions.RequestException, IndexError) as e:
+            print(f"Request failed on page {page}: {e}. Recording it for a retry...")
+            state.record_failure(query, page, str(e))
+            continue
+
+        if not books:
+            print(f"No more results on page {page}.")
+            state.record_page(query, page, [], advance=False)
+            if mode == "resume":
+                state.mark_complete(query)
+            if mode != "retry":
+                break
+            continue
+
+        fresh = state.record_page(query, page, books, advance=(mode != "delta"))
+        if fresh:
+            collected += len(fresh)
+            yield fresh
+        if mode == "delta" and len(fresh) < len(books):
+            print(f"Reached rows already collected on page {page}.")
+            break
+
+# Function to handle pagination and collect book metadata
+def get_books(query, max_books=100, base_url=BASE_URL, parser=DEFAULT_BACKEND, cache=None):
+    return [book for books in iter_book_pages(query, max_books, base_url, parser, cache) for book in books]
+
+# Function to import aiohttp for the async crawler on first use; it is only in the "crawl" extra,
+# and the sequential crawl and the CSV export must work without it
+def import_aiohttp():
+    try:
+        import aiohttp
+    except ImportError:
+        raise ImportError("The async crawler needs the aiohttp package installed.") from None
+    return aiohttp
+
+# Function to fetch one search page asynchronously; returns None for a skipped page
+async def fetch_page_async(session, query, page, base_url=BASE_URL, parser=DEFAULT_BACKEND, cache=None):
+    aiohttp = import_aiohttp()
+    books = cache.get(query, page, RESULTS_PER_PAGE) if cache else None
+    if books is not None:
+        return books
+
+    print(f"Fetching page {page}...")
+
+    try:
+        with timed("search"):
+            async with session.get(base_url, params=build_params(query, page)) as response:
+                response.raise_for_status()
+                content = await response.read()
+
+        # Parse off the event loop so other pages keep downloading meanwhile
+        loop = asyncio.get_running_loop()
+        books = await loop.run_in_executor(None, parse_books_page, content, parser)
+        if cache:
+            cache.put(query, books, page, RESULTS_PER_PAGE)
+        return books
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"Request failed on page {page}: {e}. Skipping this page...")
+
+    except IndexError:
+        print(f"Unexpected page structure encountered on page {page}. Skipping...")
+
+    return None
+
+# Async generator that fetches pages concurrently and yields rows as each page arrives.
+# Rows come out in page-arrival order, not page-number order.
+async def stream_books(query, max_books=100, concurrency=5, base_url=BASE_URL, parser=DEFAULT_BACKEND, cache=None):
+    import_aiohttp()
+    last_page = -(-max_books // RESULTS_PER_PAGE)  # Pages needed to reach max_books
+    exhausted = False  # Set once a page comes back empty
+    next_page = 1
+    yielded = 0
+    pending = {}
+
+    async with async_session(pool_size=concurrency) as session:
+        try:
+            while yielded < max_books:
+                # Keep up to `concurrency` page requests in flight
+                while len(pending) < concurrency and next_page <= last_page:
+                    task = asyncio.create_task(fetch_page_async(session, query, next_page, base_url, parser, cache))
+                    pending[task] = next_page
+                    next_page += 1
+
+                if not pending:
+                    break
+
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    page = pending.pop(task)
+                    books = task.result()
+
+                    if books is None:
+                        if not exhausted:
+                            last_page += 1  # Skipped page, fetch one more like get_books does
+                        continue
+
+                    if not books:
+                        print(f"No more results on page {page}.")
+                        exhausted = True
+                        last_page = min(last_page, page - 1)  # Stop sending new requests
+                        continue
+
+                    for book in books:
+                        if yielded >= max_books:
+                            break  # Stop once we have enough books
+                        yield book
+                        yielded += 1
+        finally:
+            # Abandon requests that are no longer needed
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+# Function to collect book metadata with the asyncio crawler
+async def get_books_async(query, max_books=100, concurrency=5, base_url=BASE_URL, parser=DEFAULT_BACKEND, cache=None):
+    return [book async for book in stream_books(query, max_books, concurrency, base_url, parser, cache)]
+
+# Function to save metadata into a CSV file
+def save_books_to_csv(books, filename='libgen_books_metadata.csv', append=False):
+    if not books:
+        print("No books to save.")
+        return
+
+    with CsvSink(filename, append) as sink:
+        sink.write(books)
+    print(f"Metadata saved to {filename} successfully.")
+
+# Function to crawl a query straight into a CSV or Parquet export, writing every page as it is
+# parsed so a crash keeps the rows already fetched; returns the number of rows written.
+# With a CrawlState the crawl is checkpointed (see crawl_book_pages) and always appends.
+def export_books(query, filename, max_books=100, concurrency=1, append=False, cache=None, state=None, mode="resume"):
+    with open_sink(filename, append or state is not None) as sink:
+        if state is not None:
+            for books in crawl_book_pages(query, state, max_books, mode):
+                sink.write(books)
+        elif concurrency > 1:
+            async def crawl():
+                page = []
+                async for book in stream_books(query, max_books, concurrency, cache=cache):
+                    page.append(book)
+                    if len(page) == RESULTS_PER_PAGE:
+                        sink.write(page)
+                        page = []
+                sink.write(page)
+            asyncio.run(crawl())
+        else:
+            for books in iter_book_pages(query, max_books, cache=cache):
+                sink.write(books)
+    return sink.rows
+
+# Main script to fetch and store the book metadata
+def main():
+    query = input("Enter the book title or query: ").replace(" ", "+")
+    max_books = int(input("Enter the number of books to fetch (e.g., 100): "))
+    concurrency = int(input("Enter the number of pages to fetch at once (1 = sequential): ") or 1)
+    filename = input("Enter the output file (.csv or .parquet) [libgen_books_metadata.csv]: ") or 'libgen_books_metadata.csv'
+    mode = input("Crawl mode: full, or checkpointed resume/retry/delta [full]: ").strip().lower() or "full"
+    append = mode != "full" or input("Append to an existing export? (y/N): ").strip().lower() == 'y'
+
+    # Repeat crawls of the same query are served from the shared search cache
+    cache = SearchCache()
+
+    # Start timing the execution
+    start_time = time.time()
+
+    state = CrawlState() if mode != "full" else None
+    rows = export_books(query, filename, max_books, concurrency, append, cache, state, mode)
+    if rows:
+        print(f"{rows} books saved to {filename} successfully.")
+    else:
+        print("No books found for the given query.")
+
+    # Calculate the elapsed time
+    elapsed_time = time.time() - start_time
+    print(f"Elapsed time: {elapsed_time:.2f} seconds")
+    if state is not None:
+        failed = state.failed_pages(query)
+        print(f"Crawl state: {state.seen_count(query)} books collected, "
+              f"{len(failed)} failed pages{' (run again with retry)' if failed else ''}")
+    stats = cache.stats()
+    print(f"Search cache: {stats['hits']} hits, {stats['misses']} misses")
+    if concurrency == 1:
+        stats = pool_stats()
+        print(f"Connections: {stats['connections']} opened for {stats['requests']} requests "
+              f"({stats['reuse_rate']:.0%} reused)")
+
+if __name__ == "__main__":
+    main()
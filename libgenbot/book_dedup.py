@@ -0,0 +1,138 @@
+import re
+import zlib
+import unicodedata
+import numpy as np
+
+# Lower rank wins when several editions of a book are found; PDF needs no conversion at all
+FORMAT_RANK = {'pdf': 0, 'epub': 1, 'djvu': 2, 'mobi': 3, 'azw3': 4, 'fb2': 5}
+UNRANKED_FORMAT = len(FORMAT_RANK)
+
+SHINGLE_SIZE = 4
+BANDS = 8            # LSH bands x rows per band = MinHash signature length
+ROWS_PER_BAND = 4
+SIMILARITY = 0.75    # Shingle Jaccard similarity at which two canonical titles are the same book
+CHUNK_TITLES = 20000  # Titles hashed per numpy batch, bounding the (shingles x hashes) matrix
+
+ISBN_PATTERN = re.compile(r'\b(?:97[89][\s-]?)?(?:\d[\s-]?){9}[\dx]\b')
+BRACKETS_PATTERN = re.compile(r'\([^)]*\)|\[[^\]]*\]')
+EDITION_PATTERN = re.compile(r'\b(?:\d+(?:st|nd|rd|th)|first|second|third|fourth|fifth|revised|updated|new)\s+(?:ed\.?|edition)\b'
+                             r'|\bedition\b')
+SUBTITLE_PATTERN = re.compile(r'\s*(?::|\s[-–—]\s|\s\|\s)')
+NON_WORD_PATTERN = re.compile(r'[\W_]+')
+# "+" and "#" after a letter name a different book ("C", "C++", "C#"), so they become words
+PLUS_PATTERN = re.compile(r'(?<=[a-z+])\+')
+SHARP_PATTERN = re.compile(r'(?<=[a-z])#')
+NUMBER_PATTERN = re.compile(r'\d+')
+
+# Fixed random multipliers for the multiply-shift hash family, so signatures are stable across runs
+_random = np.random.default_rng(0x5EED)
+HASH_MULTIPLIERS = _random.integers(1, 2**63, BANDS * ROWS_PER_BAND, dtype=np.uint64) | np.uint64(1)
+HASH_OFFSETS = _random.integers(0, 2**63, BANDS * ROWS_PER_BAND, dtype=np.uint64)
+
+# Function to reduce a libgen title to the key shared by its editions: no ISBNs, edition
+# markers, bracketed notes or subtitle, lowercase ASCII words only ("c++" is "c plus plus")
+def canonical_title(title):
+    title = unicodedata.normalize('NFKD', title or "").encode('ascii', 'ignore').decode().lower()
+    title = ISBN_PATTERN.sub(' ', title)
+    title = BRACKETS_PATTERN.sub(' ', title)
+    title = EDITION_PATTERN.sub(' ', title)
+
+    # Drop the subtitle unless the main title alone is too short to identify the book
+    main_title = SUBTITLE_PATTERN.split(title, maxsplit=1)[0]
+    if len(main_title.split()) >= 2:
+        title = main_title
+    title = SHARP_PATTERN.sub(' sharp', PLUS_PATTERN.sub(' plus', title))
+    return NON_WORD_PATTERN.sub(' ', title).strip()
+
+# Function to read a year column ("2019", "2019-03", "") as an int, 0 when unknown
+def year_value(year):
+    match = re.search(r'\d{4}', str(year or ""))
+    return int(match.group()) if match else 0
+
+def format_rank(book_format):
+    return FORMAT_RANK.get((book_format or "").lower(), UNRANKED_FORMAT)
+
+# Function to get the preference key of an edition: best format first, then the latest year
+def edition_key(book):
+    return (format_rank(book.get('format')), -year_value(book.get('year')))
+
+# Function to get the hashed character shingles of a canonical title. CRC32 rather than the
+# built-in str hash, which is salted per process: the grouping, and so the numbered listing that
+# --select and batch "select" positions refer to, must be the same in every run.
+def shingles(title):
+    data = title.encode()
+    if len(data) <= SHINGLE_SIZE:
+        return {zlib.crc32(data)}
+    return {zlib.crc32(data[i:i + SHINGLE_SIZE]) for i in range(len(data) - SHINGLE_SIZE + 1)}
+
+# Function to compute MinHash signatures for a list of shingle sets, one row per set
+def minhash_signatures(shingle_sets):
+    signatures = np.empty((len(shingle_sets), len(HASH_MULTIPLIERS)), dtype=np.uint64)
+    for start in range(0, len(shingle_sets), CHUNK_TITLES):
+        chunk = shingle_sets[start:start + CHUNK_TITLES]
+        lengths = np.fromiter((len(s) for s in chunk), dtype=np.int64, count=len(chunk))
+        hashes = np.fromiter((h for s in chunk for h in s), dtype=np.uint64, count=int(lengths.sum()))
+        # Multiply-shift hashing of every shingle under every hash function (uint64 wraps mod 2**64)
+        hashed = (hashes[:, None] * HASH_MULTIPLIERS + HASH_OFFSETS) >> np.uint64(32)
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        signatures[start:start + len(chunk)] = np.minimum.reduceat(hashed, offsets, axis=0)
+    return signatures
+
+# Union-find over canonical title ids
+class DisjointSet:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            self.parent[max(first, second)] = min(first, second)
+
+# Function to group the indices of books that are editions of the same title. Exact canonical
+# keys are grouped by dict lookup; the distinct keys are then blocked with MinHash LSH and only
+# candidates sharing a band are compared, so the cost stays roughly linear in the number of rows.
+def group_editions(books, similarity=SIMILARITY):
+    key_ids = {}
+    book_keys = []
+    for book in books:
+        key = canonical_title(book.get('name'))
+        book_keys.append(key_ids.setdefault(key, len(key_ids)))
+
+    keys = list(key_ids)
+    groups = DisjointSet(len(keys))
+    if len(keys) > 1:
+        shingle_sets = [shingles(key) for key in keys]
+        numbers = [NUMBER_PATTERN.findall(key) for key in keys]  # Volume 1 and Volume 2 are different books
+        signatures = minhash_signatures(shingle_sets)
+        key_range = np.arange(len(keys))
+        for band in range(BANDS):
+            # Fold the band's rows into one bucket hash, then find every key's bucket's first member
+            bucket = np.zeros(len(keys), dtype=np.uint64)
+            for column in signatures[:, band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].T:
+                bucket = bucket * np.uint64(0x100000001B3) ^ column
+            _, first_members, inverse = np.unique(bucket, return_index=True, return_inverse=True)
+            firsts = first_members[inverse.ravel()]
+            # Compare against the bucket's first member only, so a crowded bucket stays linear
+            for key_id in key_range[firsts != key_range].tolist():
+                first = int(firsts[key_id])
+                if numbers[first] == numbers[key_id] and groups.find(first) != groups.find(key_id):
+                    a, b = shingle_sets[first], shingle_sets[key_id]
+                    if len(a & b) >= similarity * len(a | b):
+                        groups.union(first, key_id)
+
+    grouped = {}
+    for index, key_id in enumerate(book_keys):
+        grouped.setdefault(groups.find(key_id), []).append(index)
+    return list(grouped.values())  # In order of each group's first appearance
+
+# Function to keep the preferred edition of every group of near-duplicate books
+def pick_editions(books, similarity=SIMILARITY):
+    return [books[min(group, key=lambda index: (edition_key(books[index]), index))]
+            for group in group_editions(books, similarity)]
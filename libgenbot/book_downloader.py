@@ -0,0 +1,58 @@
+import time
+import uuid
+from libgenbot.search_cache import get_scraper
+from libgenbot.core import filter_books
+from libgenbot.job_executor import get_job_executor
+import streamlit as st
+
+# The scraper is built on the first search, sharing cached search results with the other frontends
+scraper = get_scraper()
+
+# Background download/convert workers shared by every browser session; cache_resource keeps
+# one executor across Streamlit reruns
+job_executor = st.cache_resource(get_job_executor)()
+
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+# Streamlit Interface
+st.title("Book Downloader")
+query_input = st.text_input("Enter Book Query", placeholder="e.g., Hands-On ML")
+
+if st.button("Search Books"):
+    # Search for books
+    books = scraper.get_data(query_input)
+    # Filter and prioritize the books
+    st.session_state.filtered_books = filter_books(books)
+
+if 'filtered_books' in st.session_state and st.session_state.filtered_books:
+    st.write("Available Books:")
+    book_names = [book['name'] for book in st.session_state.filtered_books]
+    
+    # Maintain selection across interactions
+    if 'selected_books' not in st.session_state:
+        st.session_state.selected_books = []
+
+    selected_books = st.multiselect("Select Books to Download", options=book_names, 
+                                     default=st.session_state.selected_books)
+
+    download_all = st.checkbox("Select All Books")
+
+    if st.button("Download Selected Books"):
+        st.session_state.selected_books = selected_books  # Update session state
+        output_dir = "downloads"
+        books_to_download = [book for book in st.session_state.filtered_books
+                             if download_all or book['name'] in selected_books]
+
+        # Queue the books on the shared executor; progress is shown by polling below
+        st.session_state.job_id = job_executor.submit(st.session_state.session_id, books_to_download, output_dir)
+
+    status = job_executor.status(st.session_state.job_id) if 'job_id' in st.session_state else None
+    if status:
+        st.progress(status['progress'], text=f"{status['completed']}/{status['total']} books done")
+        st.text_area("Download Results", "\n".join(status['results']), height=200)
+        if not status['finished']:
+            time.sleep(1)  # Poll again on the next rerun
+            st.rerun()
+else:
+    st.write("No books found matching your query.")
@@ -0,0 +1,65 @@
+from libgenbot.search_cache import get_scraper
+from libgenbot.core import filter_books
+from libgenbot.job_executor import get_job_executor
+import gradio as gr
+
+# The scraper is built on the first search, sharing cached search results with the other frontends
+scraper = get_scraper()
+
+# Background download/convert workers shared by every browser session
+job_executor = get_job_executor()
+
+# Gradio Interface function to handle searches and downloads
+def search_books(query):
+    # Search for books
+    books = scraper.get_data(query)
+    # Filter and prioritize the books
+    filtered_books = filter_books(books)
+
+    # Prepare book information for display as a list of lists
+    book_info = [[book['name'], book['author'], book['year'], book['format']] for book in filtered_books]
+    # One checkbox per listed book; the group hands the download callback their indices
+    choices = [f"{index + 1}. {book['name']} ({book['year']}) - {book['format']}" for index, book in enumerate(filtered_books)]
+    # filtered_books goes to the session state for download, book_info to the table for display
+    return filtered_books, book_info, gr.update(choices=choices, value=[])
+
+def download_selected_books(filtered_books, selected_indices, download_all, request: gr.Request):
+    output_dir = "downloads"
+
+    if download_all:
+        # If 'Select All' is chosen, download all books
+        selected_books = filtered_books
+    else:
+        # Download only selected books based on indices
+        selected_books = [filtered_books[i] for i in selected_indices]
+
+    # Queue the books on the shared executor and stream its progress back instead of blocking
+    job_id = job_executor.submit(request.session_hash, selected_books, output_dir)
+    for status in job_executor.stream(job_id):
+        yield "\n".join(status['results'] + [f"{status['completed']}/{status['total']} books done"])
+
+# Gradio Interface
+with gr.Blocks() as app:
+    gr.Markdown("## Book Downloader")
+    query_input = gr.Textbox(label="Enter Book Query", placeholder="e.g., Hands-On ML")
+    search_button = gr.Button("Search Books")
+    
+    # The filtered book dicts of this session's last search, kept for the download callback
+    filtered_books = gr.State([])
+    # Placeholder for filtered books
+    book_list = gr.DataFrame(headers=["Title", "Author", "Year", "Format"], label="Available Books", interactive=True)
+    
+    # Options to download selected books or all books
+    download_all_checkbox = gr.Checkbox(label="Select All Books")
+    selected_indices = gr.CheckboxGroup(label="Select Books to Download", choices=[], type="index")
+    download_button = gr.Button("Download Selected Books")
+    
+    output_textbox = gr.Textbox(label="Download Results", interactive=False, lines=10)
+
+    # Set up button callbacks
+    search_button.click(search_books, inputs=query_input, outputs=[filtered_books, book_list, selected_indices])
+    download_button.click(download_selected_books, inputs=[filtered_books, selected_indices, download_all_checkbox], outputs=output_textbox)
+
+# Generator callbacks need the queue; it also keeps slow callbacks off the request threads
+app.queue()
+app.launch()
@@ -0,0 +1,160 @@
+import os
+import re
+import csv
+import glob
+
+pa = pq = None  # pyarrow (about 0.1s to import) is loaded on first Parquet use
+
+# Exported columns, in file order. Sizes are converted from libgen's "12 Mb" text to bytes.
+COLUMNS = ["id", "author", "name", "publisher", "year", "language", "size_bytes", "format", "link"]
+
+SIZE_PATTERN = re.compile(r'([\d.,]+)\s*([kmgt]?)b', re.IGNORECASE)
+SIZE_UNITS = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+
+ROWS_PER_ROW_GROUP = 10000
+ROWS_PER_PART = 100000  # A crash loses at most the part file being written
+
+# Function to import pyarrow on first use; Parquet output is optional and CSV works without it
+def load_pyarrow(purpose):
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError(f"{purpose} needs the pyarrow package installed.") from None
+        pa, pq = pyarrow, pyarrow.parquet
+    return pa, pq
+
+# Function to read an integer column, None when the text holds no number
+def parse_int(text):
+    match = re.search(r'\d+', str(text or ""))
+    return int(match.group()) if match else None
+
+# Function to turn libgen's size text ("12 Mb", "512 Kb") into bytes
+def parse_size(text):
+    match = SIZE_PATTERN.search(str(text or ""))
+    if not match:
+        return None
+    return int(float(match.group(1).replace(',', '.')) * SIZE_UNITS[match.group(2).lower()])
+
+# Function to convert a scraped book dict into a typed export row
+def typed_row(book):
+    return {
+        "id": parse_int(book.get('id')),
+        "author": book.get('author'),
+        "name": book.get('name'),
+        "publisher": book.get('publisher'),
+        "year": parse_int(book.get('year')),
+        "language": book.get('language') or None,
+        "size_bytes": parse_size(book.get('size')),
+        "format": (book.get('format') or "").lower() or None,
+        "link": book.get('link'),
+    }
+
+# Writes typed rows to a CSV file as they arrive, flushing after every batch
+class CsvSink:
+    def __init__(self, path, append=False):
+        self.path = path
+        write_header = not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self.file = open(path, 'a' if append else 'w', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=COLUMNS)
+        if write_header:
+            self.writer.writeheader()
+        self.rows = 0
+
+    def write(self, books):
+        self.writer.writerows(typed_row(book) for book in books)
+        self.file.flush()  # Rows of finished pages survive a crash later in the crawl
+        self.rows += len(books)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Writes typed rows to a Parquet dataset: a directory of part files with integer id/year/size
+# columns and dictionary-encoded (categorical) format and language. Each part is written to a
+# temporary name and renamed once complete, so readers only ever see finished files; appending
+# adds new parts next to the existing ones.
+class ParquetSink:
+    def __init__(self, path, append=False, rows_per_part=ROWS_PER_PART):
+        load_pyarrow("Parquet export")
+        self.path = path
+        self.rows_per_part = rows_per_part
+        self.schema = pa.schema([
+            ("id", pa.int64()),
+            ("author", pa.string()),
+            ("name", pa.string()),
+            ("publisher", pa.string()),
+            ("year", pa.int16()),
+            ("language", pa.dictionary(pa.int16(), pa.string())),
+            ("size_bytes", pa.int64()),
+            ("format", pa.dictionary(pa.int8(), pa.string())),
+            ("link", pa.string()),
+        ])
+        os.makedirs(path, exist_ok=True)
+        existing = sorted(glob.glob(os.path.join(path, "part-*.parquet")))
+        if not append:
+            for part in existing:
+                os.remove(part)
+            existing = []
+        self.next_part = max((int(os.path.basename(part)[5:10]) for part in existing), default=-1) + 1
+        self.buffer = []
+        self.writer = None
+        self.part_rows = 0
+        self.rows = 0
+
+    def write(self, books):
+        self.buffer.extend(typed_row(book) for book in books)
+        self.rows += len(books)
+        while len(self.buffer) >= ROWS_PER_ROW_GROUP:
+            self.write_row_group(self.buffer[:ROWS_PER_ROW_GROUP])
+            del self.buffer[:ROWS_PER_ROW_GROUP]
+
+    def write_row_group(self, rows):
+        if self.writer is None:
+            name = f"part-{self.next_part:05d}.parquet"
+            self.part_path = os.path.join(self.path, name)
+            # Dot files are skipped by Parquet readers, so an unfinished part is never loaded
+            self.temporary_path = os.path.join(self.path, f".{name}.tmp")
+            self.writer = pq.ParquetWriter(self.temporary_path, self.schema)
+            self.next_part += 1
+        self.writer.write_table(pa.Table.from_pylist(rows, schema=self.schema))
+        self.part_rows += len(rows)
+        if self.part_rows >= self.rows_per_part:
+            self.finish_part()
+
+    def finish_part(self):
+        self.writer.close()
+        os.replace(self.temporary_path, self.part_path)
+        self.writer = None
+        self.part_rows = 0
+
+    def close(self):
+        if self.buffer:
+            self.write_row_group(self.buffer)
+            self.buffer = []
+        if self.writer is not None:
+            self.finish_part()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Function to open the sink matching the file name: "*.parquet" is a Parquet dataset, anything else CSV
+def open_sink(path, append=False):
+    if path.endswith('.parquet'):
+        return ParquetSink(path, append)
+    return CsvSink(path, append)
+
+# Function to load an exported Parquet dataset, reading only the requested columns
+def read_parquet(path, columns=None):
+    load_pyarrow("Reading Parquet exports")
+    return pq.read_table(path, columns=columns)
@@ -0,0 +1,105 @@
+import sys
+import argparse
+import importlib
+import subprocess
+import importlib.util
+
+# The "libgenbot" command. Every subcommand imports the engine, the scraper or a UI framework
+# only when it runs, so `libgenbot --help` or a batch run never pays for Streamlit or Gradio.
+
+# Subcommands that hand their arguments to another module's main(argv)
+DELEGATED = {
+    "batch": ("libgenbot.batch_runner", "Run search/download/convert jobs from a JSONL file"),
+    "links": ("libgenbot.link_health", "Show or reset the mirror links that failed in earlier runs"),
+}
+
+# Function to print the filtered search results numbered from 1
+def print_books(books):
+    for index, book in enumerate(books):
+        print(f"{index + 1}. {book['name']} ({book['year']}) - {book['format']}")
+
+# Function to turn "1,3,5" into the selected books, ignoring numbers outside the list
+def select(books, selection):
+    indices = [int(part.strip()) - 1 for part in selection.split(',') if part.strip()]
+    return [books[index] for index in indices if 0 <= index < len(books)]
+
+# Function to search libgen (through the shared search cache) and keep one edition per book
+def find_books(query):
+    from libgenbot.search_cache import get_scraper
+    from libgenbot.core import filter_books
+    return filter_books(get_scraper().get_data(query) or [])
+
+def search(args):
+    print_books(find_books(args.query))
+
+# Function to search, pick books (prompting for anything not given on the command line) and
+# download and convert them concurrently
+def get(args):
+    from libgenbot import metrics
+    from libgenbot.library_manifest import LibraryManifest
+    from libgenbot.mirror_scheduler import MirrorScheduler
+    from libgenbot.link_health import get_link_health
+    from libgenbot.core import download_books_concurrently
+
+    # Export metrics if $LIBGENBOT_METRICS_PORT or $LIBGENBOT_METRICS_SNAPSHOT is set
+    metrics.start_from_env()
+
+    query = args.query or input("Enter the book title or query: ")
+    books = find_books(query)
+    if args.all:
+        selected_books = books
+    else:
+        print_books(books)
+        selection = args.select or input("Enter the numbers of the books to download (comma-separated, e.g., 1,3,5): ")
+        selected_books = select(books, selection)
+
+    download_books_concurrently(selected_books, args.output_dir, LibraryManifest(),
+                                MirrorScheduler(health=get_link_health()), download_workers=args.workers)
+    print("All selected books have been processed.")
+
+# Function to start a web front end: Streamlit runs the app file in its own process,
+# the Gradio app launches when its module is imported
+def web(args):
+    if args.ui == "gradio":
+        from libgenbot import book_downloader_gradio
+        return 0
+    app = importlib.util.find_spec("libgenbot.book_downloader").origin  # Located, not imported: Streamlit runs it
+    return subprocess.call([sys.executable, "-m", "streamlit", "run", app])
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="libgenbot", description="Search Library Genesis, download books and convert them to PDF.")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    command = commands.add_parser("search", help="Search and list one edition per book")
+    command.add_argument("query")
+    command.set_defaults(run=search)
+
+    command = commands.add_parser("get", help="Search, select and download books (prompts for what is not given)")
+    command.add_argument("query", nargs="?")
+    command.add_argument("--select", help="Book numbers from the search listing, e.g. 1,3,5")
+    command.add_argument("--all", action="store_true", help="Download every listed book")
+    command.add_argument("--output-dir", default="downloads")
+    command.add_argument("--workers", type=int, default=8, help="Concurrent downloads; 1 downloads one book at a time")
+    command.set_defaults(run=get)
+
+    command = commands.add_parser("web", help="Start the web interface")
+    command.add_argument("--ui", choices=["streamlit", "gradio"], default="streamlit")
+    command.set_defaults(run=web)
+
+    for name, (_, help_text) in DELEGATED.items():
+        commands.add_parser(name, help=f"{help_text} (see libgenbot {name} --help)", add_help=False)
+    return parser
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in DELEGATED:
+        return importlib.import_module(DELEGATED[argv[0]][0]).main(argv[1:])
+
+    args = build_parser().parse_args(argv)
+    if args.command is None:
+        build_parser().print_help()
+        return 2
+    return args.run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
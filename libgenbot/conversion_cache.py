@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import threading
+from libgenbot.metrics import CACHE_REQUESTS
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_CONVERSION_CACHE_DIR = os.environ.get("LIBGENBOT_CONVERSION_CACHE", "conversion_cache")
+DEFAULT_MAX_BYTES = int(os.environ.get("LIBGENBOT_CONVERSION_CACHE_MB", "2048")) * 1024 * 1024
+FICLONE = 0x40049409  # Linux ioctl that makes a copy-on-write clone (btrfs, XFS, ...)
+
+_cache = None
+_lock = threading.Lock()
+
+# Function to make `destination` a copy of `source` as cheaply as the filesystem allows: a
+# copy-on-write clone, else a hardlink, else a real copy. Returns the method used.
+def clone_file(source, destination):
+    if fcntl is not None:
+        try:
+            with open(source, 'rb') as src, open(destination, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return "reflink"
+        except OSError:
+            os.remove(destination)
+    try:
+        os.link(source, destination)
+        return "hardlink"
+    except OSError:
+        shutil.copyfile(source, destination)
+        return "copy"
+
+# Function to turn converter options into part of the cache key
+def options_key(options):
+    return hashlib.sha1(json.dumps(list(options)).encode('utf-8')).hexdigest()[:12]
+
+# Cache of converted PDFs keyed by the MD5 of the source file and the converter options, so the
+# same book downloaded again, or under another title, is never converted twice. PDFs live in a
+# directory next to a SQLite index and are evicted least recently used over the disk budget.
+class ConversionCache:
+    def __init__(self, directory=DEFAULT_CONVERSION_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.seconds_saved = 0.0
+        self.methods = {}
+
+        os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(directory, "index.sqlite3"), timeout=30,
+                                          check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS conversions ("
+            " key TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+            " convert_seconds REAL NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS conversions_accessed ON conversions (accessed)")
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".pdf")
+
+    # Function to put the cached PDF for a source at output_pdf; returns False on a miss
+    def fetch(self, digest, options, output_pdf):
+        key = f"{digest}-{options_key(options)}"
+        with self.lock:
+            row = self.connection.execute("SELECT size, mtime_ns, convert_seconds FROM conversions WHERE key = ?",
+                                          (key,)).fetchone()
+            try:
+                stat = os.stat(self.path(key)) if row else None
+            except OSError:
+                stat = None
+            # A hardlinked copy edited in place (e.g. a PDF reader saving annotations) changes the entry too
+            if row and (stat is None or (stat.st_size, stat.st_mtime_ns) != row[:2]):
+                self.remove(key)
+                row = None
+            if row is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache="conversion", result="miss")
+                return False
+
+            temporary = output_pdf + ".cached"
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            method = clone_file(self.path(key), temporary)
+            os.replace(temporary, output_pdf)
+            self.connection.execute("UPDATE conversions SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            self.seconds_saved += row[2]
+            self.methods[method] = self.methods.get(method, 0) + 1
+            CACHE_REQUESTS.inc(cache="conversion", result="hit")
+        return True
+
+    # Function to add a finished conversion, then evict least recently used PDFs over the budget
+    def store(self, digest, options, output_pdf, convert_seconds):
+        key = f"{digest}-{options_key(options)}"
+        temporary = self.path(key) + ".tmp"
+        with self.lock:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            clone_file(output_pdf, temporary)
+            os.replace(temporary, self.path(key))
+            stat = os.stat(self.path(key))
+            now = time.time()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO conversions (key, size, mtime_ns, convert_seconds, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?)", (key, stat.st_size, stat.st_mtime_ns, convert_seconds, now, now))
+            self.evict()
+
+    def remove(self, key):
+        self.connection.execute("DELETE FROM conversions WHERE key = ?", (key,))
+        if os.path.exists(self.path(key)):
+            os.remove(self.path(key))
+
+    def evict(self):
+        total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM conversions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.connection.execute("SELECT key, size FROM conversions ORDER BY accessed").fetchall():
+            self.remove(key)
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    # Function to report this process's hit rate and the converter time the hits saved
+    def stats(self):
+        with self.lock:
+            entries, size = self.connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM conversions").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "seconds_saved": round(self.seconds_saved, 3),
+            "served_by": dict(self.methods),
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+# Function to get the process-wide conversion cache shared by the download front ends
+def get_conversion_cache():
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = ConversionCache()
+        return _cache
@@ -0,0 +1,131 @@
+import os
+import logging
+from libgenbot.resumable_download import fetch_book
+from libgenbot.segmented_download import SegmentPool, fetch_book_segmented, order_by_size, is_large
+from libgenbot.pdf_converter import convert_to_pdf
+from libgenbot.conversion_cache import get_conversion_cache
+from libgenbot.download_pipeline import DownloadPipeline, SKIPPED
+from libgenbot.link_health import DeadLinkError
+from libgenbot import http_session
+from libgenbot.metrics import timed, log_event
+
+# Function to convert a downloaded book to PDF if necessary
+def convert_book(book, output_file, output_dir, manifest):
+    if book['format'].lower() != "pdf":
+        output_pdf = os.path.join(output_dir, f"{book['name']}.pdf")
+        convert_to_pdf(output_file, output_pdf, cache=get_conversion_cache())
+        if os.path.exists(output_pdf):
+            manifest.record_conversion(book, output_pdf)
+
+# Function to download the book; returns the downloaded file, SKIPPED when it is already on disk
+# or another worker is fetching it, or None when the download failed or every mirror is dead.
+# With a segment pool, large books are fetched as parallel Range segments.
+def download_book(book, output_dir, manifest, mirror_scheduler, retries=3, segment_pool=None):
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(output_dir, f"{book['name']}.{book['format'].lower()}")
+    
+    # The manifest knows what earlier runs downloaded and what other workers are fetching right now
+    if not manifest.claim(book, output_file):
+        print(f"Skipping already downloaded book: {book['name']}")
+        return SKIPPED
+
+    print(f"Downloading: {book['name']}")
+
+    try:
+        # Retries back off with jitter, respect per-host limits and fail over to other mirrors;
+        # every attempt resumes from the .part file left by the previous one
+        if segment_pool is not None and is_large(book):
+            fetch = lambda link: fetch_book_segmented(link, output_file, segment_pool)
+        else:
+            fetch = lambda link: fetch_book(link, output_file)
+        mirror_scheduler.fetch(book['link'], fetch, retries=retries)
+    except DeadLinkError as e:
+        print(f"Skipping {book['name']}: {e}")
+        manifest.release(book)
+        log_event("download_skipped", reason="dead_link", name=book['name'], link=book['link'], retry_at=e.retry_at)
+        return None
+    except Exception as e:
+        print(f"Failed to download {book['name']} after {retries} attempts.")
+        manifest.release(book)
+        log_event("download_failed", level=logging.ERROR, name=book['name'], link=book['link'], retries=retries, error=str(e))
+        return None
+
+    print(f"Downloaded: {output_file}")
+    manifest.record_download(book, output_file)
+    log_event("downloaded", name=book['name'], path=output_file, size=os.path.getsize(output_file))
+    return output_file  # Conversion happens in the pipeline's convert stage
+
+# Function to filter and prioritize books
+def filter_books(books):
+    with timed("filter"):
+        return prioritize_books(books)
+
+# Function to keep one edition per book: titles that differ only by ISBNs, subtitles or edition
+# markers are grouped, and the best format (PDF first) with the latest numeric year wins
+def prioritize_books(books):
+    from libgenbot.book_dedup import pick_editions  # Imported on first use: it loads numpy
+    return pick_editions(books)
+
+# Function to download books with threads and convert them on a separate CPU-sized worker pool.
+# Books start largest first; large ones are split into Range segments that workers without a
+# book of their own help fetch, so one huge file no longer decides when the run ends.
+# With link health on the scheduler, books whose mirrors are all dead are dropped up front.
+def download_books_concurrently(selected_books, output_dir, manifest, mirror_scheduler,
+                                download_workers=8, convert_workers=None, preflight=True):
+    # One keep-alive connection per download worker
+    http_session.configure(pool_size=download_workers)
+    segment_pool = SegmentPool()
+    if preflight and mirror_scheduler.health is not None:
+        selected_books = preflight_books(selected_books, manifest, mirror_scheduler, download_workers)
+
+    pipeline = DownloadPipeline(
+        download=lambda book: download_book(book, output_dir, manifest, mirror_scheduler, segment_pool=segment_pool),
+        convert=lambda book, output_file: convert_book(book, output_file, output_dir, manifest),
+        download_workers=download_workers,
+        convert_workers=convert_workers,
+        idle=segment_pool.help
+    )
+    pipeline.run(order_by_size(selected_books))
+    report = pipeline.report()
+    print_report(report, mirror_scheduler)
+    return report
+
+# Function to HEAD-probe the mirrors of books that are not on disk yet and keep the books that
+# still have a mirror worth trying
+def preflight_books(books, manifest, mirror_scheduler, workers):
+    missing = [book for book in books if not manifest.has(book)]
+    with timed("preflight"):
+        alive = set(mirror_scheduler.preflight([book['link'] for book in missing], workers=workers))
+    dead = {book['link'] for book in missing if book['link'] not in alive}
+    for book in missing:
+        if book['link'] in dead:
+            print(f"Skipping {book['name']}: every mirror failed recently")
+            log_event("download_skipped", reason="dead_link", name=book['name'], link=book['link'])
+    return [book for book in books if book['link'] not in dead]
+
+# Function to print the pipeline, mirror and connection pool statistics of a bulk run
+def print_report(report, mirror_scheduler):
+    for stage in ("download", "convert"):
+        stats = report[stage]
+        print(f"{stage}: {stats['items']} books, {stats['skipped']} skipped, {stats['failed']} failed, {stats['mean_seconds']}s mean, "
+              f"{stats['blocked_seconds']}s waiting on the queue ({stats['workers']} workers)")
+    print(f"Pipeline finished in {report['elapsed_seconds']}s (max queue depth {report['max_queue_depth']})")
+
+    metrics = mirror_scheduler.metrics()
+    print(f"Mirrors: {metrics['retries']} retries, {metrics['failovers']} failovers")
+    for host, stats in metrics['hosts'].items():
+        print(f"  {host}: {stats['successes']}/{stats['requests']} ok, {stats['throttled']} throttled, "
+              f"concurrency limit {stats['concurrency_limit']}")
+    if mirror_scheduler.health is not None:
+        stats = mirror_scheduler.health.stats()
+        print(f"Link health: {metrics['probes']} preflight probes, {metrics['skipped_dead']} books skipped at download, "
+              f"{stats['dead']} known-dead links waiting for a re-probe")
+
+    stats = http_session.pool_stats()
+    print(f"Connections: {stats['connections']} opened for {stats['requests']} requests "
+          f"({stats['reuse_rate']:.0%} reused, {stats['open_connections']} still open)")
+
+    stats = get_conversion_cache().stats()
+    if stats['hits'] + stats['misses']:
+        print(f"Conversion cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%}), "
+              f"{stats['seconds_saved']}s of conversion saved")
@@ -0,0 +1,120 @@
+import os
+import time
+import sqlite3
+import threading
+from libgenbot.search_cache import normalize_query
+
+DEFAULT_STATE_PATH = os.environ.get("LIBGENBOT_CRAWL_STATE", "crawl_state.sqlite3")
+
+# Function to get the id a crawled row is remembered by: its libgen id, else its mirror link
+def row_id(book):
+    return str(book.get('id') or book.get('link') or book['name'])
+
+# Durable progress of metadata crawls per normalized query: the last page a full crawl reached,
+# every row id already collected and the pages that failed. Same threading/locking setup as SearchCache.
+class CrawlState:
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(
+            "CREATE TABLE IF NOT EXISTS crawls ("
+            " query TEXT PRIMARY KEY, last_page INTEGER NOT NULL DEFAULT 0,"
+            " complete INTEGER NOT NULL DEFAULT 0, updated REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " query TEXT NOT NULL, id TEXT NOT NULL, PRIMARY KEY (query, id)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS failed_pages ("
+            " query TEXT NOT NULL, page INTEGER NOT NULL, error TEXT, attempts INTEGER NOT NULL,"
+            " updated REAL NOT NULL, PRIMARY KEY (query, page));"
+        )
+
+    # Function to get the last page a full crawl of the query finished (0 if never crawled)
+    def last_page(self, query):
+        with self.lock:
+            row = self.connection.execute("SELECT last_page FROM crawls WHERE query = ?",
+                                          (normalize_query(query),)).fetchone()
+        return row[0] if row else 0
+
+    # Function to check whether a full crawl of the query reached the end of the results
+    def complete(self, query):
+        with self.lock:
+            row = self.connection.execute("SELECT complete FROM crawls WHERE query = ?",
+                                          (normalize_query(query),)).fetchone()
+        return bool(row and row[0])
+
+    def failed_pages(self, query):
+        with self.lock:
+            rows = self.connection.execute("SELECT page FROM failed_pages WHERE query = ? ORDER BY page",
+                                           (normalize_query(query),)).fetchall()
+        return [row[0] for row in rows]
+
+    # Function to record a fetched page in one transaction; returns the rows not seen before.
+    # `advance` moves the full-crawl checkpoint forward (delta crawls leave it where it is).
+    def record_page(self, query, page, books, advance=True):
+        query = normalize_query(query)
+        ids = [row_id(book) for book in books]
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                known = set()
+                for start in range(0, len(ids), 500):  # Stay under SQLite's bound parameter limit
+                    chunk = ids[start:start + 500]
+                    known.update(row[0] for row in self.connection.execute(
+                        f"SELECT id FROM seen WHERE query = ? AND id IN ({','.join('?' * len(chunk))})",
+                        [query] + chunk))
+                self.connection.executemany("INSERT OR IGNORE INTO seen (query, id) VALUES (?, ?)",
+                                            [(query, book_id) for book_id in ids])
+                self.connection.execute("DELETE FROM failed_pages WHERE query = ? AND page = ?", (query, page))
+                self.connection.execute(
+                    "INSERT INTO crawls (query, last_page, updated) VALUES (?, ?, ?)"
+                    " ON CONFLICT (query) DO UPDATE SET last_page = max(last_page, excluded.last_page),"
+                    " updated = excluded.updated",
+                    (query, page if advance else 0, time.time())
+                )
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+        fresh = []
+        for book_id, book in zip(ids, books):
+            if book_id not in known:
+                known.add(book_id)  # The same row twice on one page counts once
+                fresh.append(book)
+        return fresh
+
+    def record_failure(self, query, page, error):
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO failed_pages (query, page, error, attempts, updated) VALUES (?, ?, ?, 1, ?)"
+                " ON CONFLICT (query, page) DO UPDATE SET error = excluded.error,"
+                " attempts = attempts + 1, updated = excluded.updated",
+                (normalize_query(query), page, error, time.time())
+            )
+
+    # Function to note that a full crawl reached an empty page, i.e. the end of the results
+    def mark_complete(self, query):
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO crawls (query, complete, updated) VALUES (?, 1, ?)"
+                " ON CONFLICT (query) DO UPDATE SET complete = 1, updated = excluded.updated",
+                (normalize_query(query), time.time())
+            )
+
+    def seen_count(self, query):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM seen WHERE query = ?",
+                                           (normalize_query(query),)).fetchone()[0]
+
+    # Function to forget everything about a query so the next crawl starts from scratch
+    def reset(self, query):
+        query = normalize_query(query)
+        with self.lock:
+            for table in ("crawls", "seen", "failed_pages"):
+                self.connection.execute(f"DELETE FROM {table} WHERE query = ?", (query,))
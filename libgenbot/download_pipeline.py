@@ -0,0 +1,178 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from libgenbot.metrics import QUEUE_DEPTH
+
+# Marks the end of the conversion queue
+DONE = object()
+# Returned by download(book) for a book that needs no work: on disk, or being fetched by another worker
+SKIPPED = object()
+
+# Timing counters for one pipeline stage
+class StageStats:
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.count = 0
+        self.failed = 0
+        self.skipped = 0
+        self.busy_seconds = 0.0     # Time spent doing the stage's work
+        self.blocked_seconds = 0.0  # Time spent waiting on the queue (backpressure or starvation)
+        self.max_seconds = 0.0
+        self.durations = []         # Per-item seconds, for the latency percentiles
+
+    def add(self, seconds, ok=True, skipped=False):
+        with self.lock:
+            self.count += 1
+            self.failed += not ok
+            self.skipped += skipped
+            self.busy_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            self.durations.append(seconds)
+
+    def add_blocked(self, seconds):
+        with self.lock:
+            self.blocked_seconds += seconds
+
+    # Function to get the latency below which `fraction` of the items finished
+    def percentile(self, fraction):
+        with self.lock:
+            durations = sorted(self.durations)
+        return durations[min(int(len(durations) * fraction), len(durations) - 1)] if durations else 0.0
+
+    def summary(self):
+        return {
+            "workers": self.workers,
+            "items": self.count,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "mean_seconds": round(self.busy_seconds / self.count, 3) if self.count else 0.0,
+            "p50_seconds": round(self.percentile(0.5), 3),
+            "p95_seconds": round(self.percentile(0.95), 3),
+            "max_seconds": round(self.max_seconds, 3),
+        }
+
+# Two-stage pipeline: I/O-bound download threads feed a bounded queue that a separate,
+# CPU-sized set of conversion workers drains. A slow Calibre run no longer holds a download slot.
+#
+# download(book) returns the downloaded path, SKIPPED when there is nothing to do or None when it failed;
+# convert(book, path) runs the conversion. Each conversion worker drives one converter
+# process at a time, so convert_workers bounds the number of concurrent Calibre processes.
+# idle(), if given, is called by download workers once no books are left, for as long as it
+# returns True, e.g. to help fetch segments of large files that are still downloading.
+class DownloadPipeline:
+    def __init__(self, download, convert, download_workers=4, convert_workers=None, queue_size=None, idle=None):
+        self.download = download
+        self.convert = convert
+        self.idle = idle
+        self.active_downloads = 0
+        self.active_condition = threading.Condition()
+        self.download_workers = download_workers
+        self.convert_workers = convert_workers or os.cpu_count() or 1
+        self.queue = queue.Queue(maxsize=queue_size or 2 * self.convert_workers)
+        self.download_stats = StageStats("download", self.download_workers)
+        self.convert_stats = StageStats("convert", self.convert_workers)
+        self.max_queue_depth = 0
+        self.elapsed_seconds = 0.0
+
+    def download_one(self, book):
+        start_time = time.perf_counter()
+        with self.active_condition:
+            self.active_downloads += 1
+        try:
+            path = self.download(book)
+        except Exception as exc:
+            print(f"{book['name']} generated an exception: {exc}")
+            path = None
+        finally:
+            with self.active_condition:
+                self.active_downloads -= 1
+                self.active_condition.notify_all()
+        skipped = path is SKIPPED
+        if skipped:
+            path = None
+        self.download_stats.add(time.perf_counter() - start_time, ok=skipped or path is not None, skipped=skipped)
+
+        if path is not None:
+            # Blocks while the converters are behind, which throttles the downloaders
+            start_time = time.perf_counter()
+            self.queue.put((book, path))
+            self.download_stats.add_blocked(time.perf_counter() - start_time)
+            self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+            QUEUE_DEPTH.set(self.queue.qsize(), queue="convert")
+        return path
+
+    # Function run by each download worker: take books in the given order, then help out
+    def download_loop(self, pending, paths, lock):
+        while True:
+            with lock:
+                item = next(pending, None)
+            if item is None:
+                break
+            index, book = item
+            paths[index] = self.download_one(book)
+        while self.idle is not None:
+            if self.idle():
+                continue
+            with self.active_condition:
+                if not self.active_downloads:
+                    break
+                self.active_condition.wait(0.05)  # A download still running may yet have work to share
+
+    def convert_loop(self):
+        while True:
+            start_time = time.perf_counter()
+            item = self.queue.get()
+            self.convert_stats.add_blocked(time.perf_counter() - start_time)
+            QUEUE_DEPTH.set(self.queue.qsize(), queue="convert")
+            if item is DONE:
+                break
+
+            book, path = item
+            start_time = time.perf_counter()
+            ok = True
+            try:
+                self.convert(book, path)
+            except Exception as exc:
+                print(f"Conversion of {book['name']} generated an exception: {exc}")
+                ok = False
+            self.convert_stats.add(time.perf_counter() - start_time, ok=ok)
+
+    # Function to push every book through both stages and wait for them to finish
+    def run(self, books):
+        start_time = time.perf_counter()
+        converters = [threading.Thread(target=self.convert_loop, daemon=True) for _ in range(self.convert_workers)]
+        for thread in converters:
+            thread.start()
+
+        books = list(books)
+        paths = [None] * len(books)
+        pending = iter(enumerate(books))
+        lock = threading.Lock()
+        with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+            # With an idle task every worker is useful, even with fewer books than workers
+            count = self.download_workers if self.idle is not None else min(self.download_workers, len(books))
+            workers = [executor.submit(self.download_loop, pending, paths, lock) for _ in range(count)]
+            for worker in workers:
+                worker.result()
+
+        for _ in converters:
+            self.queue.put(DONE)
+        for thread in converters:
+            thread.join()
+
+        self.elapsed_seconds = time.perf_counter() - start_time
+        return paths
+
+    def report(self):
+        return {
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "max_queue_depth": self.max_queue_depth,
+            "download": self.download_stats.summary(),
+            "convert": self.convert_stats.summary(),
+        }
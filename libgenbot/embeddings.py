@@ -0,0 +1,256 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from libgenbot.text_normalizer import SIMPLE_TOKEN_PATTERN
+from libgenbot.metrics import timed
+from libgenbot.text_extraction import TextCache, iter_document_texts
+
+DEFAULT_EMBEDDING_CACHE_DIR = os.environ.get("LIBGENBOT_EMBEDDING_CACHE", "embedding_cache")
+WINDOW_WORDS = 300   # Words per window of a long text; stays under BERT's 512 word pieces
+WINDOW_STRIDE = 250  # Windows overlap by 50 words so no sentence is only ever seen cut in half
+
+# Function to split a long text into overlapping windows of words. The windows of an unchanged
+# book are identical between runs, so each one is a separate embedding cache entry.
+def text_windows(text, window_words=WINDOW_WORDS, stride=WINDOW_STRIDE):
+    words = text.split()
+    if len(words) <= window_words:
+        return [" ".join(words)]
+    return [" ".join(words[start:start + window_words])
+            for start in range(0, max(len(words) - window_words, 0) + stride, stride)]
+
+# BERT sentence embeddings (mean of the last hidden state over real tokens). Inputs are sorted by
+# length and cut into batches that are each padded only to their own longest input, so a batch
+# of short titles no longer pays for the longest text in the call.
+class BertEncoder:
+    def __init__(self, model_name='bert-base-uncased', batch_size=32, max_length=512):
+        # Imported here: TensorFlow takes seconds to load and the GloVe mode does not need it
+        try:
+            import tensorflow as tf
+            from transformers import BertTokenizerFast, TFBertModel
+        except ImportError:
+            raise ImportError("BERT embeddings need the tensorflow and transformers packages installed.")
+        self.tf = tf
+        self.name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.tokenizer = BertTokenizerFast.from_pretrained(model_name)
+        self.model = TFBertModel.from_pretrained(model_name)
+        self.dimension = self.model.config.hidden_size
+
+    def encode(self, texts):
+        tf = self.tf
+        input_ids = self.tokenizer(list(texts), truncation=True, max_length=self.max_length)['input_ids']
+        order = np.argsort([len(ids) for ids in input_ids], kind='stable')
+        vectors = np.empty((len(input_ids), self.dimension), dtype=np.float32)
+
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            inputs = self.tokenizer.pad({'input_ids': [input_ids[index] for index in batch]}, return_tensors='tf')
+            hidden = self.model(input_ids=inputs['input_ids'], attention_mask=inputs['attention_mask']).last_hidden_state
+            mask = tf.cast(inputs['attention_mask'], hidden.dtype)[:, :, None]
+            vectors[batch] = (tf.reduce_sum(hidden * mask, axis=1) / tf.reduce_sum(mask, axis=1)).numpy()
+        return vectors
+
+# The notebook's GloVe lookup, vectorized: a text's vector is the mean of its known words' vectors.
+# Works offline once the vectors are on disk (gensim's download cache, or a GloVe .txt file).
+class GloveEncoder:
+    def __init__(self, model_name="glove-wiki-gigaword-300", path=None):
+        try:
+            import gensim.downloader
+            from gensim.models import KeyedVectors
+        except ImportError:
+            raise ImportError("GloVe embeddings need the gensim package installed.")
+        if path:
+            self.vectors = KeyedVectors.load_word2vec_format(path, binary=False, no_header=True)
+            self.name = os.path.basename(path)
+        else:
+            self.vectors = gensim.downloader.load(model_name)
+            self.name = model_name
+        self.index = self.vectors.key_to_index
+        self.dimension = self.vectors.vector_size
+
+    # Function to get one vector per token, zeros for unknown words (map_words_to_embeddings)
+    def word_vectors(self, tokens):
+        indices = np.fromiter((self.index.get(token, -1) for token in tokens), dtype=np.int64, count=len(tokens))
+        vectors = self.vectors.vectors[np.maximum(indices, 0)]
+        vectors[indices < 0] = 0.0
+        return vectors
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            indices = np.fromiter((self.index.get(token, -1) for token in SIMPLE_TOKEN_PATTERN.findall(text.lower())),
+                                  dtype=np.int64)
+            indices = indices[indices >= 0]
+            if len(indices):
+                vectors[row] = self.vectors.vectors[indices].mean(axis=0)
+        return vectors
+
+# On-disk embedding cache for one model: vectors are appended to a flat float32 file read through
+# a memory map, and a SQLite index maps each text's hash to its row. Vectors are written before
+# their index rows, so an interrupted run can only leave unreferenced rows behind.
+class EmbeddingCache:
+    def __init__(self, model_name, dimension, directory=DEFAULT_EMBEDDING_CACHE_DIR):
+        self.dimension = dimension
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, re.sub(r'[^\w.-]+', '_', model_name))
+        self.vectors_path = base + ".f32"
+        self.connection = sqlite3.connect(base + ".sqlite3", timeout=30, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self.vectors = None
+        open(self.vectors_path, 'ab').close()
+
+    @staticmethod
+    def text_hash(text):
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def rows(self):
+        return os.path.getsize(self.vectors_path) // (4 * self.dimension)
+
+    # Function to map the vector file again once it has grown past the current mapping
+    def mapped(self, needed_rows):
+        if self.vectors is None or len(self.vectors) < needed_rows:
+            self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(self.rows(), self.dimension))
+        return self.vectors
+
+    # Function to look up many hashes; returns {hash: vector} for the ones cached
+    def get_many(self, hashes):
+        found = {}
+        with self.lock:
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                found.update(self.connection.execute(
+                    f"SELECT hash, row FROM embeddings WHERE hash IN ({','.join('?' * len(chunk))})", chunk))
+            if not found:
+                return {}
+            vectors = self.mapped(max(found.values()) + 1)
+        return {text_hash: np.array(vectors[row]) for text_hash, row in found.items()}
+
+    def put_many(self, hashes, vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self.lock:
+            # The write transaction also keeps other processes from appending at the same time
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                first_row = self.rows()
+                with open(self.vectors_path, 'r+b') as f:
+                    f.truncate(first_row * 4 * self.dimension)  # Drop a half-written row of an interrupted run
+                    f.seek(0, os.SEEK_END)
+                    f.write(vectors.tobytes())
+                self.connection.executemany("INSERT OR IGNORE INTO embeddings (hash, row) VALUES (?, ?)",
+                                            [(text_hash, first_row + offset) for offset, text_hash in enumerate(hashes)])
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+# Embeds texts through an encoder, serving repeats from the cache and reporting throughput
+class EmbeddingService:
+    def __init__(self, encoder, cache=None, chunk_size=1024):
+        self.encoder = encoder
+        self.cache = cache
+        self.chunk_size = chunk_size  # Texts encoded between cache writes
+        self.texts = 0
+        self.cached = 0
+        self.encoded_words = 0
+        self.seconds = 0.0
+
+    # Function to embed short texts; returns a (len(texts), dimension) float32 array
+    def embed(self, texts):
+        start_time = time.perf_counter()
+        texts = list(texts)
+        vectors = np.empty((len(texts), self.encoder.dimension), dtype=np.float32)
+
+        hashes = [EmbeddingCache.text_hash(text) for text in texts]
+        cached = self.cache.get_many(list(set(hashes))) if self.cache is not None else {}
+        missing = {}  # hash -> first position of a text that still needs encoding
+        for position, text_hash in enumerate(hashes):
+            if text_hash in cached:
+                vectors[position] = cached[text_hash]
+            else:
+                missing.setdefault(text_hash, position)
+
+        missing_hashes = list(missing)
+        with timed("embed"):
+            for start in range(0, len(missing_hashes), self.chunk_size):
+                chunk = missing_hashes[start:start + self.chunk_size]
+                chunk_texts = [texts[missing[text_hash]] for text_hash in chunk]
+                encoded = self.encoder.encode(chunk_texts)
+                if self.cache is not None:
+                    self.cache.put_many(chunk, encoded)
+                cached.update(zip(chunk, encoded))
+                self.encoded_words += sum(len(text.split()) for text in chunk_texts)
+        encoded_positions = 0
+        for position, text_hash in enumerate(hashes):
+            if text_hash in missing:
+                vectors[position] = cached[text_hash]
+                encoded_positions += 1
+
+        self.texts += len(texts)
+        self.cached += len(texts) - encoded_positions
+        self.seconds += time.perf_counter() - start_time
+        return vectors
+
+    # Function to embed book-length texts: each is cut into overlapping windows, the windows are
+    # embedded together, and a document's vector is the mean of its windows
+    def embed_documents(self, texts):
+        windows, owners = [], []
+        for index, text in enumerate(texts):
+            for window in text_windows(text):
+                windows.append(window)
+                owners.append(index)
+        window_vectors = self.embed(windows)
+        owners = np.asarray(owners)
+        vectors = np.zeros((len(texts), self.encoder.dimension), dtype=np.float32)
+        np.add.at(vectors, owners, window_vectors)
+        return vectors / np.maximum(np.bincount(owners, minlength=len(texts)), 1)[:, None]
+
+    def report(self):
+        return {
+            "encoder": self.encoder.name,
+            "texts": self.texts,
+            "cached": self.cached,
+            "encoded": self.texts - self.cached,
+            "seconds": round(self.seconds, 3),
+            "texts_per_second": round(self.texts / self.seconds, 1) if self.seconds else 0.0,
+            "encoded_words_per_second": round(self.encoded_words / self.seconds, 1) if self.seconds else 0.0,
+        }
+
+# Function to build the embedding service: "bert" for BERT, "glove" for the cheap offline mode
+def get_embedding_service(mode="bert", cache_dir=DEFAULT_EMBEDDING_CACHE_DIR, glove_path=None):
+    encoder = BertEncoder() if mode == "bert" else GloveEncoder(path=glove_path)
+    return EmbeddingService(encoder, EmbeddingCache(encoder.name, encoder.dimension, cache_dir))
+
+def print_report(report):
+    print(f"{report['texts']} texts embedded with {report['encoder']} in {report['seconds']}s "
+          f"({report['texts_per_second']} texts/sec, {report['encoded_words_per_second']} words/sec encoded); "
+          f"{report['cached']} served from the embedding cache")
+
+def main():
+    directory = input("Enter the path to the local directory containing PDF/DOCX files: ")
+    mode = input("Embedding model: bert, or glove for the cheap offline mode [bert]: ").strip().lower() or "bert"
+    output = input("Enter the output file for the document vectors [document_embeddings.npy]: ") or "document_embeddings.npy"
+
+    service = get_embedding_service(mode)
+    paths, vectors = [], []
+    for path, text in iter_document_texts(directory, cache=TextCache()):
+        paths.append(path)
+        vectors.append(service.embed_documents([text])[0])
+
+    np.save(output, np.array(vectors, dtype=np.float32).reshape(len(vectors), service.encoder.dimension))
+    with open(os.path.splitext(output)[0] + ".paths.txt", 'w', encoding='utf-8') as f:
+        f.writelines(path + "\n" for path in paths)
+    print_report(service.report())
+
+if __name__ == "__main__":
+    main()
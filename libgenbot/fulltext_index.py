@@ -0,0 +1,497 @@
+import os
+import re
+import time
+import shutil
+import sqlite3
+import threading
+import numpy as np
+from libgenbot.resumable_download import hash_existing
+from libgenbot.text_extraction import TextExtractor, TextCache, iter_documents
+from libgenbot.text_normalizer import SIMPLE_TOKEN_PATTERN
+from libgenbot.metrics import timed
+
+DEFAULT_FULLTEXT_INDEX_DIR = os.environ.get("LIBGENBOT_FULLTEXT_INDEX", "fulltext_index")
+MAX_TERM_LENGTH = 40        # Longer "words" are glued-together PDF text and are not indexed
+SEGMENT_TOKENS = 20000000   # Tokens buffered before a segment is written; bounds memory while indexing
+MAX_SEGMENTS = 8            # More segments than this after a change merges the smallest ones
+MERGE_FACTOR = 4            # Segments merged together at least
+MAX_DELETED_RATIO = 0.3     # A segment with more deleted pages than this is rewritten without them
+BM25_K1 = 1.2
+BM25_B = 0.75
+PHRASE_PATTERN = re.compile(r'"([^"]*)"')
+
+# Function to split text into index terms: lowercased alphanumeric runs, as the normalizer's simple mode
+def tokenize(text):
+    return [token for token in SIMPLE_TOKEN_PATTERN.findall(text.lower()) if len(token) <= MAX_TERM_LENGTH]
+
+# Function to split a query into its quoted phrases and its loose terms
+def parse_query(query):
+    phrases = [words for words in map(tokenize, PHRASE_PATTERN.findall(query)) if words]
+    return phrases, tokenize(PHRASE_PATTERN.sub(" ", query))
+
+# Function to variable-byte encode non-negative integers: 7 bits per byte, the high bit set on every
+# byte of a value but its last. Gaps between sorted doc ids and positions mostly fit in one byte.
+# Returns the bytes and the byte length of every value.
+def vbyte_encode(values):
+    values = np.asarray(values, dtype=np.uint64)
+    lengths = np.ones(len(values), dtype=np.int64)
+    remaining = values >> np.uint64(7)
+    while remaining.any():
+        lengths += remaining > 0
+        remaining >>= np.uint64(7)
+    ends = np.cumsum(lengths)
+    owners = np.repeat(np.arange(len(values)), lengths)
+    shifts = (np.arange(len(owners)) - np.repeat(ends - lengths, lengths)) * 7
+    encoded = ((values[owners] >> shifts.astype(np.uint64)) & np.uint64(127)).astype(np.uint8) | np.uint8(128)
+    encoded[ends - 1] &= np.uint8(127)
+    return encoded, lengths
+
+# Function to decode a run of whole vbyte values, without a Python loop
+def vbyte_decode(data):
+    data = np.asarray(data, dtype=np.uint8)
+    if not len(data):
+        return np.empty(0, dtype=np.int64)
+    ends = np.flatnonzero(data < 128)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    shifts = (np.arange(len(data)) - np.repeat(starts, ends - starts + 1)) * 7
+    return np.add.reduceat((data & 127).astype(np.uint64) << shifts.astype(np.uint64), starts).astype(np.int64)
+
+# Function to turn deltas back into values, restarting the running sum at every group start
+def undelta(deltas, counts):
+    sums = np.cumsum(deltas)
+    starts = np.cumsum(counts) - counts
+    return sums - np.repeat(sums[starts] - deltas[starts], counts) if len(deltas) else sums
+
+# Function to write an immutable segment. `terms` are distinct UTF-8 byte strings; every token
+# occurrence is (term_ids, docs, positions), ordered by doc then position within each term.
+# Postings (doc gap, term frequency pairs) and positions (gaps within a doc) are vbyte-compressed
+# per term; the sorted term dictionary and the offsets are .npy files that are opened memory-mapped.
+def write_segment(path, terms, term_ids, docs, positions, doc_lengths):
+    terms = np.asarray(terms, dtype=np.bytes_) if len(terms) else np.empty(0, dtype='S1')
+    rank = np.empty(len(terms), dtype=np.int64)
+    rank[np.argsort(terms, kind='stable')] = np.arange(len(terms))
+    keys = rank[np.asarray(term_ids, dtype=np.int64)]
+    order = np.argsort(keys, kind='stable')  # Stable, so each term keeps its doc/position order
+    keys, docs, positions = keys[order], np.asarray(docs, dtype=np.int64)[order], np.asarray(positions, dtype=np.int64)[order]
+
+    new_term = np.ones(len(keys), dtype=bool)
+    new_term[1:] = keys[1:] != keys[:-1]
+    new_posting = new_term.copy()
+    new_posting[1:] |= docs[1:] != docs[:-1]
+    term_starts = np.flatnonzero(new_term)
+    posting_starts = np.flatnonzero(new_posting)
+    posting_docs = docs[posting_starts]
+    frequencies = np.diff(np.append(posting_starts, len(keys)))
+    doc_freqs = np.diff(np.append(np.flatnonzero(new_term[posting_starts]), len(posting_starts)))
+
+    gaps = np.diff(posting_docs, prepend=0)
+    first_postings = np.cumsum(doc_freqs) - doc_freqs
+    gaps[first_postings] = posting_docs[first_postings]
+    postings, lengths = vbyte_encode(np.column_stack((gaps, frequencies)).ravel())
+    postings_offsets = np.append(0, np.cumsum(lengths))[2 * np.append(first_postings, len(posting_starts))]
+
+    position_gaps = np.diff(positions, prepend=0)
+    position_gaps[posting_starts] = positions[posting_starts]
+    position_bytes, lengths = vbyte_encode(position_gaps)
+    positions_offsets = np.append(0, np.cumsum(lengths))[np.append(term_starts, len(keys))]
+
+    temporary = os.path.join(os.path.dirname(path), ".tmp-" + os.path.basename(path))
+    shutil.rmtree(temporary, ignore_errors=True)
+    os.makedirs(temporary)
+    np.save(os.path.join(temporary, "terms.npy"), np.sort(terms)[keys[term_starts]] if len(keys) else terms[:0])
+    np.save(os.path.join(temporary, "doc_freqs.npy"), doc_freqs.astype(np.uint32))
+    np.save(os.path.join(temporary, "postings_offsets.npy"), postings_offsets.astype(np.uint64))
+    np.save(os.path.join(temporary, "positions_offsets.npy"), positions_offsets.astype(np.uint64))
+    np.save(os.path.join(temporary, "doc_lengths.npy"), np.asarray(doc_lengths, dtype=np.uint32))
+    postings.tofile(os.path.join(temporary, "postings.bin"))
+    position_bytes.tofile(os.path.join(temporary, "positions.bin"))
+    os.rename(temporary, path)  # A segment directory only ever exists complete
+
+def map_bytes(path):
+    return np.memmap(path, dtype=np.uint8, mode='r') if os.path.getsize(path) else np.empty(0, dtype=np.uint8)
+
+# Read side of a segment. Nothing is loaded up front: the arrays are memory maps, and a query
+# decodes only the postings of its own terms.
+class Segment:
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        load = lambda name: np.load(os.path.join(path, name), mmap_mode='r')
+        self.terms = load("terms.npy")
+        self.doc_freqs = load("doc_freqs.npy")
+        self.postings_offsets = load("postings_offsets.npy")
+        self.positions_offsets = load("positions_offsets.npy")
+        self.doc_lengths = load("doc_lengths.npy")
+        self.postings_data = map_bytes(os.path.join(path, "postings.bin"))
+        self.positions_data = map_bytes(os.path.join(path, "positions.bin"))
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    # Function to find a term's number by binary search of the sorted dictionary; -1 when absent
+    def find(self, term):
+        term = term.encode('utf-8')
+        number = int(np.searchsorted(self.terms, term))
+        return number if number < len(self.terms) and self.terms[number] == term else -1
+
+    # Function to get a term's (docs, frequencies)
+    def postings(self, number):
+        values = vbyte_decode(self.postings_data[int(self.postings_offsets[number]):int(self.postings_offsets[number + 1])])
+        return np.cumsum(values[0::2]), values[1::2]
+
+    # Function to get a term's positions, one run per posting, aligned with np.repeat(docs, frequencies)
+    def positions(self, number, frequencies):
+        gaps = vbyte_decode(self.positions_data[int(self.positions_offsets[number]):int(self.positions_offsets[number + 1])])
+        return undelta(gaps, frequencies)
+
+    # Function to decode the whole segment back into token occurrences (term_ids, docs, positions)
+    # in term, doc, position order, for merging
+    def occurrences(self):
+        doc_freqs = np.asarray(self.doc_freqs, dtype=np.int64)
+        values = vbyte_decode(self.postings_data)
+        frequencies = values[1::2]
+        docs = undelta(values[0::2], doc_freqs)
+        positions = undelta(vbyte_decode(self.positions_data), frequencies)
+        term_ids = np.repeat(np.repeat(np.arange(len(doc_freqs)), doc_freqs), frequencies)
+        return term_ids, np.repeat(docs, frequencies), positions
+
+# Collects tokenized pages until they are written out as one segment
+class SegmentBuilder:
+    def __init__(self):
+        self.vocabulary = {}
+        self.term_ids, self.docs, self.positions, self.doc_lengths = [], [], [], []
+        self.books = []  # (path, digest, mtime_ns, size, first_doc, pages)
+        self.tokens = 0
+
+    def add_book(self, path, digest, mtime_ns, size, pages):
+        first_doc = len(self.doc_lengths)
+        for text in pages:
+            tokens = tokenize(text)
+            doc = len(self.doc_lengths)
+            self.term_ids.append(np.fromiter((self.vocabulary.setdefault(token, len(self.vocabulary)) for token in tokens),
+                                             dtype=np.int64, count=len(tokens)))
+            self.docs.append(np.full(len(tokens), doc, dtype=np.int64))
+            self.positions.append(np.arange(len(tokens), dtype=np.int64))
+            self.doc_lengths.append(len(tokens))
+            self.tokens += len(tokens)
+        self.books.append((path, digest, mtime_ns, size, first_doc, len(pages)))
+
+    def write(self, path):
+        concatenate = lambda arrays: np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int64)
+        write_segment(path, [term.encode('utf-8') for term in self.vocabulary], concatenate(self.term_ids),
+                      concatenate(self.docs), concatenate(self.positions), self.doc_lengths)
+
+# A segment as seen by one snapshot: its live pages and the books they belong to
+class SegmentView:
+    def __init__(self, segment, books):
+        self.segment = segment
+        books = sorted(books, key=lambda book: book[1])
+        self.paths = [path for path, first_doc, pages in books]
+        self.first_docs = np.array([first_doc for path, first_doc, pages in books], dtype=np.int64)
+        self.live = np.zeros(len(segment), dtype=bool)
+        for path, first_doc, pages in books:
+            self.live[first_doc:first_doc + pages] = True
+
+    # Function to map a segment-local doc to (path, 1-based page number)
+    def locate(self, doc):
+        book = int(np.searchsorted(self.first_docs, doc, side='right')) - 1
+        return self.paths[book], int(doc - self.first_docs[book]) + 1
+
+# BM25 keyword search over the books in the download directory, one document per page. The index
+# is a set of immutable segments (Lucene-style): each update writes new books to a new segment, a
+# changed or removed book's old pages just stop being live, and small or mostly-deleted segments
+# are merged away. A SQLite manifest records each book's path, mtime, size and MD5 and where its
+# pages live, so an update only re-reads books whose mtime or size changed and only re-indexes
+# books whose content did.
+class FullTextIndex:
+    def __init__(self, directory=DEFAULT_FULLTEXT_INDEX_DIR):
+        self.directory = directory
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(directory, "manifest.sqlite3"), timeout=30,
+                                          check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(
+            "CREATE TABLE IF NOT EXISTS segments (name TEXT PRIMARY KEY, docs INTEGER NOT NULL, created REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS books ("
+            " path TEXT PRIMARY KEY, digest TEXT NOT NULL, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL,"
+            " segment TEXT NOT NULL, first_doc INTEGER NOT NULL, pages INTEGER NOT NULL);"
+        )
+        self.segments = {}
+        with self.lock:
+            self.remove_orphans()
+            self.load()
+
+    # Function to delete segment directories the manifest does not list (an interrupted write or merge)
+    def remove_orphans(self):
+        listed = {name for name, in self.connection.execute("SELECT name FROM segments")}
+        for entry in os.scandir(self.directory):
+            if entry.is_dir() and entry.name not in listed:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    # Function to open the listed segments and publish a fresh snapshot for searches
+    def load(self):
+        books = {}
+        for path, segment, first_doc, pages in self.connection.execute("SELECT path, segment, first_doc, pages FROM books"):
+            books.setdefault(segment, []).append((path, first_doc, pages))
+        names = [name for name, in self.connection.execute("SELECT name FROM segments ORDER BY created")]
+        self.segments = {name: self.segments.get(name) or Segment(os.path.join(self.directory, name)) for name in names}
+        views = [SegmentView(self.segments[name], books.get(name, [])) for name in names]
+        live_docs = sum(int(view.live.sum()) for view in views)
+        live_tokens = sum(int(np.asarray(view.segment.doc_lengths, dtype=np.int64)[view.live].sum()) for view in views)
+        # Searches read whatever snapshot is current; replacing the tuple publishes a new one atomically
+        self.snapshot = (views, live_docs, live_tokens / live_docs if live_docs else 0.0)
+
+    def new_segment_path(self):
+        return os.path.join(self.directory, f"segment-{time.time_ns():x}")
+
+    # Function to write a builder's books as a segment and point their manifest rows at it
+    def commit_segment(self, builder):
+        path = self.new_segment_path()
+        builder.write(path)
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.connection.execute("INSERT INTO segments (name, docs, created) VALUES (?, ?, ?)",
+                                    (os.path.basename(path), len(builder.doc_lengths), time.time()))
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO books (path, digest, mtime_ns, size, segment, first_doc, pages)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(book_path, digest, mtime_ns, size, os.path.basename(path), first_doc, pages)
+                 for book_path, digest, mtime_ns, size, first_doc, pages in builder.books])
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+
+    # Function to index books given as (path, digest, mtime_ns, size, page texts); a path that is
+    # already indexed is replaced. Returns the number of pages indexed.
+    def index_books(self, books):
+        pages_indexed = 0
+        with self.lock:
+            builder = SegmentBuilder()
+            for path, digest, mtime_ns, size, pages in books:
+                builder.add_book(path, digest, mtime_ns, size, pages)
+                pages_indexed += len(pages)
+                if builder.tokens >= SEGMENT_TOKENS:
+                    self.commit_segment(builder)
+                    builder = SegmentBuilder()
+            if builder.books:
+                self.commit_segment(builder)
+            self.merge_segments()
+        return pages_indexed
+
+    def remove_books(self, paths):
+        with self.lock:
+            self.connection.executemany("DELETE FROM books WHERE path = ?", [(path,) for path in paths])
+            self.merge_segments()
+
+    # Function to merge segments into one, dropping deleted pages; books keep their page order
+    def merge(self, names):
+        views = {view.segment.name: view for view in self.snapshot[0]}
+        term_lists, term_ids, docs, positions, doc_lengths, moved = [], [], [], [], [], []
+        term_offset = doc_offset = 0
+        for name in names:
+            view = views[name]
+            segment_terms, segment_docs, segment_positions = view.segment.occurrences()
+            keep = view.live[segment_docs]
+            new_docs = doc_offset + np.cumsum(view.live) - 1  # Live pages are renumbered contiguously
+            term_lists.append(np.asarray(view.segment.terms))
+            term_ids.append(segment_terms[keep] + term_offset)
+            docs.append(new_docs[segment_docs[keep]])
+            positions.append(segment_positions[keep])
+            doc_lengths.append(np.asarray(view.segment.doc_lengths)[view.live])
+            moved += [(int(new_docs[first_doc]), path) for path, first_doc in zip(view.paths, view.first_docs)]
+            term_offset += len(view.segment.terms)
+            doc_offset += int(view.live.sum())
+
+        # The same word has a different number in every segment; number the union instead
+        terms, inverse = np.unique(np.concatenate(term_lists), return_inverse=True) if term_offset else (np.empty(0, 'S1'), None)
+        path = self.new_segment_path()
+        term_ids = np.concatenate(term_ids)
+        write_segment(path, terms, inverse.reshape(-1)[term_ids] if len(term_ids) else term_ids,
+                      np.concatenate(docs), np.concatenate(positions), np.concatenate(doc_lengths))
+
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.connection.execute("INSERT INTO segments (name, docs, created) VALUES (?, ?, ?)",
+                                    (os.path.basename(path), doc_offset, time.time()))
+            self.connection.executemany("UPDATE books SET segment = ?, first_doc = ? WHERE path = ?",
+                                        [(os.path.basename(path), first_doc, book_path) for first_doc, book_path in moved])
+            self.connection.executemany("DELETE FROM segments WHERE name = ?", [(name,) for name in names])
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        for name in names:
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    # Function to apply the merge policy: drop segments with no live pages, rewrite mostly-deleted
+    # ones, and merge the smallest while there are too many; then publish a new snapshot
+    def merge_segments(self, force=False):
+        self.load()
+        while True:
+            views = self.snapshot[0]
+            dead = [view.segment.name for view in views if not view.live.any()]
+            if dead:
+                self.connection.executemany("DELETE FROM segments WHERE name = ?", [(name,) for name in dead])
+                for name in dead:
+                    shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+            else:
+                by_size = sorted(views, key=lambda view: int(view.live.sum()))
+                if (force and len(views) > 1) or len(views) > MAX_SEGMENTS:
+                    count = len(views) if force else max(MERGE_FACTOR, len(views) - MAX_SEGMENTS + 1)
+                    self.merge([view.segment.name for view in by_size[:count]])
+                else:
+                    sparse = [view.segment.name for view in views
+                              if 1 - view.live.sum() / len(view.segment) > (0 if force else MAX_DELETED_RATIO)]
+                    if not sparse:
+                        return
+                    self.merge(sparse[:1])
+            self.load()
+
+    # Function to merge everything into a single segment without deleted pages
+    def optimize(self):
+        with self.lock:
+            self.merge_segments(force=True)
+
+    # Function to bring the index in line with the directory: new and changed books are indexed,
+    # removed ones deleted, and renamed or merely touched ones only get their manifest row updated
+    def update(self, directory="downloads", text_cache=None):
+        known = {path: (digest, mtime_ns, size) for path, digest, mtime_ns, size
+                 in self.connection.execute("SELECT path, digest, mtime_ns, size FROM books")}
+        fresh, touched, present = {}, [], set()
+        for path in iter_documents(directory):
+            present.add(path)
+            stat = os.stat(path)
+            row = known.get(path)
+            if row and row[1:] == (stat.st_mtime_ns, stat.st_size):
+                continue
+            digest = hash_existing(path).hexdigest()
+            if row and row[0] == digest:
+                touched.append((stat.st_mtime_ns, stat.st_size, path, path))
+            else:
+                fresh[path] = (digest, stat.st_mtime_ns, stat.st_size)
+
+        # Missing files by digest; several deleted copies of one book share a digest
+        missing = {}
+        for path in known:
+            if path not in present:
+                missing.setdefault(known[path][0], []).append(path)
+        for path, (digest, mtime_ns, size) in list(fresh.items()):
+            if missing.get(digest) and path not in known:
+                touched.append((mtime_ns, size, path, missing[digest].pop()))
+                del fresh[path]
+        removed = [path for paths in missing.values() for path in paths]
+        self.connection.executemany("UPDATE books SET mtime_ns = ?, size = ?, path = ? WHERE path = ?", touched)
+
+        # Books reach index_books one at a time as their extraction finishes; only the
+        # segment being built holds pages
+        extracted = []
+        def books():
+            for path, pages in TextExtractor(cache=text_cache).extract_documents(list(fresh)):
+                extracted.append(path)
+                yield (path,) + fresh[path] + (pages,)
+        indexed = self.index_books(books())
+        self.remove_books(removed)
+        print(f"Indexed {len(extracted)} new or changed books ({indexed} pages), removed {len(removed)}, "
+              f"{len(touched)} renamed or touched; {self.snapshot[1]} pages in {len(self.snapshot[0])} segments")
+        return len(extracted)
+
+    # Function to find the live docs of one segment matching a phrase; returns (docs, phrase frequencies)
+    @staticmethod
+    def match_phrase(view, words):
+        segment = view.segment
+        numbers = [segment.find(word) for word in words]
+        if min(numbers) < 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        postings = [segment.postings(number) for number in numbers]
+        candidates = view.live.nonzero()[0]
+        for docs, frequencies in postings:
+            candidates = np.intersect1d(candidates, docs, assume_unique=True)
+        if len(words) == 1 or not len(candidates):
+            docs, frequencies = postings[0]
+            keep = np.isin(docs, candidates, assume_unique=True)
+            return docs[keep], frequencies[keep]
+
+        # A phrase starts wherever word i sits at start + i for every i: intersect (doc, start) keys
+        starts = None
+        for offset, (number, (docs, frequencies)) in enumerate(zip(numbers, postings)):
+            occurrence_docs = np.repeat(docs, frequencies)
+            starts_here = segment.positions(number, frequencies) - offset
+            keep = (starts_here >= 0) & np.isin(occurrence_docs, candidates)
+            keys = occurrence_docs[keep] << 32 | starts_here[keep]
+            starts = keys if starts is None else np.intersect1d(starts, keys, assume_unique=True)
+        return np.unique(starts >> 32, return_counts=True)
+
+    # Function to rank pages by BM25: loose terms add to the score, quoted phrases must all match
+    # and score by their own frequency. Returns dicts with path, page and score, best first.
+    def search(self, query, k=10):
+        phrases, terms = parse_query(query)
+        clauses = [(words, True) for words in phrases] + [([term], False) for term in dict.fromkeys(terms)]
+        views, live_docs, average_length = self.snapshot
+        if not clauses or not live_docs:
+            return []
+
+        with timed("fulltext_search"):
+            matches = [[self.match_phrase(view, words) for words, required in clauses] for view in views]
+            doc_freqs = [sum(len(segment_matches[clause][0]) for segment_matches in matches) for clause in range(len(clauses))]
+            idfs = [np.log(1 + (live_docs - df + 0.5) / (df + 0.5)) for df in doc_freqs]
+
+            best = []  # (score, view index, doc)
+            for view_index, (view, segment_matches) in enumerate(zip(views, matches)):
+                scores = np.zeros(len(view.segment))
+                required = np.ones(len(view.segment), dtype=bool)
+                for (words, is_required), idf, (docs, frequencies) in zip(clauses, idfs, segment_matches):
+                    lengths = np.asarray(view.segment.doc_lengths[docs], dtype=np.float64)
+                    scores[docs] += idf * frequencies * (BM25_K1 + 1) / (
+                        frequencies + BM25_K1 * (1 - BM25_B + BM25_B * lengths / average_length))
+                    if is_required:
+                        matched = np.zeros(len(view.segment), dtype=bool)
+                        matched[docs] = True
+                        required &= matched
+                candidates = np.flatnonzero((scores > 0) & required)
+                if len(candidates) > k:
+                    candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+                best += [(float(scores[doc]), view_index, int(doc)) for doc in candidates]
+
+        results = []
+        for score, view_index, doc in sorted(best, key=lambda match: -match[0])[:k]:
+            path, page = views[view_index].locate(doc)
+            results.append({"path": path, "page": page, "score": round(score, 4)})
+        return results
+
+    def stats(self):
+        views, live_docs, average_length = self.snapshot
+        size = sum(entry.stat().st_size for view in views for entry in os.scandir(view.segment.path))
+        return {
+            "books": sum(len(view.paths) for view in views),
+            "pages": live_docs,
+            "deleted_pages": sum(len(view.segment) for view in views) - live_docs,
+            "segments": len(views),
+            "terms": sum(len(view.segment.terms) for view in views),
+            "average_page_tokens": round(average_length, 1),
+            "bytes": size,
+        }
+
+def main():
+    directory = input("Enter the download directory to index [downloads]: ") or "downloads"
+
+    index = FullTextIndex()
+    index.update(directory, TextCache())
+    stats = index.stats()
+    print(f"{stats['books']} books, {stats['pages']} pages, {stats['terms']} terms, "
+          f"{stats['bytes'] / 1024 / 1024:.1f} MB on disk")
+    while True:
+        query = input('\nSearch the library, "quotes" for phrases (empty to quit): ').strip()
+        if not query:
+            break
+        start_time = time.perf_counter()
+        results = index.search(query)
+        print(f"{len(results)} results in {(time.perf_counter() - start_time) * 1000:.1f} ms")
+        for result in results:
+            print(f"  {result['score']:7.3f}  {os.path.basename(result['path'])}, page {result['page']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 10
+USER_AGENT = "libgenbot/1.0 (+https://github.com/namanmuktha/libgenbot)"
+
+_session = None
+_pool_size = DEFAULT_POOL_SIZE
+_lock = threading.Lock()
+
+# Function to build a keep-alive session whose per-host pool holds pool_size connections
+def build_session(pool_size=DEFAULT_POOL_SIZE):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT, "Connection": "keep-alive"})
+    return session
+
+# Function to size the shared pool, typically to the number of download workers.
+# Takes effect for the next get_session() call if the session was already built.
+def configure(pool_size):
+    global _session, _pool_size
+    with _lock:
+        if pool_size != _pool_size:
+            _pool_size = pool_size
+            if _session is not None:
+                _session.close()
+                _session = None
+
+# Function to get the process-wide session shared by the crawler and the downloaders
+def get_session():
+    global _session
+    with _lock:
+        if _session is None:
+            _session = build_session(_pool_size)
+        return _session
+
+# Function to build an aiohttp session for the async crawler with the same keep-alive settings
+def async_session(pool_size=DEFAULT_POOL_SIZE, timeout=10):
+    import aiohttp
+    connector = aiohttp.TCPConnector(limit=pool_size, limit_per_host=pool_size, keepalive_timeout=30)
+    return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout),
+                                 headers={"User-Agent": USER_AGENT})
+
+# Function to report connection reuse for a session (the shared one by default)
+def pool_stats(session=None):
+    session = session or get_session()
+    requests_made = 0
+    connections_made = 0
+    open_connections = 0
+    hosts = {}
+
+    for adapter in set(session.adapters.values()):
+        for key in list(adapter.poolmanager.pools.keys()):
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            idle = sum(1 for conn in list(pool.pool.queue) if conn is not None and getattr(conn, 'sock', None))
+            requests_made += pool.num_requests
+            connections_made += pool.num_connections
+            open_connections += idle
+            hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "requests": pool.num_requests,
+                "connections": pool.num_connections,
+                "idle": idle,
+            }
+
+    return {
+        "pool_size": _pool_size,
+        "requests": requests_made,
+        "connections": connections_made,
+        "reuse_rate": 1 - connections_made / requests_made if requests_made else 0.0,
+        "open_connections": open_connections,
+        "hosts": hosts,
+    }
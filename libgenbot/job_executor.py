@@ -0,0 +1,169 @@
+import os
+import time
+import uuid
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from libgenbot.library_manifest import LibraryManifest
+from libgenbot.mirror_scheduler import MirrorScheduler
+from libgenbot.link_health import get_link_health
+from libgenbot.core import download_book, convert_book
+from libgenbot.download_pipeline import SKIPPED
+from libgenbot.metrics import QUEUE_DEPTH
+
+FINISHED_JOBS_KEPT = 200  # Finished jobs stay queryable until this many newer ones finish
+
+# One download request from one UI session
+class Job:
+    def __init__(self, session_id, books, output_dir):
+        self.id = uuid.uuid4().hex[:12]
+        self.session_id = session_id
+        self.books = books
+        self.output_dir = output_dir
+        self.total = len(books)
+        self.completed = 0
+        self.results = []
+        self.created = time.time()
+        self.finished = None
+        self.version = 0  # Bumped on every change so streams only emit real updates
+
+    def status(self):
+        return {
+            "job_id": self.id,
+            "total": self.total,
+            "completed": self.completed,
+            "progress": self.completed / self.total if self.total else 1.0,
+            "results": list(self.results),
+            "finished": self.finished is not None,
+        }
+
+# Shared background executor for the Streamlit and Gradio apps. A fixed set of download threads
+# and a CPU-sized conversion pool serve every session; the download threads take work from the
+# sessions round-robin, so one session's 50-book request cannot starve everyone else.
+class JobExecutor:
+    def __init__(self, download_workers=4, convert_workers=None, manifest=None, mirror_scheduler=None):
+        self.manifest = manifest or LibraryManifest()
+        self.mirror_scheduler = mirror_scheduler or MirrorScheduler(health=get_link_health())
+        self.converter = ThreadPoolExecutor(max_workers=convert_workers or os.cpu_count() or 1,
+                                            thread_name_prefix="convert")
+        self.condition = threading.Condition()
+        self.sessions = OrderedDict()  # session id -> deque of (job, book), in round-robin order
+        self.jobs = {}
+        self.finished_jobs = deque()
+        self.workers = [threading.Thread(target=self.download_loop, daemon=True, name=f"download-{index}")
+                        for index in range(download_workers)]
+        for worker in self.workers:
+            worker.start()
+
+    # Function to queue a job and return its id straight away
+    def submit(self, session_id, books, output_dir="downloads"):
+        job = Job(session_id, books, output_dir)
+        with self.condition:
+            self.jobs[job.id] = job
+            if books:
+                self.sessions.setdefault(session_id, deque()).extend((job, book) for book in books)
+            else:
+                self.finish(job)
+            QUEUE_DEPTH.set(self.pending_count(), queue="download_jobs")
+            self.condition.notify_all()
+        return job.id
+
+    def pending_count(self):
+        return sum(len(pending) for pending in self.sessions.values())
+
+    # Function to take the next book from the session at the front, then move that session to the back
+    def next_task(self):
+        with self.condition:
+            while not self.sessions:
+                self.condition.wait()
+            session_id, pending = self.sessions.popitem(last=False)
+            task = pending.popleft()
+            if pending:
+                self.sessions[session_id] = pending
+            QUEUE_DEPTH.set(self.pending_count(), queue="download_jobs")
+            return task
+
+    def download_loop(self):
+        while True:
+            job, book = self.next_task()
+            try:
+                if self.manifest.has(book):
+                    self.complete(job, f"Skipped: {book['name']}")
+                    continue
+                output_file = download_book(book, job.output_dir, self.manifest, self.mirror_scheduler)
+            except Exception as e:
+                self.complete(job, f"An error occurred while downloading {book['name']}: {e}")
+                continue
+
+            if output_file is SKIPPED:
+                self.complete(job, f"Skipped: {book['name']}")
+            elif output_file is None:
+                self.complete(job, f"Download failed for: {book['name']}. Check the link.")
+            elif book['format'].lower() == "pdf":
+                self.complete(job, f"Downloaded: {book['name']}")
+            else:
+                self.add_result(job, f"Downloaded: {book['name']}, converting to PDF...")
+                self.converter.submit(self.convert, job, book, output_file)
+
+    def convert(self, job, book, output_file):
+        try:
+            convert_book(book, output_file, job.output_dir, self.manifest)
+            self.complete(job, f"Converted: {book['name']}")
+        except Exception as e:
+            self.complete(job, f"Downloaded {book['name']} but conversion failed: {e}")
+
+    def add_result(self, job, message):
+        with self.condition:
+            job.results.append(message)
+            job.version += 1
+            self.condition.notify_all()
+
+    def complete(self, job, message):
+        with self.condition:
+            job.results.append(message)
+            job.completed += 1
+            job.version += 1
+            if job.completed == job.total:
+                self.finish(job)
+            self.condition.notify_all()
+
+    # Called with the condition held
+    def finish(self, job):
+        job.finished = time.time()
+        self.finished_jobs.append(job.id)
+        while len(self.finished_jobs) > FINISHED_JOBS_KEPT:
+            self.jobs.pop(self.finished_jobs.popleft(), None)
+
+    # Function to get a job's progress for polling UIs (Streamlit); None for an unknown job
+    def status(self, job_id):
+        with self.condition:
+            job = self.jobs.get(job_id)
+            return job.status() if job else None
+
+    # Generator yielding the job's status every time it changes, until it finishes (Gradio)
+    def stream(self, job_id, timeout=1.0):
+        seen = -1
+        while True:
+            with self.condition:
+                job = self.jobs.get(job_id)
+                if job is None:
+                    return
+                if job.version == seen and job.finished is None:
+                    self.condition.wait(timeout)
+                    continue
+                seen = job.version
+                status = job.status()
+            yield status
+            if status["finished"]:
+                return
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Function to get the process-wide executor shared by every UI session
+def get_job_executor(download_workers=4, convert_workers=None):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = JobExecutor(download_workers, convert_workers)
+        return _executor
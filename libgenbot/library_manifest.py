@@ -0,0 +1,167 @@
+import os
+import time
+import sqlite3
+import threading
+from libgenbot.resumable_download import md5_from_link, hash_existing
+
+DEFAULT_MANIFEST_PATH = os.environ.get("LIBGENBOT_MANIFEST", "library_manifest.sqlite3")
+STALE_CLAIM_SECONDS = 60 * 60  # A "downloading" row older than this belongs to a dead worker
+
+# Function to check whether the process that made a claim is still running
+def process_alive(pid):
+    if pid is None:
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+# Function to get the manifest key of a book: its MD5, else its libgen id, else its title
+def book_key(book):
+    md5 = book.get('md5') or md5_from_link(book.get('link', ''))
+    if md5:
+        return md5.lower()
+    if book.get('id'):
+        return f"id:{book['id']}"
+    return f"title:{book['name']}"
+
+# Durable record of the downloaded library, keyed by MD5 with an index on the libgen id.
+# Safe to share between threads (one lock around one connection) and processes (SQLite file locking).
+class LibraryManifest:
+    def __init__(self, path=DEFAULT_MANIFEST_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS books ("
+            " key TEXT PRIMARY KEY, id TEXT, name TEXT, path TEXT, size INTEGER, format TEXT,"
+            " state TEXT NOT NULL, converted_path TEXT, updated REAL NOT NULL, owner INTEGER)"
+        )
+        try:
+            self.connection.execute("ALTER TABLE books ADD COLUMN owner INTEGER")  # Manifests made before claims had owners
+        except sqlite3.OperationalError:
+            pass
+        self.connection.execute("CREATE INDEX IF NOT EXISTS books_id ON books (id)")
+
+    # Function to look up a record by MD5 or libgen id; returns a dict or None
+    def lookup(self, md5=None, book_id=None):
+        with self.lock:
+            if md5:
+                row = self.connection.execute("SELECT * FROM books WHERE key = ?", (md5.lower(),)).fetchone()
+            else:
+                row = self.connection.execute("SELECT * FROM books WHERE id = ?", (str(book_id),)).fetchone()
+        return dict(row) if row else None
+
+    # Function to check whether a book is already on disk
+    def has(self, book):
+        return self.find(book) is not None
+
+    # Function to get the record of a book that is on disk, as a dict; None if it is not
+    def find(self, book):
+        with self.lock:
+            row = self.connection.execute("SELECT * FROM books WHERE key = ?", (book_key(book),)).fetchone()
+        if row is None or row['state'] == "downloading" or not os.path.exists(row['path']):
+            return None
+        return dict(row)
+
+    # Function to atomically reserve a book for downloading. Returns False when the book is
+    # already on disk or another live worker (thread or process) is downloading it.
+    def claim(self, book, path):
+        key = book_key(book)
+        now = time.time()
+
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")  # Locks out other processes until COMMIT
+            try:
+                row = self.connection.execute("SELECT state, path, updated, owner FROM books WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    if row['state'] == "downloading" and now - row['updated'] < STALE_CLAIM_SECONDS \
+                            and process_alive(row['owner']):
+                        return False
+                    if row['state'] != "downloading" and os.path.exists(row['path']):
+                        return False
+
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO books (key, id, name, path, size, format, state, converted_path, updated, owner)"
+                    " VALUES (?, ?, ?, ?, NULL, ?, 'downloading', NULL, ?, ?)",
+                    (key, book.get('id'), book['name'], path, book['format'].lower(), now, os.getpid())
+                )
+                return True
+            finally:
+                self.connection.execute("COMMIT")
+
+    # Function to drop a claim after the download failed for good
+    def release(self, book):
+        with self.lock:
+            self.connection.execute("DELETE FROM books WHERE key = ? AND state = 'downloading'", (book_key(book),))
+
+    # Function to record a finished download
+    def record_download(self, book, path):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO books (key, id, name, path, size, format, state, converted_path, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, 'downloaded', NULL, ?)",
+                (book_key(book), book.get('id'), book['name'], path, os.path.getsize(path),
+                 book['format'].lower(), time.time())
+            )
+
+    # Function to record that a downloaded book now has a PDF conversion
+    def record_conversion(self, book, pdf_path):
+        with self.lock:
+            self.connection.execute(
+                "UPDATE books SET state = 'converted', converted_path = ?, updated = ? WHERE key = ?",
+                (pdf_path, time.time(), book_key(book))
+            )
+
+    # Function to rebuild the index from the files already in a downloads directory.
+    # Libgen MD5s are hashes of the file contents, so existing files get their real keys back.
+    def rebuild(self, directory):
+        entries = []
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                if filename.endswith(".part") or filename.startswith("."):
+                    continue
+                path = os.path.join(root, filename)
+                name, extension = os.path.splitext(filename)
+                entries.append((hash_existing(path).hexdigest(), name, path, os.path.getsize(path),
+                                extension.lstrip('.').lower()))
+
+        # A PDF sitting next to a same-named EPUB/MOBI/DJVU/DOCX is that book's conversion
+        pdf_paths = {os.path.splitext(path)[0]: path for _, _, path, _, extension in entries if extension == "pdf"}
+        now = time.time()
+
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.execute("DELETE FROM books WHERE state != 'downloading'")
+                for md5, name, path, size, extension in entries:
+                    converted_path = pdf_paths.get(os.path.splitext(path)[0]) if extension != "pdf" else None
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO books (key, id, name, path, size, format, state, converted_path, updated)"
+                        " VALUES (?, NULL, ?, ?, ?, ?, ?, ?, ?)",
+                        (md5, name, path, size, extension, "converted" if converted_path else "downloaded",
+                         converted_path, now)
+                    )
+            finally:
+                self.connection.execute("COMMIT")
+        return len(entries)
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM books WHERE state != 'downloading'").fetchone()[0]
+
+# Rebuild the manifest from an existing downloads directory
+if __name__ == "__main__":
+    directory = input("Enter the downloads directory to index (default: downloads): ") or "downloads"
+    count = LibraryManifest().rebuild(directory)
+    print(f"Indexed {count} files from {directory}.")
@@ -0,0 +1,188 @@
+import os
+import time
+import sqlite3
+import argparse
+import threading
+from urllib.parse import urlparse
+from libgenbot.resumable_download import md5_from_link
+
+DEFAULT_LINK_HEALTH_PATH = os.environ.get("LIBGENBOT_LINK_HEALTH", "link_health.sqlite3")
+REPROBE_SECONDS = float(os.environ.get("LIBGENBOT_LINK_TTL_HOURS", "6")) * 60 * 60
+MAX_REPROBE_SECONDS = 7 * 24 * 60 * 60
+DEAD_AFTER = 2                 # Failed attempts in a row before a link is skipped
+DEAD_STATUSES = (404, 410)     # The file is gone from that mirror; one answer is enough
+
+_health = None
+_lock = threading.Lock()
+
+# Raised instead of retrying when every mirror of a book failed recently and none is due for a re-probe
+class DeadLinkError(Exception):
+    def __init__(self, link, retry_at):
+        super().__init__(f"Every mirror for {link} failed recently; next re-probe after "
+                         f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(retry_at))}")
+        self.link = link
+        self.retry_at = retry_at
+
+# Function to get the (MD5, mirror host) key of a link; links without an MD5 are their own key
+def link_key(link):
+    return (md5_from_link(link) or link.lower(), urlparse(link).netloc.lower())
+
+# Function to compute how long a dead link is skipped: REPROBE_SECONDS, doubled for every
+# further failure, so links that keep failing their re-probes are tried less and less often
+def reprobe_delay(failures, status):
+    threshold = 1 if status in DEAD_STATUSES else DEAD_AFTER
+    if failures < threshold:
+        return None
+    return min(MAX_REPROBE_SECONDS, REPROBE_SECONDS * 2 ** (failures - threshold))
+
+# Persistent failure record per MD5 and mirror host, so links that failed in earlier runs are
+# skipped until their re-probe time instead of eating a worker's retry budget and backoff sleeps.
+# Safe to share between threads and processes like the library manifest.
+class LinkHealth:
+    def __init__(self, path=DEFAULT_LINK_HEALTH_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS links ("
+            " md5 TEXT NOT NULL, host TEXT NOT NULL, url TEXT NOT NULL, failures INTEGER NOT NULL,"
+            " status INTEGER, error TEXT, last_attempt REAL NOT NULL, last_success REAL,"
+            " PRIMARY KEY (md5, host))"
+        )
+
+    # Function to record a failed attempt; returns the time the link may be tried again, or None
+    def record_failure(self, link, status=None, error=None):
+        md5, host = link_key(link)
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO links (md5, host, url, failures, status, error, last_attempt) VALUES (?, ?, ?, 1, ?, ?, ?)"
+                " ON CONFLICT (md5, host) DO UPDATE SET url = excluded.url, failures = failures + 1,"
+                " status = excluded.status, error = excluded.error, last_attempt = excluded.last_attempt",
+                (md5, host, link, status, (error or "")[:500], now)
+            )
+            failures = self.connection.execute("SELECT failures FROM links WHERE md5 = ? AND host = ?",
+                                               (md5, host)).fetchone()[0]
+        delay = reprobe_delay(failures, status)
+        return now + delay if delay is not None else None
+
+    # Function to record a successful attempt, which clears the link's failures
+    def record_success(self, link):
+        md5, host = link_key(link)
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO links (md5, host, url, failures, status, error, last_attempt, last_success)"
+                " VALUES (?, ?, ?, 0, NULL, NULL, ?, ?)"
+                " ON CONFLICT (md5, host) DO UPDATE SET url = excluded.url, failures = 0, status = NULL,"
+                " error = NULL, last_attempt = excluded.last_attempt, last_success = excluded.last_success",
+                (md5, host, link, now, now)
+            )
+
+    # Function to look up the failure count, last status, last attempt and last success of links
+    def lookup(self, links):
+        keys = [link_key(link) for link in links]
+        with self.lock:
+            rows = {}
+            for md5, host in set(keys):
+                row = self.connection.execute(
+                    "SELECT failures, status, last_attempt, last_success FROM links WHERE md5 = ? AND host = ?",
+                    (md5, host)).fetchone()
+                if row:
+                    rows[(md5, host)] = row
+        return [rows.get(key) for key in keys]
+
+    # Function to order a book's mirror links for an attempt: links without failures first, then by
+    # fewest failures, leaving out dead links whose re-probe time has not come yet. Raises
+    # DeadLinkError when that leaves nothing to try.
+    def rank(self, links):
+        now = time.time()
+        ranked = []
+        retry_at = None
+        for index, (link, row) in enumerate(zip(links, self.lookup(links))):
+            if row is None:
+                ranked.append((0, index, link))
+                continue
+            failures, status, last_attempt, _ = row
+            delay = reprobe_delay(failures, status)
+            if delay is not None and now < last_attempt + delay:
+                retry_at = min(retry_at or last_attempt + delay, last_attempt + delay)
+                continue
+            ranked.append((failures, index, link))
+        if not ranked:
+            raise DeadLinkError(links[0], retry_at)
+        return [link for _, _, link in sorted(ranked)]
+
+    # Function to tell whether a link worked within the last REPROBE_SECONDS and needs no preflight
+    def recently_ok(self, link):
+        row = self.lookup([link])[0]
+        return row is not None and row[0] == 0 and row[3] is not None and time.time() - row[3] < REPROBE_SECONDS
+
+    def stats(self):
+        now = time.time()
+        with self.lock:
+            rows = self.connection.execute("SELECT failures, status, last_attempt FROM links").fetchall()
+        dead = 0
+        for failures, status, last_attempt in rows:
+            delay = reprobe_delay(failures, status)
+            dead += delay is not None and now < last_attempt + delay
+        return {
+            "links": len(rows),
+            "failing": sum(1 for row in rows if row[0]),
+            "dead": dead,
+        }
+
+    # Function to list the links that are failing, most failures first
+    def failing(self):
+        with self.lock:
+            return self.connection.execute(
+                "SELECT url, failures, status, error, last_attempt FROM links WHERE failures > 0"
+                " ORDER BY failures DESC, last_attempt DESC").fetchall()
+
+    # Function to forget failures so the links are tried again on the next run; all links by default
+    def forget(self, links=None):
+        with self.lock:
+            if links is None:
+                self.connection.execute("DELETE FROM links WHERE failures > 0")
+                return
+            for md5, host in map(link_key, links):
+                self.connection.execute("DELETE FROM links WHERE md5 = ? AND host = ?", (md5, host))
+
+# Function to get the process-wide link health store shared by the download front ends
+def get_link_health():
+    global _health
+    with _lock:
+        if _health is None:
+            _health = LinkHealth()
+        return _health
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show or reset the mirror links that failed in earlier runs.")
+    parser.add_argument("--forget", action="store_true", help="Clear all recorded failures")
+    args = parser.parse_args(argv)
+
+    health = LinkHealth()
+    if args.forget:
+        health.forget()
+        print("Cleared all recorded link failures.")
+        return
+
+    now = time.time()
+    for url, failures, status, error, last_attempt in health.failing():
+        delay = reprobe_delay(failures, status)
+        if delay is not None and now < last_attempt + delay:
+            state = f"dead, re-probe in {(last_attempt + delay - now) / 3600:.1f}h"
+        else:
+            state = "suspect" if delay is None else "due for re-probe"
+        print(f"{failures:3d} failures  {status or '-':>4}  {state:28s} {url}  {error or ''}")
+    stats = health.stats()
+    print(f"{stats['links']} links known, {stats['failing']} failing, {stats['dead']} skipped until their re-probe")
+
+if __name__ == "__main__":
+    main()
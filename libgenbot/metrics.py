@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import queue
+import logging
+import threading
+import logging.handlers
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency buckets in seconds, from a cached search hit up to a long Calibre conversion
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# Throughput buckets in bytes/sec, from a crawling mirror up to a fast LAN
+BYTES_PER_SECOND_BUCKETS = (16e3, 64e3, 256e3, 1e6, 4e6, 16e6, 64e6, 256e6)
+
+# Function to turn a labels dict into a stable key
+def label_key(labels):
+    return tuple(sorted(labels.items()))
+
+# Function to format a label key the way Prometheus expects
+def format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{str(value)}"' for name, value in pairs) + "}"
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = label_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            return [(self.name, key, value) for key, value in self.values.items()]
+
+    def snapshot(self):
+        with self.lock:
+            return {format_labels(key) or "total": value for key, value in self.values.items()}
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[label_key(labels)] = value
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.series = {}  # label key -> [bucket counts..., sum, count]
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = label_key(labels)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self):
+        samples = []
+        with self.lock:
+            items = [(key, list(series)) for key, series in self.series.items()]
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                samples.append((self.name + "_bucket", key + (("le", bound),), cumulative))
+            samples.append((self.name + "_bucket", key + (("le", "+Inf"),), series[-1]))
+            samples.append((self.name + "_sum", key, series[-2]))
+            samples.append((self.name + "_count", key, series[-1]))
+        return samples
+
+    # Function to estimate a quantile from the bucket counts (upper bound of the matching bucket)
+    def quantile(self, q, series):
+        target = q * series[-1]
+        cumulative = 0
+        for bound, count in zip(self.buckets, series):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        with self.lock:
+            items = [(key, list(series)) for key, series in self.series.items()]
+        return {
+            format_labels(key) or "total": {
+                "count": series[-1],
+                "sum": round(series[-2], 6),
+                "mean": round(series[-2] / series[-1], 6) if series[-1] else 0.0,
+                "p50": self.quantile(0.5, series),
+                "p95": self.quantile(0.95, series),
+            }
+            for key, series in items
+        }
+
+# Process-wide collection of metrics
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def register(self, cls, name, help_text, *args):
+        with self.lock:
+            if name not in self.metrics:
+                self.metrics[name] = cls(name, help_text, *args)
+            return self.metrics[name]
+
+    def counter(self, name, help_text=""):
+        return self.register(Counter, name, help_text)
+
+    def gauge(self, name, help_text=""):
+        return self.register(Gauge, name, help_text)
+
+    def histogram(self, name, help_text="", buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram, name, help_text, buckets)
+
+    # Function to render every metric in the Prometheus text exposition format
+    def render_prometheus(self):
+        lines = []
+        with self.lock:
+            metrics = list(self.metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, value in metric.samples():
+                lines.append(f"{name}{format_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return {"time": round(time.time(), 3), "metrics": {metric.name: metric.snapshot() for metric in metrics}}
+
+registry = Registry()
+
+# The metrics the pipeline stages report into
+STAGE_SECONDS = registry.histogram("libgenbot_stage_seconds", "Latency of each stage (search, parse, filter, download, convert, extract)")
+STAGE_ERRORS = registry.counter("libgenbot_stage_errors_total", "Failures per stage")
+ROWS_PARSED = registry.counter("libgenbot_rows_parsed_total", "Result rows extracted from search pages")
+DOWNLOAD_BYTES = registry.counter("libgenbot_download_bytes_total", "Bytes received by the downloader")
+DOWNLOAD_RATE = registry.histogram("libgenbot_download_bytes_per_second", "Transfer rate of each download",
+                                   BYTES_PER_SECOND_BUCKETS)
+QUEUE_DEPTH = registry.gauge("libgenbot_queue_depth", "Items waiting between pipeline stages")
+RETRIES = registry.counter("libgenbot_retries_total", "Download retries per mirror host and reason")
+CACHE_REQUESTS = registry.counter("libgenbot_cache_requests_total", "Cache lookups by cache and result")
+PAGES_EXTRACTED = registry.counter("libgenbot_pages_extracted_total", "Document pages turned into text, by source (parsed or cache)")
+
+# Context manager that times a stage into STAGE_SECONDS and counts its failures
+@contextmanager
+def timed(stage):
+    start_time = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start_time, stage=stage)
+
+# Formats log records as one JSON object per line, including any "fields" passed via extra=
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        event = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        event.update(getattr(record, "fields", {}))
+        return json.dumps(event, ensure_ascii=False)
+
+_listener = None
+_logging_lock = threading.Lock()
+
+# Function to get the structured event logger. Records go through an in-memory queue and are written
+# by a background thread, so the worker that logs never waits on disk; the file is opened once.
+def get_logger(path=os.environ.get("LIBGENBOT_EVENT_LOG", "libgenbot_events.jsonl")):
+    global _listener
+    logger = logging.getLogger("libgenbot")
+    with _logging_lock:
+        if _listener is None:
+            records = queue.SimpleQueue()
+            file_handler = logging.FileHandler(path, encoding='utf-8', delay=True)
+            file_handler.setFormatter(JsonFormatter())
+            _listener = logging.handlers.QueueListener(records, file_handler)
+            _listener.start()
+            logger.addHandler(logging.handlers.QueueHandler(records))
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+    return logger
+
+# Function to log one structured event
+def log_event(message, level=logging.INFO, **fields):
+    get_logger().log(level, message, extra={"fields": fields})
+
+# Function to flush queued log records, e.g. before the process exits
+def flush_logs():
+    if _listener is not None:
+        _listener.stop()
+        _listener.start()
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] == "/metrics":
+            body = registry.render_prometheus().encode()
+            content_type = "text/plain; version=0.0.4"
+        elif self.path.split("?")[0] == "/metrics.json":
+            body = json.dumps(registry.snapshot()).encode()
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+# Function to serve /metrics (Prometheus) and /metrics.json from a background thread
+def start_metrics_server(port, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# Function to write a JSON snapshot of all metrics every `interval` seconds
+def start_snapshot_writer(path, interval=10.0):
+    def write_snapshots():
+        while True:
+            time.sleep(interval)
+            write_snapshot(path)
+
+    threading.Thread(target=write_snapshots, daemon=True).start()
+
+# Function to write one JSON snapshot, replacing the previous one atomically
+def write_snapshot(path):
+    temporary_path = path + ".tmp"
+    with open(temporary_path, 'w', encoding='utf-8') as f:
+        json.dump(registry.snapshot(), f, indent=2)
+    os.replace(temporary_path, path)
+
+# Function to turn on the exporters named by $LIBGENBOT_METRICS_PORT and $LIBGENBOT_METRICS_SNAPSHOT
+def start_from_env():
+    if os.environ.get("LIBGENBOT_METRICS_PORT"):
+        start_metrics_server(int(os.environ["LIBGENBOT_METRICS_PORT"]))
+    if os.environ.get("LIBGENBOT_METRICS_SNAPSHOT"):
+        start_snapshot_writer(os.environ["LIBGENBOT_METRICS_SNAPSHOT"],
+                              float(os.environ.get("LIBGENBOT_METRICS_INTERVAL", "10")))
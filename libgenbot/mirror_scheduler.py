@@ -0,0 +1,262 @@
+import time
+import logging
+import random
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from libgenbot.resumable_download import md5_from_link
+from libgenbot.http_session import get_session
+from libgenbot.link_health import DeadLinkError
+from libgenbot.metrics import RETRIES, log_event
+
+# Alternate mirrors that serve the same file by MD5, tried in order after the original link
+MIRROR_TEMPLATES = [
+    "http://library.lol/main/{md5}",
+    "https://libgen.li/ads.php?md5={md5}",
+    "https://libgen.rocks/ads.php?md5={md5}",
+]
+THROTTLE_STATUSES = (429, 503)
+INCONCLUSIVE_STATUSES = THROTTLE_STATUSES + (405, 501)  # Busy, or no HEAD support: says nothing about the file
+
+# Function to compute an exponential backoff delay with full jitter
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+# Function to list the original link followed by its alternate mirrors for the same MD5
+def mirror_links(link, templates=MIRROR_TEMPLATES):
+    md5 = md5_from_link(link)
+    links = [link]
+    if md5:
+        for template in templates:
+            alternate = template.format(md5=md5.upper())
+            if alternate.lower() != link.lower():
+                links.append(alternate)
+    return links
+
+# Function to get the HTTP status of a failed request, if the exception carries one
+def status_of(exc):
+    response = getattr(exc, 'response', None)
+    return getattr(response, 'status_code', None)
+
+# Token bucket limiting how often requests may start against one host
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    # Stop handing out tokens for a while, e.g. to honour a Retry-After header
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+# Concurrency limit that grows additively while transfers succeed and halves on errors (AIMD)
+class AIMDLimiter:
+    def __init__(self, initial=2, minimum=1, maximum=8, decrease=0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self, ok):
+        with self.condition:
+            self.in_flight -= 1
+            if ok:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)  # +1 per window of successes
+            else:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+            self.condition.notify_all()
+
+# Per-host rate limit, concurrency limit and counters
+class HostController:
+    def __init__(self, rate, burst, max_concurrency):
+        self.bucket = TokenBucket(rate, burst)
+        self.limiter = AIMDLimiter(maximum=max_concurrency)
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "successes": 0, "failures": 0, "throttled": 0}
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def snapshot(self):
+        with self.lock:
+            counters = dict(self.counters)
+        counters["concurrency_limit"] = round(self.limiter.limit, 2)
+        counters["in_flight"] = self.limiter.in_flight
+        return counters
+
+# Runs downloads with exponential backoff and jitter, a token bucket and an AIMD
+# concurrency limit per mirror host, failing over to alternate mirrors for the same MD5.
+# With a LinkHealth store, mirrors that failed in earlier runs are tried last or skipped.
+class MirrorScheduler:
+    def __init__(self, rate=2.0, burst=4, max_concurrency=8, backoff_base=1.0, backoff_cap=30.0,
+                 mirrors=MIRROR_TEMPLATES, health=None):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.mirrors = mirrors
+        self.health = health
+        self.hosts = {}
+        self.lock = threading.Lock()
+        self.retries = 0
+        self.failovers = 0
+        self.skipped_dead = 0
+        self.probes = 0
+
+    def host(self, link):
+        name = urlparse(link).netloc
+        with self.lock:
+            if name not in self.hosts:
+                self.hosts[name] = HostController(self.rate, self.burst, self.max_concurrency)
+            return self.hosts[name]
+
+    # Function to call fetch(link) until it succeeds or retries run out; raises the last error,
+    # or DeadLinkError without any attempt when every mirror is known to be failing
+    def fetch(self, link, fetch, retries=3):
+        links = mirror_links(link, self.mirrors)
+        if self.health is not None:
+            try:
+                links = self.health.rank(links)
+            except DeadLinkError:
+                with self.lock:
+                    self.skipped_dead += 1
+                raise
+        mirror = 0
+        last_error = None
+        retry_at = None  # Earliest re-probe time of the links that died during this fetch
+
+        for attempt in range(retries):
+            url = links[mirror % len(links)]
+            host = self.host(url)
+            host.bucket.acquire()
+            host.limiter.acquire()
+            host.count("requests")
+            try:
+                result = fetch(url)
+            except Exception as e:
+                host.limiter.release(ok=False)
+                last_error = e
+                status = status_of(e)
+                print(f"Error fetching {url}: {e}")
+
+                reason = "throttled" if status in THROTTLE_STATUSES else "error"
+                RETRIES.inc(host=urlparse(url).netloc, reason=reason)
+                log_event("download_attempt_failed", level=logging.WARNING, url=url, status=status, attempt=attempt + 1,
+                          error=str(e))
+
+                if status in THROTTLE_STATUSES:
+                    host.count("throttled")
+                    retry_after = getattr(e.response, 'headers', {}).get("Retry-After", "")
+                    if retry_after.isdigit():
+                        host.bucket.pause(int(retry_after))
+                else:
+                    host.count("failures")
+                    # A link that is now dead (e.g. a 404) leaves the rotation; the next mirror takes its place
+                    dead_until = self.health.record_failure(url, status, str(e)) if self.health is not None else None
+                    if dead_until is not None:
+                        retry_at = min(retry_at or dead_until, dead_until)
+                        links.remove(url)
+                        if not links:
+                            with self.lock:
+                                self.skipped_dead += 1
+                            raise DeadLinkError(link, retry_at) from e
+                        mirror -= 1
+
+                if attempt + 1 < retries:
+                    with self.lock:
+                        self.retries += 1
+                        if len(links) > 1:
+                            self.failovers += 1
+                    mirror += 1  # Try the next mirror for the same MD5
+                    delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                    print(f"Retrying on {links[mirror % len(links)]} in {delay:.1f}s... ({attempt + 1}/{retries})")
+                    time.sleep(delay)
+                continue
+
+            host.limiter.release(ok=True)
+            host.count("successes")
+            if self.health is not None:
+                self.health.record_success(url)
+            return result
+
+        raise last_error
+
+    # Function to check one mirror link with a HEAD request; returns False (and records the failure)
+    # when it is unreachable or answers with an error, None when the answer says nothing. A page
+    # that answers is not recorded as a success: only a finished download clears a link's failures.
+    def probe(self, url, session, timeout):
+        with self.lock:
+            self.probes += 1
+        try:
+            response = session.head(url, allow_redirects=True, timeout=timeout)
+        except requests.RequestException as e:
+            self.health.record_failure(url, None, str(e))
+            return False
+        if response.status_code in INCONCLUSIVE_STATUSES:
+            return None
+        if response.status_code >= 400:
+            self.health.record_failure(url, response.status_code, f"HEAD returned {response.status_code}")
+            return False
+        return True
+
+    # Function to check a book's mirrors before it is queued, best-ranked first, stopping at the
+    # first that works; links that worked recently are trusted without a request
+    def preflight_link(self, link, session, timeout):
+        try:
+            links = self.health.rank(mirror_links(link, self.mirrors))
+        except DeadLinkError:
+            return False
+        for url in links:
+            if self.health.recently_ok(url) or self.probe(url, session, timeout):
+                return True
+        try:
+            return bool(self.health.rank(links))
+        except DeadLinkError:
+            return False
+
+    # Function to HEAD-probe the links of a batch concurrently before the download queue starts,
+    # so dead mirrors are found in one cheap round trip instead of by a worker's retries and
+    # backoff sleeps. Returns the links that still have a mirror worth trying.
+    def preflight(self, links, workers=8, timeout=10, session=None):
+        if self.health is None:
+            return list(links)
+        session = session or get_session()
+        links = list(links)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preflight") as executor:
+            alive = list(executor.map(lambda link: self.preflight_link(link, session, timeout), links))
+        return [link for link, ok in zip(links, alive) if ok]
+
+    def metrics(self):
+        with self.lock:
+            hosts = dict(self.hosts)
+            summary = {"retries": self.retries, "failovers": self.failovers, "skipped_dead": self.skipped_dead,
+                       "probes": self.probes}
+        summary["hosts"] = {name: host.snapshot() for name, host in hosts.items()}
+        return summary
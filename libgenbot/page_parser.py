@@ -0,0 +1,92 @@
+import os
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from bs4 import BeautifulSoup, SoupStrainer
+from libgenbot.metrics import timed, ROWS_PARSED
+
+try:
+    import lxml.html
+    DEFAULT_BACKEND = "lxml"
+except ImportError:
+    lxml = None
+    DEFAULT_BACKEND = "strainer"
+
+# Only keep <table> subtrees when building the soup; the rest of the page is never parsed into tags
+ONLY_TABLES = SoupStrainer('table')
+
+# Function to build a book_info dict from the cell texts and mirror link of one row
+def make_book_info(texts, link):
+    return {
+        "id": texts[0],
+        "author": texts[1],
+        "name": texts[2],
+        "publisher": texts[3],
+        "year": texts[4],
+        "language": texts[6],
+        "size": texts[7],
+        "format": texts[8],
+        "link": link
+    }
+
+# Function to extract rows from an already built BeautifulSoup tree
+def books_from_soup(soup):
+    table = soup.find_all('table')[2]  # The third table contains search results
+    rows = table.find_all('tr')[1:]  # Skip the header row
+
+    books = []
+    for row in rows:
+        columns = row.find_all('td')
+        if len(columns) >= 9:
+            texts = [column.get_text(strip=True) for column in columns[:9]]
+            books.append(make_book_info(texts, columns[9].find_all('a')[0]['href']))
+    return books
+
+# Function to parse a page by building the full tree (the original get_books behaviour)
+def parse_full_tree(content):
+    return books_from_soup(BeautifulSoup(content, 'html.parser'))
+
+# Function to parse a page keeping only the tables in the tree
+def parse_tables_only(content):
+    return books_from_soup(BeautifulSoup(content, 'html.parser', parse_only=ONLY_TABLES))
+
+# Function to parse a page with lxml's C parser and XPath
+def parse_lxml(content):
+    if lxml is None:
+        raise ImportError("The lxml parser backend needs the lxml package installed.")
+
+    document = lxml.html.fromstring(content)
+    table = document.xpath('//table')[2]  # The third table contains search results
+    rows = table.xpath('.//tr')[1:]  # Skip the header row
+
+    books = []
+    for row in rows:
+        columns = row.xpath('.//td')
+        if len(columns) >= 9:
+            # Same as get_text(strip=True): strip every text node and drop the empty ones
+            texts = ["".join(text.strip() for text in column.xpath('.//text()')) for column in columns[:9]]
+            books.append(make_book_info(texts, columns[9].xpath('.//a')[0].attrib['href']))
+    return books
+
+PARSERS = {
+    "html.parser": parse_full_tree,
+    "strainer": parse_tables_only,
+    "lxml": parse_lxml,
+}
+
+# Function to extract the book metadata rows from a search results page
+def parse_books_page(content, backend=DEFAULT_BACKEND):
+    if backend not in PARSERS:
+        raise ValueError(f"Unknown parser backend: {backend}. Choose from {', '.join(PARSERS)}.")
+    with timed("parse"):
+        books = PARSERS[backend](content)
+    ROWS_PARSED.inc(len(books), backend=backend)
+    return books
+
+# Function to parse many pages at once, optionally spread over a process pool
+def parse_pages(pages, backend=DEFAULT_BACKEND, processes=None):
+    if processes == 1:
+        return [parse_books_page(content, backend) for content in pages]
+
+    processes = processes or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(parse_books_page, pages, repeat(backend)))
@@ -0,0 +1,72 @@
+import os
+import time
+import shlex
+import shutil
+import subprocess
+from libgenbot.resumable_download import hash_existing
+from libgenbot.metrics import timed, STAGE_ERRORS
+
+MACOS_EBOOK_CONVERT = "/Applications/calibre.app/Contents/MacOS/ebook-convert"
+CONVERTIBLE_FORMATS = ['mobi', 'epub', 'djvu', 'docx']
+
+# Raised when Calibre fails or writes no PDF; the message carries its error output
+class ConversionError(Exception):
+    pass
+
+# Function to find Calibre's ebook-convert: $EBOOK_CONVERT, then PATH, then the macOS app bundle.
+# $EBOOK_CONVERT is a command prefix, so "python3 stub_convert.py" works too.
+def find_converter():
+    return os.environ.get("EBOOK_CONVERT") or shutil.which("ebook-convert") or MACOS_EBOOK_CONVERT
+
+# Function to turn the converter command prefix into an argument list for subprocess, so no shell
+# is started per conversion. An existing path is one argument even if it contains spaces.
+def converter_command(converter):
+    if os.path.exists(converter):
+        return [converter]
+    return shlex.split(converter, posix=os.name != 'nt')
+
+# Function to convert files to PDF using Calibre. An up-to-date PDF is left alone, and with a
+# cache a source converted before (under any name) is served from it instead of running Calibre.
+# `options` are extra ebook-convert arguments; they are part of the cache key.
+# Raises ConversionError when the conversion fails.
+def convert_to_pdf(input_file, output_pdf, converter=None, cache=None, options=()):
+    print(f"Converting {input_file} to {output_pdf}...")
+    extension = input_file.split('.')[-1].lower()
+    if extension not in CONVERTIBLE_FORMATS:
+        print(f"No conversion required for {input_file}, already in PDF format.")
+        return output_pdf
+
+    # Conversions are renamed into place when complete, so an existing PDF is a finished one
+    if os.path.exists(output_pdf) and os.path.getmtime(output_pdf) >= os.path.getmtime(input_file):
+        print(f"{output_pdf} is already converted.")
+        return output_pdf
+
+    digest = hash_existing(input_file).hexdigest() if cache is not None else None
+    if cache is not None and cache.fetch(digest, options, output_pdf):
+        print(f"Served {output_pdf} from the conversion cache")
+        return output_pdf
+
+    # Calibre picks the output format from the extension, so the temporary name ends in .pdf too
+    temporary = os.path.splitext(output_pdf)[0] + ".converting.pdf"
+    command = converter_command(converter or find_converter()) + [input_file, temporary] + list(options)
+    start_time = time.perf_counter()
+    with timed("convert"):
+        try:
+            result = subprocess.run(command, capture_output=True, text=True)
+            error = result.stderr.strip() if result.returncode else None
+        except OSError as e:
+            error = f"Could not start {command[0]}: {e}"
+    seconds = time.perf_counter() - start_time
+
+    if error is None and os.path.exists(temporary):
+        os.replace(temporary, output_pdf)
+        print(f"Converted {input_file} to PDF as {output_pdf}")
+        if cache is not None:
+            cache.store(digest, options, output_pdf, seconds)
+    else:
+        STAGE_ERRORS.inc(stage="convert")
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        print(f"Error in conversion: {error or 'no output written'}")
+        raise ConversionError(f"Converting {input_file} failed: {error or 'no output written'}")
+    return output_pdf
@@ -0,0 +1,88 @@
+import os
+import re
+import time
+import hashlib
+from urllib.parse import urljoin
+from libgenbot.http_session import get_session
+from libgenbot.metrics import timed, DOWNLOAD_BYTES, DOWNLOAD_RATE
+
+CHUNK_SIZE = 64 * 1024
+MD5_PATTERN = re.compile(r'([0-9a-fA-F]{32})/?$')
+
+# Raised when a finished download does not match the MD5 from its mirror link
+class DownloadIntegrityError(Exception):
+    pass
+
+# Function to pull the MD5 out of a mirror link such as http://library.lol/main/<MD5>
+def md5_from_link(link):
+    match = MD5_PATTERN.search(link.split('?')[0]) or re.search(r'md5=([0-9a-fA-F]{32})', link)
+    return match.group(1).lower() if match else None
+
+# Function to find the direct file URL behind a mirror page (the "GET" link)
+def resolve_download_url(link, session=None, timeout=30):
+    session = session or get_session()
+    with session.get(link, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        if not response.headers.get("Content-Type", "").startswith("text/html"):
+            return link  # The link already points at the file itself
+
+        from bs4 import BeautifulSoup  # Imported on first use, so starting a run does not pay for it
+        soup = BeautifulSoup(response.content, 'html.parser')
+        anchor = soup.find('a', string='GET') or soup.select_one('#download a')
+        if anchor is None:
+            raise Exception(f"No download link found on mirror page {link}")
+        return urljoin(response.url, anchor['href'])
+
+# Function to hash what is already in a partial file so the MD5 can be finished while streaming
+def hash_existing(path):
+    md5 = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            md5.update(chunk)
+    return md5
+
+# Function to download url into output_path via a .part file, resuming with a Range request
+# when a previous attempt left one behind, then verifying the MD5 and renaming into place
+def download_file(url, output_path, expected_md5=None, session=None, timeout=30):
+    session = session or get_session()
+    part_path = output_path + ".part"
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    md5 = None
+    received = 0
+    start_time = time.perf_counter()
+
+    with timed("download"):
+        try:
+            with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                # 416 means the .part file already holds the whole body
+                if response.status_code != 416:
+                    response.raise_for_status()
+                    if offset and response.status_code != 206:
+                        offset = 0  # Server ignored the Range header; start over
+
+                    md5 = hash_existing(part_path) if offset else hashlib.md5()
+                    with open(part_path, 'ab' if offset else 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            f.write(chunk)
+                            md5.update(chunk)
+                            received += len(chunk)
+        finally:
+            DOWNLOAD_BYTES.inc(received)
+            if received:
+                DOWNLOAD_RATE.observe(received / (time.perf_counter() - start_time))
+
+        if expected_md5:
+            actual_md5 = (md5 or hash_existing(part_path)).hexdigest()
+            if actual_md5 != expected_md5.lower():
+                os.remove(part_path)  # Corrupt data; the next attempt starts from zero
+                raise DownloadIntegrityError(f"MD5 mismatch for {output_path}: expected {expected_md5}, got {actual_md5}")
+
+        os.replace(part_path, output_path)  # Atomic on the same filesystem
+    return True
+
+# Function to download a book from its mirror link; a failed attempt leaves a .part file
+# that the next call resumes from
+def fetch_book(link, output_path, session=None):
+    url = resolve_download_url(link, session)
+    return download_file(url, output_path, expected_md5=md5_from_link(link), session=session)
@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from libgenbot.metrics import timed, CACHE_REQUESTS
+
+DEFAULT_CACHE_PATH = os.environ.get("LIBGENBOT_SEARCH_CACHE", "search_cache.sqlite3")
+DEFAULT_TTL = 24 * 60 * 60            # Search results go stale after a day
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024  # Size budget before least recently used entries are evicted
+
+_scraper = None
+_lock = threading.Lock()
+
+# Function to normalize a query so "Hands-On  ML", "hands-on+ml" and "Hands-On ML " share one entry
+def normalize_query(query):
+    return " ".join(query.replace("+", " ").lower().split())
+
+# On-disk SQLite cache of search results keyed by normalized query, page and result size
+class SearchCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # One connection shared by the Streamlit/Gradio worker threads, serialized by self.lock;
+        # other processes are kept safe by SQLite's own file locking
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " query TEXT NOT NULL, page INTEGER NOT NULL, res TEXT NOT NULL,"
+            " data TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL,"
+            " PRIMARY KEY (query, page, res))"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+
+    # Function to look up cached results; returns None on a miss or an expired entry
+    def get(self, query, page=1, res="default"):
+        key = (normalize_query(query), page, str(res))
+        now = time.time()
+
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT data, created FROM results WHERE query = ? AND page = ? AND res = ?", key
+            ).fetchone()
+
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self.connection.execute("DELETE FROM results WHERE query = ? AND page = ? AND res = ?", key)
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache="search", result="miss")
+                return None
+
+            self.connection.execute(
+                "UPDATE results SET accessed = ? WHERE query = ? AND page = ? AND res = ?", (now,) + key
+            )
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache="search", result="hit")
+        return json.loads(row[0])
+
+    # Function to store results and evict least recently used entries over the size budget
+    def put(self, query, results, page=1, res="default"):
+        data = json.dumps(results)
+        now = time.time()
+
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO results (query, page, res, data, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (normalize_query(query), page, str(res), data, len(data), now, now)
+            )
+            self.evict()
+
+    # Function to drop expired entries, then the least recently used ones until under max_bytes
+    def evict(self):
+        self.connection.execute("DELETE FROM results WHERE created < ?", (time.time() - self.ttl,))
+        total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for query, page, res, size in self.connection.execute(
+            "SELECT query, page, res, size FROM results ORDER BY accessed"
+        ).fetchall():
+            self.connection.execute("DELETE FROM results WHERE query = ? AND page = ? AND res = ?", (query, page, res))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    # Function to report hit/miss counters for this process along with the cache size
+    def stats(self):
+        with self.lock:
+            entries, size = self.connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM results")
+
+# Wrapper around libgen's Scraper that serves repeat searches from the shared cache. Without a
+# scraper, libgen's is imported and built on the first search the cache cannot answer.
+class CachedScraper:
+    def __init__(self, scraper=None, cache=None):
+        self.scraper = scraper
+        self.cache = cache or SearchCache()
+        self.lock = threading.Lock()
+
+    def load_scraper(self):
+        with self.lock:
+            if self.scraper is None:
+                from libgen.scraper import Scraper
+                self.scraper = Scraper()
+            return self.scraper
+
+    def get_data(self, query):
+        books = self.cache.get(query)
+        if books is None:
+            with timed("search"):
+                books = self.load_scraper().get_data(query)
+            if books:
+                self.cache.put(query, books)
+        return books
+
+    # Everything else (download, ...) goes straight to the wrapped scraper
+    def __getattr__(self, name):
+        if name in ("scraper", "cache", "lock"):  # Not set yet, e.g. while unpickling
+            raise AttributeError(name)
+        return getattr(self.load_scraper(), name)
+
+# Function to get the process-wide cached libgen scraper shared by the front ends
+def get_scraper():
+    global _scraper
+    with _lock:
+        if _scraper is None:
+            _scraper = CachedScraper()
+        return _scraper
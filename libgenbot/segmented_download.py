@@ -0,0 +1,211 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from libgenbot.http_session import get_session
+from libgenbot.resumable_download import (download_file, resolve_download_url, md5_from_link, hash_existing,
+                                DownloadIntegrityError, CHUNK_SIZE)
+from libgenbot.book_export import parse_size
+from libgenbot.metrics import timed, DOWNLOAD_BYTES, DOWNLOAD_RATE
+
+SEGMENT_SIZE = 4 * 1024 * 1024          # Bytes per Range request of a segmented download
+MIN_SEGMENTED_SIZE = 4 * SEGMENT_SIZE   # Smaller books are fetched over a single connection
+
+# Function to order books for a fixed set of download workers, largest first (LPT scheduling):
+# a big file starts while there is still other work to overlap with, and the small ones fill in
+# around it instead of all finishing before it. Books without a size count as the median size.
+def order_by_size(books):
+    books = list(books)
+    sizes = [parse_size(book.get('size')) for book in books]
+    known = sorted(size for size in sizes if size is not None)
+    median = known[len(known) // 2] if known else 0
+    order = sorted(range(len(books)), key=lambda index: -(sizes[index] if sizes[index] is not None else median))
+    return [books[index] for index in order]
+
+# Function to check whether a book is big enough to be split into segments
+def is_large(book):
+    return (parse_size(book.get('size')) or 0) >= MIN_SEGMENTED_SIZE
+
+# Function to cut [0, total) into inclusive (start, end) byte ranges
+def plan_segments(total, segment_size=SEGMENT_SIZE):
+    return [(start, min(start + segment_size, total) - 1) for start in range(0, total, segment_size)]
+
+# Function to learn a file's size and whether the server honours Range requests; None if it does not
+def probe_size(url, session, timeout=30):
+    with session.get(url, headers={"Range": "bytes=0-0"}, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        content_range = response.headers.get("Content-Range", "")
+        if response.status_code != 206 or "/" not in content_range:
+            return None
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+
+# One file fetched as parallel Range segments, each written straight to its offset in a
+# preallocated .part file, so nothing is reassembled or copied afterwards. Finished segments are
+# recorded next to the .part file, so a retry only fetches the ones still missing.
+class SegmentedDownload:
+    def __init__(self, url, part_path, total, segment_size, done, session, timeout=30):
+        self.url = url
+        self.part_path = part_path
+        self.state_path = part_path + ".segments"
+        self.total = total
+        self.segment_size = segment_size
+        self.session = session
+        self.timeout = timeout
+        self.done = {tuple(segment) for segment in done}
+        self.pending = deque(segment for segment in plan_segments(total, segment_size) if segment not in self.done)
+        self.in_flight = 0
+        self.received = 0
+        self.error = None
+        self.condition = threading.Condition()
+
+    def remaining_bytes(self):
+        with self.condition:
+            return sum(end - start + 1 for start, end in self.pending)
+
+    # Function to take the next segment; None once every segment is taken or a segment failed
+    def claim(self):
+        with self.condition:
+            if self.error is not None or not self.pending:
+                return None
+            self.in_flight += 1
+            return self.pending.popleft()
+
+    def save(self):
+        temporary = self.state_path + ".tmp"
+        with open(temporary, 'w') as f:
+            json.dump({"total": self.total, "segment_size": self.segment_size, "done": sorted(self.done)}, f)
+        os.replace(temporary, self.state_path)
+
+    # Function to fetch one segment into place; a failure stops the download after the segments in flight
+    def fetch(self, segment):
+        start, end = segment
+        received = 0
+        try:
+            headers = {"Range": f"bytes={start}-{end}"}
+            with self.session.get(self.url, headers=headers, stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                if response.status_code != 206 or not response.headers.get("Content-Range", "").startswith(f"bytes {start}-"):
+                    raise IOError(f"Server ignored the range of segment {start}-{end}")
+                with open(self.part_path, 'r+b') as f:
+                    f.seek(start)
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        chunk = chunk[:end + 1 - start - received]
+                        f.write(chunk)
+                        received += len(chunk)
+                        if start + received > end:
+                            break
+            if start + received <= end:
+                raise IOError(f"Segment {start}-{end} ended after {received} bytes")
+        except Exception as e:
+            with self.condition:
+                self.error = self.error or e
+                self.in_flight -= 1
+                self.condition.notify_all()
+            return False
+        finally:
+            DOWNLOAD_BYTES.inc(received)
+
+        with self.condition:
+            self.received += received
+            self.done.add(segment)
+            self.in_flight -= 1
+            self.save()
+            self.condition.notify_all()
+        return True
+
+    # Function to fetch segments until none are left to take
+    def work(self):
+        segment = self.claim()
+        while segment is not None:
+            self.fetch(segment)
+            segment = self.claim()
+
+    # Function to wait for segments other threads are still fetching; raises the first failure
+    def wait(self):
+        with self.condition:
+            while self.in_flight:
+                self.condition.wait()
+            if self.error is not None:
+                raise self.error
+
+# The segmented downloads in progress, so download workers that run out of books can help with
+# the remaining segments of large files instead of sitting idle
+class SegmentPool:
+    def __init__(self):
+        self.downloads = []
+        self.lock = threading.Lock()
+
+    def register(self, download):
+        with self.lock:
+            self.downloads.append(download)
+
+    def unregister(self, download):
+        with self.lock:
+            self.downloads.remove(download)
+
+    # Function to fetch one segment of the running download with the most bytes left;
+    # returns False when there is nothing to help with
+    def help(self):
+        with self.lock:
+            downloads = list(self.downloads)
+        for download in sorted(downloads, key=lambda download: -download.remaining_bytes()):
+            segment = download.claim()
+            if segment is not None:
+                download.fetch(segment)
+                return True
+        return False
+
+# Function to download url into output_path as parallel Range segments, with the same .part,
+# resume and MD5 guarantees as download_file. Servers without Range support, files no bigger
+# than one segment, and .part files left by a single-stream attempt fall back to download_file.
+def download_segmented(url, output_path, expected_md5=None, session=None, timeout=30, pool=None,
+                       segment_size=SEGMENT_SIZE):
+    session = session or get_session()
+    part_path = output_path + ".part"
+    state_path = part_path + ".segments"
+
+    if os.path.exists(state_path) and os.path.exists(part_path):
+        with open(state_path) as f:
+            state = json.load(f)
+    elif os.path.exists(part_path):
+        return download_file(url, output_path, expected_md5, session, timeout)
+    else:
+        total = probe_size(url, session, timeout)
+        if total is None or total <= segment_size:
+            return download_file(url, output_path, expected_md5, session, timeout)
+        with open(part_path, 'wb') as f:
+            f.truncate(total)  # Sparse on most filesystems; segments fill it in place
+        state = {"total": total, "segment_size": segment_size, "done": []}
+
+    download = SegmentedDownload(url, part_path, state["total"], state["segment_size"], state["done"], session, timeout)
+    download.save()
+    start_time = time.perf_counter()
+    with timed("download"):
+        if pool is not None:
+            pool.register(download)
+        try:
+            download.work()
+            download.wait()
+        finally:
+            if pool is not None:
+                pool.unregister(download)
+            if download.received:
+                DOWNLOAD_RATE.observe(download.received / (time.perf_counter() - start_time))
+
+        if expected_md5:
+            actual_md5 = hash_existing(part_path).hexdigest()
+            if actual_md5 != expected_md5.lower():
+                os.remove(part_path)  # Corrupt data; the next attempt starts from zero
+                os.remove(state_path)
+                raise DownloadIntegrityError(f"MD5 mismatch for {output_path}: expected {expected_md5}, got {actual_md5}")
+
+        os.replace(part_path, output_path)
+        os.remove(state_path)
+    return True
+
+# Function to download a book from its mirror link in segments (fetch_book's segmented twin)
+def fetch_book_segmented(link, output_path, pool=None, session=None):
+    url = resolve_download_url(link, session)
+    return download_segmented(url, output_path, expected_md5=md5_from_link(link), session=session, pool=pool)
@@ -0,0 +1,256 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+import numpy as np
+from libgenbot.resumable_download import hash_existing
+from libgenbot.text_extraction import TextExtractor, TextCache, iter_documents
+from libgenbot.embeddings import get_embedding_service, text_windows
+from libgenbot.metrics import timed
+
+DEFAULT_INDEX_DIR = os.environ.get("LIBGENBOT_SEMANTIC_INDEX", "semantic_index")
+BLOCK_ROWS = 65536        # Rows scored per matmul in exact mode, bounding the float32 scratch space
+MIN_IVF_ROWS = 20000      # Below this exact search is already fast enough
+RETRAIN_GROWTH = 4        # Retrain the coarse quantizer once the index is this many times its training size
+DEFAULT_NPROBE = 8
+
+# Function to scale rows to unit length so a dot product is the cosine similarity
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+# Function to merge candidate (scores, ids) of shape (queries, n) down to the best k, best first
+def top_k(scores, ids, k):
+    if scores.shape[1] > k:
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, best, axis=1)
+        ids = np.take_along_axis(ids, best, axis=1)
+    order = np.argsort(-scores, axis=1, kind='stable')
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+# Function to cluster unit vectors with spherical k-means; returns unit centroids
+def train_centroids(vectors, clusters, iterations=10, seed=0):
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        assignments = assign(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors.astype(np.float32))
+        empty = np.bincount(assignments, minlength=clusters) == 0
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]  # Restart empty clusters
+        centroids = normalize(sums)
+    return centroids
+
+# Function to get the nearest centroid of every vector, a block at a time
+def assign(vectors, centroids):
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + BLOCK_ROWS], dtype=np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+# Append-only store of unit vectors in float16 (half the memory of float32, plenty for cosine
+# ranking) with two search modes: exact blocked matmul over every row, and an IVF index that
+# clusters the rows and scores only the `nprobe` clusters nearest the query.
+class VectorIndex:
+    def __init__(self, directory, dimension):
+        self.directory = directory
+        self.dimension = dimension
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f16")
+        self.centroids_path = os.path.join(directory, "centroids.npy")
+        open(self.vectors_path, 'ab').close()
+        self.vectors = None
+        self.centroids = np.load(self.centroids_path) if os.path.exists(self.centroids_path) else None
+        # Training picks about sqrt(rows) clusters, so the cluster count tells the size it was trained at
+        self.trained_rows = 0 if self.centroids is None else len(self.centroids) ** 2
+        self.lists = None  # IVF lists, rebuilt after rows are added
+
+    def __len__(self):
+        return os.path.getsize(self.vectors_path) // (2 * self.dimension)
+
+    # Function to drop rows past `rows`, e.g. vectors of a document whose metadata never got committed
+    def truncate(self, rows):
+        with self.lock:
+            if len(self) != rows:
+                with open(self.vectors_path, 'r+b') as f:
+                    f.truncate(rows * 2 * self.dimension)
+                self.vectors = None
+                self.lists = None
+
+    # Function to append vectors; returns the row id of the first one
+    def add(self, vectors):
+        vectors = normalize(vectors).astype(np.float16)
+        with self.lock:
+            first_row = len(self)
+            with open(self.vectors_path, 'ab') as f:
+                f.write(vectors.tobytes())
+            self.vectors = None
+            self.lists = None
+        return first_row
+
+    def mapped(self):
+        if self.vectors is None:
+            rows = len(self)
+            self.vectors = (np.memmap(self.vectors_path, dtype=np.float16, mode='r', shape=(rows, self.dimension))
+                            if rows else np.empty((0, self.dimension), dtype=np.float16))
+        return self.vectors
+
+    # Function to search every row; returns (scores, row ids), each of shape (queries, k)
+    def search_exact(self, queries, k=10):
+        queries = normalize(np.atleast_2d(queries))
+        vectors = self.mapped()
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_ids = np.empty((len(queries), 0), dtype=np.int64)
+        for start in range(0, len(vectors), BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + BLOCK_ROWS], dtype=np.float32)
+            scores = queries @ block.T
+            ids = np.broadcast_to(np.arange(start, start + len(block)), scores.shape)
+            best_scores, best_ids = top_k(np.hstack([best_scores, scores]), np.hstack([best_ids, ids]), k)
+        return best_scores, best_ids
+
+    # Function to (re)train the coarse quantizer on a sample of the rows; about sqrt(rows) clusters
+    def train(self, clusters=None, sample=None):
+        vectors = self.mapped()
+        clusters = clusters or max(1, int(np.sqrt(len(vectors))))
+        sample_rows = min(len(vectors), sample or 64 * clusters)
+        rows = np.sort(np.random.default_rng(0).choice(len(vectors), sample_rows, replace=False))
+        with timed("index_train"):
+            centroids = train_centroids(np.asarray(vectors[rows], dtype=np.float32), clusters)
+        with self.lock:
+            self.centroids = centroids
+            self.trained_rows = len(vectors)
+            self.lists = None
+        np.save(self.centroids_path, centroids)
+
+    # Function to group the rows by cluster: row ids and a contiguous float16 copy in cluster order
+    def build_lists(self):
+        vectors = self.mapped()
+        assignments = assign(vectors, self.centroids)
+        order = np.argsort(assignments, kind='stable')
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(assignments, minlength=len(self.centroids)))))
+        self.lists = (order, offsets, np.ascontiguousarray(vectors[order]))
+
+    def search_ivf(self, queries, k=10, nprobe=DEFAULT_NPROBE):
+        if self.centroids is None or len(self) > RETRAIN_GROWTH * max(self.trained_rows, 1):
+            self.train()
+        if self.lists is None:
+            self.build_lists()
+        order, offsets, ordered = self.lists
+        queries = normalize(np.atleast_2d(queries))
+        probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :nprobe]
+
+        all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        all_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for query_index, query in enumerate(queries):
+            positions = np.concatenate([np.arange(offsets[cluster], offsets[cluster + 1]) for cluster in probes[query_index]])
+            if not len(positions):
+                continue
+            scores = ordered[positions].astype(np.float32) @ query
+            scores, ids = top_k(scores[None, :], order[positions][None, :], k)
+            all_scores[query_index, :scores.shape[1]] = scores[0]
+            all_ids[query_index, :ids.shape[1]] = ids[0]
+        return all_scores, all_ids
+
+    # Function to search with IVF once the index is big enough to need it, exactly otherwise
+    def search(self, queries, k=10, mode="auto", nprobe=DEFAULT_NPROBE):
+        if mode == "exact" or (mode == "auto" and len(self) < MIN_IVF_ROWS):
+            return self.search_exact(queries, k)
+        return self.search_ivf(queries, k, nprobe)
+
+# Semantic search over the books in the download directory. Each book's text is cut into the
+# embedding windows, every window becomes a row of the vector index, and SQLite maps rows back to
+# books. Books are keyed by content MD5, so re-running update() only embeds books that are new.
+class LibraryIndex:
+    def __init__(self, service, directory=DEFAULT_INDEX_DIR):
+        self.service = service
+        # One index per embedding model; vectors of different models cannot be compared
+        directory = os.path.join(directory, re.sub(r'[^\w.-]+', '_', service.encoder.name))
+        self.index = VectorIndex(directory, service.encoder.dimension)
+        self.connection = sqlite3.connect(os.path.join(directory, "chunks.sqlite3"), timeout=30,
+                                          check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " digest TEXT PRIMARY KEY, path TEXT NOT NULL, first_row INTEGER NOT NULL, chunks INTEGER NOT NULL,"
+            " added REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " row INTEGER PRIMARY KEY, digest TEXT NOT NULL, chunk INTEGER NOT NULL, preview TEXT NOT NULL);"
+        )
+        # Vectors are appended before their rows are committed; drop any a crash left unreferenced
+        self.index.truncate(self.connection.execute("SELECT COUNT(*) FROM chunks").fetchone()[0])
+
+    def indexed(self, digest):
+        return self.connection.execute("SELECT 1 FROM documents WHERE digest = ?", (digest,)).fetchone() is not None
+
+    # Function to add one book's text unless the same content is already indexed
+    def add_document(self, path, text, digest):
+        if self.indexed(digest):
+            self.connection.execute("UPDATE documents SET path = ? WHERE digest = ?", (path, digest))
+            return 0
+        windows = text_windows(text)
+        first_row = self.index.add(self.service.embed(windows))
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.connection.executemany("INSERT INTO chunks (row, digest, chunk, preview) VALUES (?, ?, ?, ?)",
+                                        [(first_row + number, digest, number, window[:200])
+                                         for number, window in enumerate(windows)])
+            self.connection.execute("INSERT INTO documents (digest, path, first_row, chunks, added) VALUES (?, ?, ?, ?, ?)",
+                                    (digest, path, first_row, len(windows), time.time()))
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        return len(windows)
+
+    # Function to index the books that landed in the directory since the last update
+    def update(self, directory="downloads", text_cache=None):
+        new_paths = {}
+        for path in iter_documents(directory, ('.pdf',)):
+            digest = hash_existing(path).hexdigest()
+            if not self.indexed(digest):
+                new_paths[path] = digest
+
+        books = added = 0
+        for path, pages in TextExtractor(cache=text_cache).extract_documents(new_paths):
+            added += self.add_document(path, "\n".join(pages), new_paths[path])
+            books += 1
+        print(f"Indexed {books} new books ({added} chunks); {len(self.index)} chunks in total")
+        return added
+
+    # Function to find the k chunks closest to a query: dicts with path, chunk, score and preview
+    def search(self, query, k=10, mode="auto", nprobe=DEFAULT_NPROBE):
+        query_vector = self.service.embed([query])
+        with timed("semantic_search"):
+            scores, rows = self.index.search(query_vector, k, mode, nprobe)
+        results = []
+        for score, row in zip(scores[0], rows[0]):
+            if row < 0:
+                continue
+            path, chunk, preview = self.connection.execute(
+                "SELECT documents.path, chunks.chunk, chunks.preview FROM chunks"
+                " JOIN documents ON documents.digest = chunks.digest WHERE chunks.row = ?", (int(row),)).fetchone()
+            results.append({"path": path, "chunk": chunk, "score": round(float(score), 4), "preview": preview})
+        return results
+
+def main():
+    directory = input("Enter the download directory to index [downloads]: ") or "downloads"
+    mode = input("Embedding model: bert, or glove for the cheap offline mode [bert]: ").strip().lower() or "bert"
+
+    library = LibraryIndex(get_embedding_service(mode))
+    library.update(directory, TextCache())
+    while True:
+        query = input("\nSearch the library (empty to quit): ").strip()
+        if not query:
+            break
+        start_time = time.perf_counter()
+        results = library.search(query)
+        print(f"{len(results)} results in {(time.perf_counter() - start_time) * 1000:.1f} ms")
+        for result in results:
+            print(f"  {result['score']:.3f}  {os.path.basename(result['path'])} (chunk {result['chunk']}): "
+                  f"{result['preview'][:100]}")
+
+if __name__ == "__main__":
+    main()
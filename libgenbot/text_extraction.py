@@ -0,0 +1,253 @@
+import os
+import time
+import zlib
+import sqlite3
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from libgenbot.resumable_download import hash_existing
+from libgenbot.metrics import timed, PAGES_EXTRACTED
+
+try:
+    import PyPDF2
+except ImportError:
+    PyPDF2 = None
+
+try:
+    import docx
+except ImportError:
+    docx = None
+
+DEFAULT_TEXT_CACHE_PATH = os.environ.get("LIBGENBOT_TEXT_CACHE", "text_cache.sqlite3")
+EXTENSIONS = ('.pdf', '.docx')
+PAGES_PER_TASK = 16  # PDF pages handed to a worker at once; a big book is spread over the whole pool
+DOCX_PARAGRAPHS_PER_PAGE = 50  # DOCX has no pages, so paragraphs are grouped into page-sized units
+
+# Function to extract the text of pages [start, stop) of a PDF; runs in a worker process
+def extract_pdf_pages(path, start, stop):
+    if PyPDF2 is None:
+        raise ImportError("PDF text extraction needs the PyPDF2 package installed.")
+    reader = PyPDF2.PdfReader(path)
+    return [reader.pages[number].extract_text() or "" for number in range(start, stop)]
+
+# Function to extract a DOCX file as page-sized groups of paragraphs; runs in a worker process
+def extract_docx_pages(path):
+    if docx is None:
+        raise ImportError("DOCX text extraction needs the python-docx package installed.")
+    paragraphs = [paragraph.text for paragraph in docx.Document(path).paragraphs]
+    return ["\n".join(paragraphs[start:start + DOCX_PARAGRAPHS_PER_PAGE])
+            for start in range(0, len(paragraphs), DOCX_PARAGRAPHS_PER_PAGE)] or [""]
+
+def pdf_page_count(path):
+    if PyPDF2 is None:
+        raise ImportError("PDF text extraction needs the PyPDF2 package installed.")
+    return len(PyPDF2.PdfReader(path).pages)
+
+# Generator yielding the extractable documents under a directory, in name order
+def iter_documents(directory, extensions=EXTENSIONS):
+    for entry in sorted(os.scandir(directory), key=lambda entry: entry.name):
+        if entry.is_file() and entry.name.lower().endswith(extensions):
+            yield entry.path
+
+# On-disk cache of extracted text keyed by the MD5 of the file's content, so a renamed or
+# re-downloaded copy of an unchanged book is never parsed again. Pages are stored zlib-compressed.
+class TextCache:
+    def __init__(self, path=DEFAULT_TEXT_CACHE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " digest TEXT PRIMARY KEY, pages INTEGER NOT NULL, created REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " digest TEXT NOT NULL, page INTEGER NOT NULL, text BLOB NOT NULL,"
+            " PRIMARY KEY (digest, page)) WITHOUT ROWID;"
+        )
+
+    # Function to get a document's cached pages; None unless every page was stored
+    def get(self, digest):
+        with self.lock:
+            if self.connection.execute("SELECT 1 FROM documents WHERE digest = ?", (digest,)).fetchone() is None:
+                return None
+            rows = self.connection.execute("SELECT text FROM pages WHERE digest = ? ORDER BY page",
+                                           (digest,)).fetchall()
+        return [zlib.decompress(row[0]).decode('utf-8') for row in rows]
+
+    # Function to store all pages of a document; the documents row is written last, in the same
+    # transaction, so an interrupted run never leaves a half-cached book that looks complete
+    def put(self, digest, pages):
+        rows = [(digest, number, zlib.compress(text.encode('utf-8'))) for number, text in enumerate(pages)]
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.execute("DELETE FROM pages WHERE digest = ?", (digest,))
+                self.connection.executemany("INSERT INTO pages (digest, page, text) VALUES (?, ?, ?)", rows)
+                self.connection.execute("INSERT OR REPLACE INTO documents (digest, pages, created) VALUES (?, ?, ?)",
+                                        (digest, len(pages), time.time()))
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+# Extracts PDF/DOCX text page by page in a process pool and streams the pages back in document
+# order. At most a few tasks per worker are in flight, so memory stays flat however many books
+# the directory holds. A document's pages are released once all of its tasks succeeded, so a
+# document that fails partway yields nothing and is not mistaken for a complete (shorter) one.
+class TextExtractor:
+    def __init__(self, processes=None, cache=None, pages_per_task=PAGES_PER_TASK):
+        self.processes = processes or os.cpu_count() or 1
+        self.cache = cache
+        self.pages_per_task = pages_per_task
+        self.files = 0
+        self.cached_files = 0
+        self.failed_files = 0
+        self.pages = 0
+        self.cached_pages = 0
+        self.seconds = 0.0
+
+    # Function to split one document into worker tasks: (function, args) pairs
+    def tasks(self, path):
+        if path.lower().endswith('.docx'):
+            return [(extract_docx_pages, (path,))]
+        page_count = pdf_page_count(path)
+        return [(extract_pdf_pages, (path, start, min(start + self.pages_per_task, page_count)))
+                for start in range(0, page_count, self.pages_per_task)]
+
+    # Generator yielding (path, page number, text) for every page of every document
+    def extract(self, paths):
+        start_time = time.perf_counter()
+        in_flight = deque()  # (path, digest, future, last task of the document?)
+        pending_pages = {}   # path -> pages extracted so far, yielded and cached once complete
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.processes) as executor:
+                for path in paths:
+                    self.files += 1
+                    digest = hash_existing(path).hexdigest() if self.cache is not None else None
+                    cached = self.cache.get(digest) if self.cache is not None else None
+                    if cached is not None:
+                        # Nothing may overtake pages still being extracted for earlier documents
+                        yield from self.drain(in_flight, pending_pages, 0)
+                        self.cached_files += 1
+                        self.cached_pages += len(cached)
+                        PAGES_EXTRACTED.inc(len(cached), source="cache")
+                        for number, text in enumerate(cached):
+                            yield path, number, text
+                        continue
+
+                    try:
+                        tasks = self.tasks(path)
+                    except Exception as e:
+                        print(f"Failed to open {path}: {e}")
+                        self.failed_files += 1
+                        continue
+                    if not tasks:  # A PDF without pages
+                        if self.cache is not None:
+                            self.cache.put(digest, [])
+                        continue
+                    pending_pages[path] = []
+                    for index, (function, args) in enumerate(tasks):
+                        in_flight.append((path, digest, executor.submit(function, *args), index == len(tasks) - 1))
+                        yield from self.drain(in_flight, pending_pages, 4 * self.processes)
+                yield from self.drain(in_flight, pending_pages, 0)
+        finally:
+            self.seconds += time.perf_counter() - start_time
+
+    # Generator that waits for the oldest tasks until at most `keep` are in flight
+    def drain(self, in_flight, pending_pages, keep):
+        while len(in_flight) > keep:
+            path, digest, future, last = in_flight.popleft()
+            if path not in pending_pages:
+                future.cancel()  # The document already failed
+                continue
+            try:
+                with timed("extract"):
+                    texts = future.result()
+            except Exception as e:
+                print(f"Failed to extract {path}: {e}")
+                self.failed_files += 1
+                del pending_pages[path]
+                continue
+
+            pages = pending_pages[path]
+            pages.extend(texts)
+            self.pages += len(texts)
+            PAGES_EXTRACTED.inc(len(texts), source="parsed")
+
+            if last:
+                del pending_pages[path]
+                if self.cache is not None:
+                    self.cache.put(digest, pages)
+                for number, text in enumerate(pages):
+                    yield path, number, text
+
+    # Generator yielding (path, pages) for every document as soon as its last page is extracted, so
+    # callers hold one document's pages at a time (extract yields whole documents one after another).
+    # Documents that failed are left out, so indexes built from it retry them on their next update.
+    def extract_documents(self, paths):
+        current_path, pages = None, []
+        for path, number, text in self.extract(paths):
+            if path != current_path and current_path is not None:
+                yield current_path, pages
+                pages = []
+            current_path = path
+            pages.append(text)
+        if current_path is not None:
+            yield current_path, pages
+
+    def report(self):
+        total_pages = self.pages + self.cached_pages
+        return {
+            "files": self.files,
+            "cached_files": self.cached_files,
+            "failed_files": self.failed_files,
+            "pages": total_pages,
+            "parsed_pages": self.pages,
+            "cached_pages": self.cached_pages,
+            "seconds": round(self.seconds, 3),
+            "pages_per_second": round(total_pages / self.seconds, 1) if self.seconds else 0.0,
+            "processes": self.processes,
+        }
+
+# Generator yielding (path, text) for every document under a directory, one document at a time
+def iter_document_texts(directory, processes=None, cache=None):
+    for path, pages in TextExtractor(processes, cache).extract_documents(iter_documents(directory)):
+        yield path, "\n".join(pages)
+
+# Function to read the text of one PDF (what the notebook's read_pdf did, without the repeated concatenation)
+def read_pdf(file_path):
+    return "\n".join(extract_pdf_pages(file_path, 0, pdf_page_count(file_path)))
+
+# Function to read the text of one DOCX file
+def read_docx(file_path):
+    return "\n".join(extract_docx_pages(file_path))
+
+def print_report(report):
+    print(f"{report['pages']} pages from {report['files']} files in {report['seconds']}s "
+          f"({report['pages_per_second']} pages/sec, {report['processes']} processes)")
+    print(f"Text cache: {report['cached_files']} files ({report['cached_pages']} pages) served from cache, "
+          f"{report['failed_files']} failed")
+
+def main():
+    directory = input("Enter the path to the local directory containing PDF/DOCX files: ")
+    processes = int(input("Enter the number of worker processes [all cores]: ") or 0) or None
+
+    extractor = TextExtractor(processes, TextCache())
+    characters = 0
+    for path, number, text in extractor.extract(iter_documents(directory)):
+        characters += len(text)
+    print(f"Extracted {characters} characters of text.")
+    print_report(extractor.report())
+
+if __name__ == "__main__":
+    main()
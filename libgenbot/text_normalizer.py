@@ -0,0 +1,121 @@
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from libgenbot.text_extraction import iter_document_texts
+
+try:
+    import nltk
+    from nltk.corpus import stopwords
+    from nltk.stem import WordNetLemmatizer
+except ImportError:
+    nltk = None
+
+# Distinct raw tokens remembered. Word frequencies are Zipfian, so the frequent words - nearly all
+# tokens of a library - show up early and fill the cache; the long tail just gets computed.
+DEFAULT_CACHE_SIZE = 200000
+DOCUMENTS_PER_BATCH = 16
+
+# Alphanumeric runs; close to word_tokenize followed by isalnum(), but contractions split
+# differently ("don't" -> "don", "t" rather than "do", "n't")
+SIMPLE_TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+# Function to download the NLTK data the normalizer needs; the notebook did this on every run
+def download_resources():
+    for resource in ('stopwords', 'punkt', 'wordnet'):
+        nltk.download(resource, quiet=True)
+
+# Reusable lowercase -> tokenize -> drop stop words and punctuation -> lemmatize pipeline.
+# The stop word set and lemmatizer are built once, and each distinct raw token's outcome
+# (its lemma, or None when it is dropped) is memoized, so the common words cost one dict lookup.
+class TextNormalizer:
+    def __init__(self, language='english', cache_size=DEFAULT_CACHE_SIZE, tokenizer="nltk"):
+        if nltk is None:
+            raise ImportError("Text normalization needs the nltk package installed.")
+        self.language = language
+        self.stop_words = frozenset(stopwords.words(language))
+        self.lemmatizer = WordNetLemmatizer()
+        self.tokenizer = tokenizer
+        self.tokenize = nltk.word_tokenize if tokenizer == "nltk" else SIMPLE_TOKEN_PATTERN.findall
+        self.cache_size = cache_size
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def normalize_token(self, token):
+        if not token.isalnum() or token in self.stop_words:
+            return None
+        return self.lemmatizer.lemmatize(token)
+
+    # Function to turn a text into its normalized tokens (same output as the notebook's preprocess_text)
+    def tokens(self, text):
+        cache = self.cache
+        normalized = []
+        misses = 0
+        tokens = self.tokenize(text.lower())
+        for token in tokens:
+            try:
+                lemma = cache[token]
+            except KeyError:
+                misses += 1
+                lemma = self.normalize_token(token)
+                if len(cache) < self.cache_size:
+                    cache[token] = lemma
+            if lemma is not None:
+                normalized.append(lemma)
+        self.hits += len(tokens) - misses
+        self.misses += misses
+        return normalized
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "cached_tokens": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+_normalizer = None
+
+# Worker process initializer: build one normalizer per process, reused for every batch
+def init_worker(language, cache_size, tokenizer):
+    global _normalizer
+    _normalizer = TextNormalizer(language, cache_size, tokenizer)
+
+def normalize_batch(texts):
+    return [_normalizer.tokens(text) for text in texts]
+
+# Generator yielding the token list of every text, in input order. Texts are sent to worker
+# processes in batches, and only a few batches per worker are in flight, so neither the corpus
+# nor its tokens are ever held in memory at once.
+def normalize_texts(texts, processes=None, batch_size=DOCUMENTS_PER_BATCH, language='english',
+                    cache_size=DEFAULT_CACHE_SIZE, tokenizer="nltk"):
+    processes = processes or os.cpu_count() or 1
+    in_flight = deque()
+    with ProcessPoolExecutor(max_workers=processes, initializer=init_worker,
+                             initargs=(language, cache_size, tokenizer)) as executor:
+        batch = []
+        for text in texts:
+            batch.append(text)
+            if len(batch) == batch_size:
+                in_flight.append(executor.submit(normalize_batch, batch))
+                batch = []
+                while len(in_flight) > 2 * processes:
+                    yield from in_flight.popleft().result()
+        if batch:
+            in_flight.append(executor.submit(normalize_batch, batch))
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+# Generator yielding (path, tokens) for every PDF/DOCX document under a directory
+def iter_document_tokens(directory, processes=None, text_cache=None, tokenizer="nltk"):
+    paths = deque()
+
+    def texts():
+        for path, text in iter_document_texts(directory, processes, text_cache):
+            paths.append(path)
+            yield text
+
+    for tokens in normalize_texts(texts(), processes, tokenizer=tokenizer):
+        yield paths.popleft(), tokens
@@ -0,0 +1,94 @@
+import os
+import numpy as np
+from libgenbot.text_extraction import TextCache
+from libgenbot.text_normalizer import iter_document_tokens
+
+ROW_WIDTH = 512  # Tokens per matrix row, as in the notebook
+PADDING_ID = 0   # Fills the end of the last row; real token ids start at 1
+
+# Function to pick the smallest unsigned dtype that holds every token id
+def smallest_dtype(vocabulary_size):
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if vocabulary_size <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+# Function to build a sorted vocabulary and the token ids. Ids are positions in the sorted
+# vocabulary (plus one for padding), so the same tokens always get the same ids. Only the distinct
+# words are sorted; the ids come from one dict lookup per token, written straight into the array.
+def build_vocabulary(tokens):
+    vocabulary = np.unique(np.array(list(set(tokens)), dtype=str))
+    index = {word: position for position, word in enumerate(vocabulary.tolist(), start=1)}
+    ids = np.fromiter(map(index.__getitem__, tokens), dtype=smallest_dtype(len(vocabulary)), count=len(tokens))
+    return vocabulary, ids
+
+# Function to encode tokens with an existing sorted vocabulary; raises KeyError on unknown tokens
+def encode(tokens, vocabulary):
+    tokens = np.asarray(tokens, dtype=str)
+    positions = np.searchsorted(vocabulary, tokens)
+    positions = np.minimum(positions, len(vocabulary) - 1)
+    unknown = vocabulary[positions] != tokens
+    if unknown.any():
+        raise KeyError(f"{int(unknown.sum())} tokens are not in the vocabulary, e.g. {tokens[unknown][0]!r}")
+    return (positions + 1).astype(smallest_dtype(len(vocabulary)))
+
+# Function to lay token ids out as rows of `width`, padding the last row (no Python loop)
+def to_matrix(ids, width=ROW_WIDTH):
+    if len(ids) <= width:
+        return ids.reshape(1, -1)
+    rows = -(-len(ids) // width)
+    matrix = np.full(rows * width, PADDING_ID, dtype=ids.dtype)
+    matrix[:len(ids)] = ids
+    return matrix.reshape(rows, width)
+
+# Function to turn a matrix back into text: drop the padding, then look every id up at once
+def decode(matrix, vocabulary):
+    ids = np.asarray(matrix).ravel()
+    ids = ids[ids != PADDING_ID]
+    return ' '.join(np.asarray(vocabulary, dtype=object)[ids.astype(np.intp) - 1])
+
+def vocabulary_path(matrix_path):
+    return os.path.splitext(matrix_path)[0] + ".vocab.txt"
+
+# Function to encode tokens and write them as a .npy matrix plus a one-word-per-line vocabulary
+# file; the matrix is written through a memory map and returned as one
+def save_token_matrix(tokens, path, width=ROW_WIDTH):
+    vocabulary, ids = build_vocabulary(tokens)
+    matrix = to_matrix(ids, width)
+
+    stored = np.lib.format.open_memmap(path, mode='w+', dtype=matrix.dtype, shape=matrix.shape)
+    stored[:] = matrix
+    stored.flush()
+
+    with open(vocabulary_path(path), 'w', encoding='utf-8') as f:
+        f.writelines(word + "\n" for word in vocabulary)
+    return stored, vocabulary
+
+# Function to open a saved matrix without reading it into memory, with its vocabulary
+def load_token_matrix(path):
+    with open(vocabulary_path(path), encoding='utf-8') as f:
+        vocabulary = np.array(f.read().splitlines(), dtype=str)
+    return np.load(path, mmap_mode='r'), vocabulary
+
+# Function to report the storage a matrix takes, using its real element size
+def calculate_storage(matrix):
+    total_storage_bytes = matrix.size * matrix.dtype.itemsize
+    total_storage_kb = total_storage_bytes / 1024
+    total_storage_mb = total_storage_kb / 1024
+    total_storage_gb = total_storage_mb / 1024
+    return total_storage_bytes, total_storage_kb, total_storage_mb, total_storage_gb
+
+def main():
+    directory = input("Enter the path to the local directory containing PDF/DOCX files: ")
+    output = input("Enter the output matrix file [token_matrix.npy]: ") or "token_matrix.npy"
+
+    tokens = [token for path, document_tokens in iter_document_tokens(directory, text_cache=TextCache())
+              for token in document_tokens]
+    matrix, vocabulary = save_token_matrix(tokens, output)
+
+    total_bytes, total_kb, total_mb, _ = calculate_storage(matrix)
+    print(f"Matrix shape: {matrix.shape}, dtype {matrix.dtype}, {len(vocabulary)} distinct tokens")
+    print(f"Storage: {total_bytes} bytes ({total_mb:.2f} MB), saved to {output} and {vocabulary_path(output)}")
+
+if __name__ == "__main__":
+    main()